@@ -0,0 +1,306 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+
+from nodes import VariablePWLNode, VariablePWCNode, HigherThanNode, LowerThanNode, ShiftNode, MultiplyByConst, \
+    IntegralWindowNode, MinWindowNode, MaxWindowNode, MinOptimalWindowNode, MinNode, MaxNode, SumNode, SubNode, \
+    FilterNode
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+STEP = 5.0  # minutes between samples, the CGM cadence
+WINDOW = 180.0
+BATCH_SIZE = 4096
+
+
+# Synthetic generators: (times, values) arrays of `size` samples, STEP apart.
+
+def random_walk(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(size) * STEP, 100 + np.cumsum(rng.normal(0, 1, size))
+
+
+def cgm_like(size, seed=0):
+    # Glucose around a basal level with a meal response every 4-7 hours and the delayed, slower insulin action
+    # that follows it, both as gamma-shaped bumps, plus sensor noise.
+    rng = np.random.default_rng(seed)
+    meals = np.zeros(size)
+    position = int(rng.integers(0, 60))
+    while position < size:
+        meals[position] = rng.uniform(40, 120)
+        position += int(rng.uniform(4, 7) * 60 / STEP)
+    kernel_time = np.arange(0, 360, STEP)
+    meal_kernel = kernel_time / 45 * np.exp(1 - kernel_time / 45)
+    insulin_kernel = 0.6 * np.clip(kernel_time - 20, 0, None) / 90 * np.exp(1 - np.clip(kernel_time - 20, 0, None) / 90)
+    response = np.convolve(meals, meal_kernel - insulin_kernel)[:size]
+    return np.arange(size) * STEP, np.clip(110 + response + rng.normal(0, 3, size), 40, 400)
+
+
+def steps(size, seed=0):
+    # Piecewise constant levels that change with probability 0.02 at every sample.
+    rng = np.random.default_rng(seed)
+    level = np.cumsum(rng.random(size) < 0.02)
+    return np.arange(size) * STEP, rng.normal(100, 20, level[-1] + 1)[level]
+
+
+GENERATORS = {'random_walk': random_walk, 'cgm_like': cgm_like, 'steps': steps}
+
+
+# Cases: build(window, threshold) returns the input nodes, fed one sample each per step, and the output nodes.
+
+def chain(factory):
+    # A single node, built by factory(window, threshold), fed by a VariablePWLNode.
+    def build(window, threshold):
+        signal = VariablePWLNode()
+        node = factory(window, threshold)
+        signal.to(node.receive)
+        return [signal], [node]
+    return build
+
+
+def binary(node_class):
+    def build(window, threshold):
+        left, right = VariablePWLNode(), VariablePWLNode()
+        node = node_class()
+        left.to(node.receive_left)
+        right.to(node.receive_right)
+        return [left, right], [node]
+    return build
+
+
+def variable(node_class):
+    def build(window, threshold):
+        node = node_class()
+        return [node], [node]
+    return build
+
+
+def filter_graph(window, threshold):
+    signal = VariablePWLNode()
+    higher = HigherThanNode(threshold)
+    node = FilterNode()
+    signal.to(node.receive_left)
+    signal.to(higher.receive)
+    higher.to(node.receive_right)
+    return [signal], [node]
+
+
+def cgm_graph(window, threshold):
+    # Mirrors usecase/cgm/cgm.py: time above/below range and the conditional mean glucose over 180 minutes.
+    glucose = VariablePWLNode()
+    outputs = []
+    for condition in (HigherThanNode(180), LowerThanNode(70)):
+        glucose.to(condition.receive)
+        integral, mean = IntegralWindowNode(180), MultiplyByConst(1 / 180)
+        condition.to(integral.receive)
+        integral.to(mean.receive)
+        filtered, filtered_integral, filtered_mean = FilterNode(), IntegralWindowNode(180), MultiplyByConst(1 / 180)
+        glucose.to(filtered.receive_left)
+        condition.to(filtered.receive_right)
+        filtered.to(filtered_integral.receive)
+        filtered_integral.to(filtered_mean.receive)
+        outputs += [mean, filtered_mean]
+    integral, mean = IntegralWindowNode(180), MultiplyByConst(1 / 180)
+    glucose.to(integral.receive)
+    integral.to(mean.receive)
+    return [glucose], outputs + [mean]
+
+
+def weather_graph(window, threshold):
+    # Mirrors usecase/weather/weather.py: both means over 5 samples above their thresholds.
+    conjunction = MinNode()
+    inputs = []
+    for receive in (conjunction.receive_left, conjunction.receive_right):
+        signal, integral, mean = VariablePWLNode(), IntegralWindowNode(5 * STEP), MultiplyByConst(1 / (5 * STEP))
+        higher = HigherThanNode(threshold)
+        signal.to(integral.receive)
+        integral.to(mean.receive)
+        mean.to(higher.receive)
+        higher.to(receive)
+        inputs.append(signal)
+    return inputs, [conjunction]
+
+
+Case = namedtuple('Case', ['build', 'batch'])
+
+CASES = {
+    'variable_pwl': Case(variable(VariablePWLNode), False),
+    'variable_pwc': Case(variable(VariablePWCNode), False),
+    'variable_pwl_batch': Case(variable(VariablePWLNode), True),
+    'variable_pwc_batch': Case(variable(VariablePWCNode), True),
+    'higher_than': Case(chain(lambda window, threshold: HigherThanNode(threshold)), False),
+    'lower_than': Case(chain(lambda window, threshold: LowerThanNode(threshold)), False),
+    'shift': Case(chain(lambda window, threshold: ShiftNode(STEP / 2)), False),
+    'mult_const': Case(chain(lambda window, threshold: MultiplyByConst(2)), False),
+    'integral_window': Case(chain(lambda window, threshold: IntegralWindowNode(window)), False),
+    'min_window': Case(chain(lambda window, threshold: MinWindowNode(window)), False),
+    'max_window': Case(chain(lambda window, threshold: MaxWindowNode(window)), False),
+    'min_optimal_window': Case(chain(lambda window, threshold: MinOptimalWindowNode(window)), False),
+    'min': Case(binary(MinNode), False),
+    'max': Case(binary(MaxNode), False),
+    'sum': Case(binary(SumNode), False),
+    'sub': Case(binary(SubNode), False),
+    'filter': Case(filter_graph, False),
+    'cgm_graph': Case(cgm_graph, False),
+    'weather_graph': Case(weather_graph, False),
+}
+
+
+class Counter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, interval):
+        self.count += 1
+
+
+def feed(case, window, threshold, times, values, samples, latencies=None):
+    # Runs one fresh graph over the samples; every input node gets its own column of values. samples holds the
+    # same times and values as Python lists, converted beforehand so that neither the conversion nor the lists
+    # count towards the measured time and memory. Returns the number of output intervals. Per-sample latencies
+    # (ns) are written to latencies when given; in batch mode every sample of a batch is charged the batch average.
+    inputs, outputs = case.build(window, threshold)
+    counter = Counter()
+    for node in outputs:
+        node.to(counter)
+    clock = time.perf_counter_ns
+    if case.batch:
+        for low in range(0, len(times), BATCH_SIZE):
+            high = min(low + BATCH_SIZE, len(times))
+            start = clock()
+            for node, column in zip(inputs, values):
+                node.receive_batch(times[low:high], column[low:high])
+            if latencies is not None:
+                latencies[low:high] = (clock() - start) / (high - low)
+        return counter.count
+    receives = [node.receive for node in inputs]
+    times, columns = samples[0], samples[1][:len(inputs)]
+    if latencies is None:
+        for i, t in enumerate(times):
+            for receive, column in zip(receives, columns):
+                receive(t, column[i])
+    else:
+        for i, t in enumerate(times):
+            start = clock()
+            for receive, column in zip(receives, columns):
+                receive(t, column[i])
+            latencies[i] = clock() - start
+    return counter.count
+
+
+def run(case_name, generator_name, size, window=WINDOW, memory=True):
+    case = CASES[case_name]
+    generator = GENERATORS[generator_name]
+    times, first = generator(size, seed=0)
+    second = generator(size, seed=1)[1]
+    values = [first, second]
+    samples = times.tolist(), [first.tolist(), second.tolist()]
+    threshold = float(np.median(first))
+    result = {'case': case_name, 'generator': generator_name, 'size': size, 'window': window}
+    latencies = np.zeros(size)
+    try:
+        # Throughput and latency come from separate passes, so the clock calls around every sample do not slow
+        # down the timed one.
+        start = time.perf_counter()
+        result['outputs'] = feed(case, window, threshold, times, values, samples)
+        seconds = time.perf_counter() - start
+        feed(case, window, threshold, times, values, samples, latencies)
+        if memory:
+            tracemalloc.start()
+            try:
+                feed(case, window, threshold, times, values, samples)
+                result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    except Exception as exception:
+        result['error'] = f"{type(exception).__name__}: {exception}"
+        return result
+    result.update({
+        'seconds': seconds,
+        'throughput': size / seconds,
+        'latency_mean_us': float(np.mean(latencies)) / 1000,
+        'latency_p50_us': float(np.percentile(latencies, 50)) / 1000,
+        'latency_p99_us': float(np.percentile(latencies, 99)) / 1000,
+        'latency_max_us': float(np.max(latencies)) / 1000,
+    })
+    return result
+
+
+def run_suite(cases=None, generators=None, sizes=None, window=WINDOW, memory=True, max_seconds=60.0, log=None):
+    # Runs every case on every generator at increasing sizes. A size is skipped once the previous one took, or
+    # extrapolates linearly to, more than max_seconds, so slow cases stop early instead of stalling the suite.
+    results = []
+    for case_name in cases or CASES:
+        for generator_name in generators or GENERATORS:
+            previous = None
+            for size in sorted(sizes or SIZES):
+                if previous is not None and ('error' in previous or
+                                             previous['seconds'] * size / previous['size'] > max_seconds):
+                    results.append({'case': case_name, 'generator': generator_name, 'size': size, 'window': window,
+                                    'skipped': True})
+                    continue
+                previous = run(case_name, generator_name, size, window, memory)
+                results.append(previous)
+                if log is not None:
+                    log(previous)
+    return results
+
+
+def metadata():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+def compare(baseline, results, tolerance=0.2):
+    # Runs whose throughput dropped more than tolerance below the matching baseline run.
+    key = lambda result: (result['case'], result['generator'], result['size'], result['window'])
+    reference = {key(result): result for result in baseline if 'throughput' in result}
+    regressions = []
+    for result in results:
+        old = reference.get(key(result))
+        if old is not None and 'throughput' in result and result['throughput'] < (1 - tolerance) * old['throughput']:
+            regressions.append((key(result), old['throughput'], result['throughput']))
+    return regressions
+
+
+def print_result(result):
+    if 'error' in result:
+        line = f"error {result['error']}"
+    else:
+        memory = f"  peak {result['peak_memory_bytes'] / 2 ** 20:8.2f} MiB" if 'peak_memory_bytes' in result else ''
+        line = (f"{result['throughput']:12.0f} samples/s  mean {result['latency_mean_us']:9.2f} us  "
+                f"p99 {result['latency_p99_us']:9.2f} us{memory}")
+    print(f"{result['case']:20} {result['generator']:12} {result['size']:>9}  {line}", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Throughput, per-sample latency and peak memory of the nodes.')
+    parser.add_argument('--cases', nargs='*', choices=list(CASES))
+    parser.add_argument('--generators', nargs='*', choices=list(GENERATORS))
+    parser.add_argument('--sizes', nargs='*', type=int)
+    parser.add_argument('--window', type=float, default=WINDOW)
+    parser.add_argument('--max-seconds', type=float, default=60.0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='results file to check for throughput regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    arguments = parser.parse_args()
+
+    results = run_suite(arguments.cases, arguments.generators, arguments.sizes, arguments.window,
+                        not arguments.no_memory, arguments.max_seconds, log=print_result)
+    with open(arguments.output, 'w') as file:
+        json.dump({'metadata': metadata(), 'results': results}, file, indent=1)
+    print(f"Results saved to: {arguments.output}")
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = compare(json.load(file)['results'], results, arguments.tolerance)
+        for (case_name, generator_name, size, window), old, new in regressions:
+            print(f"regression {case_name} {generator_name} {size}: {old:.0f} -> {new:.0f} samples/s")
+        sys.exit(1 if regressions else 0)
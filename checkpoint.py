@@ -0,0 +1,104 @@
+import pickle
+import struct
+from typing import Dict
+
+from elements import Interval
+from functions import Polynomial, UndefinedFunction
+
+MAGIC = b'GEMONCKP'
+VERSION = 1
+# start, end, a, b, c and flags. Checkpoints written before the PROVISIONAL flag existed only use UNDEFINED.
+INTERVAL_RECORD = struct.Struct('<dddddB')
+UNDEFINED = 1
+PROVISIONAL = 2
+
+
+class PackedIntervals:
+
+    def __init__(self, data: bytes, single: bool = False):
+        self.data = data
+        self.single = single
+
+    @staticmethod
+    def pack(intervals, single=False) -> 'PackedIntervals':
+        data = bytearray(INTERVAL_RECORD.size * len(intervals))
+        for i, interval in enumerate(intervals):
+            function = interval.function
+            flags = (UNDEFINED if isinstance(function, UndefinedFunction) else 0) | \
+                (PROVISIONAL if interval.provisional else 0)
+            INTERVAL_RECORD.pack_into(data, i * INTERVAL_RECORD.size, interval.start, interval.end,
+                                      function.a, function.b, function.c, flags)
+        return PackedIntervals(bytes(data), single)
+
+    def unpack(self):
+        intervals = []
+        for start, end, a, b, c, flags in INTERVAL_RECORD.iter_unpack(self.data):
+            function = Polynomial.undefined() if flags & UNDEFINED else Polynomial(a, b, c)
+            interval = Interval(start, end, function)
+            intervals.append(interval.as_provisional() if flags & PROVISIONAL else interval)
+        if self.single:
+            return intervals[0]
+        return intervals
+
+    def __reduce__(self):
+        return PackedIntervals, (self.data, self.single)
+
+
+def encode(state):
+    if isinstance(state, Interval):
+        return PackedIntervals.pack([state, ], single=True)
+    if isinstance(state, list):
+        if state and all(isinstance(item, Interval) for item in state):
+            return PackedIntervals.pack(state)
+        return [encode(item) for item in state]
+    if isinstance(state, tuple):
+        return tuple(encode(item) for item in state)
+    if isinstance(state, dict):
+        return {key: encode(value) for key, value in state.items()}
+    return state
+
+
+def decode(state):
+    if isinstance(state, PackedIntervals):
+        return state.unpack()
+    if isinstance(state, list):
+        return [decode(item) for item in state]
+    if isinstance(state, tuple):
+        return tuple(decode(item) for item in state)
+    if isinstance(state, dict):
+        return {key: decode(value) for key, value in state.items()}
+    return state
+
+
+# The wiring of a graph (observers, Memory computations) is code and is not stored: the graph is rebuilt
+# by the same specification and then every node gets back its internal state, without replaying the data.
+def snapshot(nodes: Dict[str, object]) -> bytes:
+    sections = {name: pickle.dumps(encode(node.get_state()), protocol=pickle.HIGHEST_PROTOCOL)
+                for name, node in nodes.items()}
+    return MAGIC + struct.pack('<H', VERSION) + pickle.dumps(sections, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore(nodes: Dict[str, object], data: bytes):
+    # Sections are unpickled, and unpickling can run arbitrary code: only restore checkpoints this program wrote
+    # or that come from a trusted store, never data received from a client.
+    header_length = len(MAGIC) + 2
+    if data[:len(MAGIC)] != MAGIC:
+        raise Exception("Data is not a checkpoint")
+    version, = struct.unpack('<H', data[len(MAGIC):header_length])
+    if version != VERSION:
+        raise Exception(f"Unsupported checkpoint version {version}")
+    sections = pickle.loads(data[header_length:])
+    for name, node in nodes.items():
+        if name in sections:
+            node.set_state(decode(pickle.loads(sections[name])))
+
+
+def save(path, nodes: Dict[str, object]):
+    with open(path, 'wb') as file:
+        file.write(snapshot(nodes))
+
+
+def load(path, nodes: Dict[str, object]):
+    # Same trust requirement as restore.
+    with open(path, 'rb') as file:
+        restore(nodes, file.read())
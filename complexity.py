@@ -0,0 +1,57 @@
+import time
+
+import numpy as np
+
+from nodes import VariablePWLNode
+
+# Declared bounds on the growth exponent of the per-sample cost. At the sizes measured here a logarithmic factor
+# fits an exponent well below LOGARITHMIC.
+CONSTANT = 0.0
+LOGARITHMIC = 0.25
+LINEAR = 1.0
+TOLERANCE = 0.35
+
+WINDOWS = [32, 128, 512, 2048]
+COUNTS = [500, 2000, 8000]
+
+
+def random_walk(count, seed=0):
+    # Unit-spaced samples, so window lengths are numbers of samples.
+    rng = np.random.default_rng(seed)
+    return np.arange(count, dtype=float).tolist(), np.cumsum(rng.normal(0, 1, count)).tolist()
+
+
+def per_sample_cost(factory, window, count, repeats=3):
+    # Seconds per sample of a node built by factory(window) and fed by a VariablePWLNode, measured over count
+    # samples once the window is full. The minimum over repeats filters out scheduling noise.
+    warm_up = int(window) + 2
+    times, values = random_walk(warm_up + count)
+    best = float('inf')
+    for _ in range(repeats):
+        variable = VariablePWLNode()
+        variable.to(factory(window).receive)
+        for i in range(warm_up):
+            variable.receive(times[i], values[i])
+        start = time.perf_counter()
+        for i in range(warm_up, warm_up + count):
+            variable.receive(times[i], values[i])
+        best = min(best, (time.perf_counter() - start) / count)
+    return best
+
+
+def fit_exponent(sizes, costs):
+    # Slope of the least-squares line through (log size, log cost): cost ~ size ** exponent.
+    return float(np.polyfit(np.log(sizes), np.log(costs), 1)[0])
+
+
+def window_exponent(factory, windows=WINDOWS, count=1000):
+    return fit_exponent(windows, [per_sample_cost(factory, window, count) for window in windows])
+
+
+def input_exponent(factory, window=32, counts=COUNTS):
+    return fit_exponent(counts, [per_sample_cost(factory, window, count) for count in counts])
+
+
+def check(exponent, bound, tolerance=TOLERANCE):
+    if exponent > bound + tolerance:
+        raise Exception(f"Per-sample cost grows with exponent {exponent:.2f}, above the declared bound {bound}")
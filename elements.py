@@ -108,6 +108,8 @@ class IntervalOperators:
 
 
 class Interval:
+    # Set on the early verdicts of the anticipatory window nodes, which the exact output later confirms.
+    provisional = False
 
     def __init__(self, start: float, end: float, function: Polynomial):
         self.start = start
@@ -124,6 +126,11 @@ class Interval:
     def subset(self, start, end) -> 'Interval':
         return Interval(start, end, self.function)
 
+    def as_provisional(self) -> 'Interval':
+        interval = Interval(self.start, self.end, self.function)
+        interval.provisional = True
+        return interval
+
     def __repr__(self):
         return f"[{self.start} - {self.end}] | {self.function}"
 
@@ -199,6 +206,8 @@ class Interval:
     def min_interval(self, other):
         if (self.start, self.end) != (other.start, other.end):
             raise Exception("Cannot compute the minimum interval of intervals with different bounds")
+        if self.is_undefined() or other.is_undefined():
+            return [Interval(self.start, self.end, Polynomial.undefined()), ]
         self_left_value, self_right_value = self.get_extreme_value()
         other_left_value, other_right_value = other.get_extreme_value()
         zeros = self.zeros(other)
@@ -227,6 +236,8 @@ class Interval:
     def max_interval(self, other):  # TODO: unify with min interval
         if (self.start, self.end) != (other.start, other.end):
             raise Exception("Cannot compute the maximum interval of intervals with different bounds")
+        if self.is_undefined() or other.is_undefined():
+            return [Interval(self.start, self.end, Polynomial.undefined()), ]
         self_left_value, self_right_value = self.get_extreme_value()
         other_left_value, other_right_value = other.get_extreme_value()
         zeros = self.zeros(other)
@@ -253,6 +264,8 @@ class Interval:
         return min_interval
 
     def higher_than(self, threshold: float):  # TODO: unify with min interval
+        if self.is_undefined():
+            return [self, ]
         interval = Interval(self.start, self.end, Polynomial.constant(threshold))
         zeros = self.zeros(interval)
         if not zeros:
@@ -274,6 +287,8 @@ class Interval:
         return filtered_interval
 
     def lower_than(self, threshold: float):  # TODO: unify with min interval
+        if self.is_undefined():
+            return [self, ]
         interval = Interval(self.start, self.end, Polynomial.constant(threshold))
         zeros = self.zeros(interval)
         if not zeros:
@@ -332,6 +347,12 @@ class Memory:
                                  lambda interval, variable=from_variable: node.receive(variable, interval))
         node.to(lambda interval: self.receive(to_variable, interval))
 
+    def get_state(self):
+        return dict(self.memory)
+
+    def set_state(self, state):
+        self.memory = dict(state)
+
 
 class Intervals:
 
@@ -392,6 +413,13 @@ class WindowInterval(WindowIntervalNotifier):
         self.wl = self.intervals[0].start
         self.notify_move(to_be_removed, to_be_added)
 
+    def get_state(self):
+        return self.wl, self.wr, list(self.intervals)
+
+    def set_state(self, state):
+        self.wl, self.wr, intervals = state
+        self.intervals = list(intervals)
+
     # def __move_old(self):
     #     if self.intervals[0].end - self.wl <= self.intervals[-1].end - self.wr:
     #         delta = self.intervals[0].end - self.wl
@@ -471,6 +499,15 @@ class WindowOperator:
     def move(self, removed: Interval, added: Interval):
         pass
 
+    def get_state(self):
+        return None
+
+    def set_state(self, state):
+        pass
+
+    def state_size(self):
+        return 0
+
 
 class Integral(WindowOperator):
     def __init__(self):
@@ -489,6 +526,12 @@ class Integral(WindowOperator):
         self.value = function(removed.end)
         return (Interval(removed.start, removed.end, function),)
 
+    def get_state(self):
+        return self.value
+
+    def set_state(self, state):
+        self.value = state
+
 
 class MinMonotonicEdge:
 
@@ -588,6 +631,15 @@ class MinLemire(WindowOperator):
         self.monotonic_edge.add(added)
         return self.monotonic_edge.remove(removed.length())
 
+    def get_state(self):
+        return list(self.monotonic_edge.intervals)
+
+    def set_state(self, state):
+        self.monotonic_edge.intervals = list(state)
+
+    def state_size(self):
+        return len(self.monotonic_edge.intervals)
+
 
 class MaxLemire(WindowOperator):
 
@@ -610,6 +662,15 @@ class MaxLemire(WindowOperator):
         self.monotonic_edge.add(added)
         return self.monotonic_edge.remove(removed.length())
 
+    def get_state(self):
+        return list(self.monotonic_edge.intervals)
+
+    def set_state(self, state):
+        self.monotonic_edge.intervals = list(state)
+
+    def state_size(self):
+        return len(self.monotonic_edge.intervals)
+
 
 class Min(WindowOperator):
 
@@ -639,6 +700,15 @@ class Min(WindowOperator):
         self.add(added)
         return min_intervals
 
+    def get_state(self):
+        return [tuple(interval.left_extreme) + tuple(interval.right_extreme) for interval in self.values.intervals]
+
+    def set_state(self, state):
+        self.values.intervals = [IntervalValued(TimedValue(t1, v1), TimedValue(t2, v2)) for t1, v1, t2, v2 in state]
+
+    def state_size(self):
+        return len(self.values.intervals)
+
 
 class Min2(WindowOperator):
 
@@ -680,6 +750,17 @@ class Min2(WindowOperator):
         self.add(added)
         return min_intervals
 
+    def get_state(self):
+        return list(self.times), list(self.values)
+
+    def set_state(self, state):
+        times, values = state
+        self.times = list(times)
+        self.values = list(values)
+
+    def state_size(self):
+        return len(self.times)
+
     # def move_old(self, removed: Interval, added: Interval):
     #     added_left, added_right = added.get_extreme_value()
     #     removed_left, removed_right = removed.get_extreme_value()
@@ -794,3 +875,35 @@ class Max(WindowOperator):
             max_intervals.extend(interval.max_interval(added_shifted.project_onto(interval)))
         self.add(added)
         return max_intervals
+
+    def get_state(self):
+        return [tuple(interval.left_extreme) + tuple(interval.right_extreme) for interval in self.values.intervals]
+
+    def set_state(self, state):
+        self.values.intervals = [IntervalValued(TimedValue(t1, v1), TimedValue(t2, v2)) for t1, v1, t2, v2 in state]
+
+    def state_size(self):
+        return len(self.values.intervals)
+
+
+class Max2(Min2):
+    # Mirror of Min2 over the same times and values: Max cannot remove its intervals once the window moves.
+
+    def move(self, removed: Interval, added: Interval):
+        self.remove(removed)
+        if removed.is_increasing():
+            removed = Interval(removed.start, removed.end, Polynomial.constant(removed.function(removed.end)))
+        if added.is_decreasing():
+            added = Interval(added.start, added.end, Polynomial.constant(added.function(added.start)))
+        if self.times:
+            maximum = max(self.values)
+            first_chunk_intervals = removed.max_interval(
+                Interval(removed.start, removed.end, Polynomial.constant(maximum)))
+        else:
+            first_chunk_intervals = [removed, ]
+        max_intervals = []
+        added_shifted = added.move_above(removed)
+        for interval in first_chunk_intervals:
+            max_intervals.extend(interval.max_interval(added_shifted.project_onto(interval)))
+        self.add(added)
+        return max_intervals
@@ -0,0 +1,210 @@
+import re
+from collections import namedtuple, OrderedDict
+
+from nodes import VariablePWLNode, HigherThanNode, LowerThanNode, IntegralWindowNode, MinWindowNode, MaxWindowNode, \
+    FilterNode, ShiftNode, SumNode, SubNode, MinNode, MaxNode, MultiplyByConst
+
+# Formulas are function calls over input names and numbers, e.g. mult(integral(filter(G, ht(G, 180)), 180), 1/180).
+# A spec is one formula, or several definitions "name = formula" separated by ';' or new lines; later definitions
+# can use earlier names, and every definition is an output. At most one formula of a spec can be unnamed.
+
+SIGNAL = 'signal'
+NUMBER = 'number'
+
+# name: (node class, argument kinds). Signal arguments come first and are wired to receive, or to receive_left and
+# receive_right; numbers are passed to the constructor.
+OPERATORS = {
+    'ht': (HigherThanNode, (SIGNAL, NUMBER)),
+    'lt': (LowerThanNode, (SIGNAL, NUMBER)),
+    'integral': (IntegralWindowNode, (SIGNAL, NUMBER)),
+    'min_window': (MinWindowNode, (SIGNAL, NUMBER)),
+    'max_window': (MaxWindowNode, (SIGNAL, NUMBER)),
+    'filter': (FilterNode, (SIGNAL, SIGNAL)),
+    'shift': (ShiftNode, (SIGNAL, NUMBER)),
+    'sum': (SumNode, (SIGNAL, SIGNAL)),
+    'sub': (SubNode, (SIGNAL, SIGNAL)),
+    'min': (MinNode, (SIGNAL, SIGNAL)),
+    'max': (MaxNode, (SIGNAL, SIGNAL)),
+    'mult': (MultiplyByConst, (SIGNAL, NUMBER)),
+}
+
+OUTPUT = 'output'
+
+TOKEN = re.compile(r'[^\S\n]*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|([A-Za-z_]\w*)|(\n|[(),;=/-])|(\S))')
+
+# A step builds one node: an input (node_class None, constants holding its name) or an operator applied to
+# the nodes built by earlier steps.
+Step = namedtuple('Step', ['node_class', 'constants', 'operands'])
+Instance = namedtuple('Instance', ['inputs', 'outputs', 'nodes'])
+
+
+def tokenize(text):
+    # A line break separates definitions like ';' at parenthesis depth 0, and is layout inside parentheses, so that
+    # long formulas can be wrapped.
+    tokens = []
+    position = 0
+    depth = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise Exception(f"Unexpected character {text[position]!r} at position {position}")
+        number, name, symbol, other = match.groups()
+        if other is not None:
+            raise Exception(f"Unexpected character {other!r} at position {match.start(4)}")
+        position = match.end()
+        if symbol == '\n':
+            if depth > 0:
+                continue
+            symbol = ';'
+        depth += (symbol == '(') - (symbol == ')')
+        tokens.append(((number and 'number') or (name and 'name') or symbol, number or name or symbol,
+                       match.start(match.lastindex)))
+    return tokens
+
+
+def normalize(text) -> str:
+    # Formula text without layout: equal for specs that differ only in spaces, in line breaks inside parentheses,
+    # and in separating definitions with ';' or a line break.
+    return ' '.join(value for _, value, _ in tokenize(text))
+
+
+class Parser:
+    # Recursive descent over the tokens, building the plan directly: every subexpression is hash-consed on its
+    # operator, constants and operand steps, so shared subexpressions become a single node with several observers.
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.steps = []
+        self.index = {}
+        self.names = {}
+        self.outputs = {}
+
+    def peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def expect(self, kind):
+        if self.peek() != kind:
+            found = self.tokens[self.position] if self.position < len(self.tokens) else ('end', 'end', None)
+            raise Exception(f"Expected {kind!r} but found {found[1]!r} at position {found[2]}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def step(self, node_class, constants, operands):
+        key = node_class, constants, operands
+        if key not in self.index:
+            self.index[key] = len(self.steps)
+            self.steps.append(Step(node_class, constants, operands))
+        return self.index[key]
+
+    def parse(self):
+        while self.peek() is not None:
+            if self.peek() == ';':
+                self.position += 1
+                continue
+            following = self.tokens[self.position + 1][0] if self.position + 1 < len(self.tokens) else None
+            if self.peek() == 'name' and following == '=':
+                _, name, position = self.expect('name')
+                if name in self.names or name in self.outputs or name in OPERATORS:
+                    raise Exception(f"Cannot redefine {name!r} at position {position}")
+                self.expect('=')
+                self.names[name] = self.outputs[name] = self.signal()
+            else:
+                if OUTPUT in self.outputs:
+                    raise Exception(f"Multiple unnamed formulas at position {self.tokens[self.position][2]}")
+                self.outputs[OUTPUT] = self.signal()
+            if self.peek() not in (None, ';'):
+                self.expect(';')
+        if not self.outputs:
+            raise Exception("Empty formula")
+        return Plan(self.steps, self.outputs)
+
+    def signal(self):
+        _, name, position = self.expect('name')
+        if self.peek() != '(':
+            if name in OPERATORS:
+                raise Exception(f"Operator {name!r} used as a signal at position {position}")
+            if name not in self.names:
+                self.names[name] = self.step(None, (name,), ())
+            return self.names[name]
+        if name not in OPERATORS:
+            raise Exception(f"Unknown operator {name!r} at position {position}")
+        node_class, kinds = OPERATORS[name]
+        self.expect('(')
+        operands, constants = [], []
+        for i, kind in enumerate(kinds):
+            if i > 0:
+                self.expect(',')
+            if kind == SIGNAL:
+                operands.append(self.signal())
+            else:
+                constants.append(self.number())
+        self.expect(')')
+        return self.step(node_class, tuple(constants), tuple(operands))
+
+    def number(self):
+        sign = 1
+        if self.peek() == '-':
+            self.position += 1
+            sign = -1
+        value = self.literal()
+        if self.peek() == '/':
+            self.position += 1
+            divisor = self.literal()
+            if divisor == 0:
+                raise Exception(f"Division by zero at position {self.tokens[self.position - 1][2]}")
+            value /= divisor
+        return sign * value
+
+    def literal(self):
+        text = self.expect('number')[1]
+        return int(text) if text.isdigit() else float(text)
+
+
+class Plan:
+    # Flat instantiation plan of a spec: building a graph is one constructor call and at most two to() calls per
+    # step, with no parsing or name resolution.
+
+    def __init__(self, steps, outputs):
+        self.steps = steps
+        self.outputs = outputs
+
+    def instantiate(self, variable=VariablePWLNode) -> Instance:
+        nodes = []
+        inputs = {}
+        for node_class, constants, operands in self.steps:
+            if node_class is None:
+                node = variable()
+                inputs[constants[0]] = node
+            else:
+                node = node_class(*constants)
+                if len(operands) == 1:
+                    nodes[operands[0]].to(node.receive)
+                elif len(operands) == 2:
+                    nodes[operands[0]].to(node.receive_left)
+                    nodes[operands[1]].to(node.receive_right)
+            nodes.append(node)
+        return Instance(inputs, {name: nodes[step] for name, step in self.outputs.items()}, nodes)
+
+
+CACHE_SIZE = 256
+CACHE = OrderedDict()
+
+
+def parse(text) -> Plan:
+    # Plans are cached on the normalized text, so specs repeated across patients are parsed once. The cache keeps
+    # the CACHE_SIZE most recently used specs.
+    key = normalize(text)
+    if key in CACHE:
+        CACHE.move_to_end(key)
+    else:
+        CACHE[key] = Parser(text).parse()
+        if len(CACHE) > CACHE_SIZE:
+            CACHE.popitem(last=False)
+    return CACHE[key]
+
+
+def instantiate(text, variable=VariablePWLNode) -> Instance:
+    return parse(text).instantiate(variable)
@@ -0,0 +1,182 @@
+import copy
+import io
+import subprocess
+from multiprocessing import Pool
+
+import numpy as np
+
+from notifiers import Signal
+
+
+class Panel:
+
+    def __init__(self):
+        self.series = []
+        self.calls = []
+
+    def plot(self, points, where=None, **style):
+        # points is a signal or a (t, x) pair of arrays shown whole in every frame. where(t, x) optionally returns
+        # the mask of the points to draw, e.g. lambda t, x: x > 0.
+        self.series.append((points, where, style))
+
+    def call(self, method, *args, **kwargs):
+        # Static decoration replayed on the axis when a worker sets up its figure, e.g. call('axhline', 180).
+        self.calls.append((method, args, kwargs))
+
+
+def masked(where, t, x):
+    t, x = np.array(t, dtype=float), np.array(x, dtype=float)
+    if where is None:
+        return t, x
+    mask = where(t, x)
+    return t[mask], x[mask]
+
+
+class FrameRenderer:
+
+    def __init__(self, panels, figsize=(10, 6), dpi=100, format='png', subplots_kwargs=None, savefig_kwargs=None):
+        self.panels = panels
+        self.figsize = figsize
+        self.dpi = dpi
+        self.format = format
+        self.subplots_kwargs = subplots_kwargs if subplots_kwargs is not None else {'sharex': True}
+        self.savefig_kwargs = savefig_kwargs or {}
+        self.frames = []
+
+    def series(self):
+        return [series for panel in self.panels for series in panel.series]
+
+    def record(self):
+        # Adds a frame showing what every series holds now. Called by the evaluation loop after each sample, so a
+        # frame never shows output the monitor produced later, e.g. verdicts ending before the frame's sample but
+        # emitted once later samples closed their window. A Signal only grows, so its number of points is enough;
+        # other signals (BoundedSignal) drop old points, so the frame keeps a copy of their points.
+        frame = []
+        for points, where, _ in self.series():
+            if isinstance(points, Signal):
+                frame.append(len(points.get_points()[0]))
+            elif hasattr(points, 'get_points'):
+                frame.append(masked(where, *points.get_points()))
+            else:
+                frame.append(None)
+        self.frames.append(frame)
+
+    def arrays(self):
+        # (t, x, starts, ends) for every series: the points drawn and, for each frame, the slice of them it shows.
+        arrays = []
+        for k, (points, where, _) in enumerate(self.series()):
+            recorded = [frame[k] for frame in self.frames]
+            if isinstance(points, Signal):
+                t, x = np.array(points.get_points()[0]), np.array(points.get_points()[1])
+                ends = np.array(recorded, dtype=int)
+                if where is not None:
+                    # Number of drawn points among the first n, for every n, in one pass.
+                    kept = np.concatenate([[0], np.cumsum(where(t, x))])
+                    ends = kept[ends]
+                    t, x = masked(where, t, x)
+            elif hasattr(points, 'get_points'):
+                lengths = np.array([len(frame_t) for frame_t, _ in recorded], dtype=int)
+                ends = np.cumsum(lengths)
+                t = np.concatenate([frame_t for frame_t, _ in recorded] or [np.empty(0)])
+                x = np.concatenate([frame_x for _, frame_x in recorded] or [np.empty(0)])
+                arrays.append((t, x, ends - lengths, ends))
+                continue
+            else:
+                t, x = masked(where, *points)
+                ends = np.full(len(recorded), len(t), dtype=int)
+            arrays.append((t, x, np.zeros(len(ends), dtype=int), ends))
+        return arrays
+
+    def layout(self) -> 'FrameRenderer':
+        # Copy without the signals and masks, which are neither needed nor always picklable in the workers.
+        renderer = copy.copy(self)
+        renderer.panels = []
+        for panel in self.panels:
+            renderer.panels.append(Panel())
+            renderer.panels[-1].calls = panel.calls
+            renderer.panels[-1].series = [(None, None, style) for _, _, style in panel.series]
+        renderer.frames = []
+        return renderer
+
+    def figure(self):
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=self.figsize)
+        axs = fig.subplots(len(self.panels), 1, squeeze=False, **self.subplots_kwargs)
+        lines = []
+        for ax, panel in zip(axs[:, 0], self.panels):
+            for method, args, kwargs in panel.calls:
+                getattr(ax, method)(*args, **kwargs)
+            for _, _, style in panel.series:
+                line, = ax.plot([], [], **style)
+                lines.append(line)
+        return fig, lines
+
+    def render(self, encoder, processes=None, batch_size=64):
+        # One frame per record() call. Frames are rendered by worker processes that build their figure once and
+        # only slice the recorded arrays, and are handed to the encoder in order batch by batch, so at most
+        # batch_size frames are held in memory.
+        arrays = self.arrays()
+        count = len(self.frames)
+        layout = self.layout()
+        try:
+            if processes == 1:
+                initialize_worker(layout, arrays)
+                for frame in range(count):
+                    encoder.write(render_frame(frame))
+            else:
+                with Pool(processes, initializer=initialize_worker, initargs=(layout, arrays)) as pool:
+                    for low in range(0, count, batch_size):
+                        for image in pool.imap(render_frame, range(low, min(count, low + batch_size))):
+                            encoder.write(image)
+        finally:
+            encoder.close()
+
+
+worker = None
+
+
+def initialize_worker(renderer: FrameRenderer, arrays):
+    global worker
+    fig, lines = renderer.figure()
+    worker = renderer, fig, lines, arrays
+
+
+def render_frame(frame: int) -> bytes:
+    renderer, fig, lines, arrays = worker
+    for line, (t, x, starts, ends) in zip(lines, arrays):
+        line.set_data(t[starts[frame]:ends[frame]], x[starts[frame]:ends[frame]])
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=renderer.format, dpi=renderer.dpi, **renderer.savefig_kwargs)
+    return buffer.getvalue()
+
+
+class DirectoryEncoder:
+
+    def __init__(self, pattern: str):
+        # pattern is formatted with the frame number, e.g. 'fig/gif/figure_{:04d}.png'.
+        self.pattern = pattern
+        self.count = 0
+
+    def write(self, image: bytes):
+        with open(self.pattern.format(self.count), 'wb') as file:
+            file.write(image)
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class FFmpegEncoder:
+
+    def __init__(self, path, fps: float = 10, executable='ffmpeg'):
+        # Frames are piped to ffmpeg as they arrive; the output format (gif, mp4, ...) follows the extension.
+        self.process = subprocess.Popen([executable, '-y', '-loglevel', 'error', '-f', 'image2pipe',
+                                         '-framerate', str(fps), '-i', '-', str(path)], stdin=subprocess.PIPE)
+
+    def write(self, image: bytes):
+        self.process.stdin.write(image)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise Exception("ffmpeg failed to encode the frames")
@@ -0,0 +1,133 @@
+import warnings
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 16
+EPOCH = np.datetime64('1970-01-01T00:00:00', 'ns')
+
+
+def read_csv_chunks(path, columns=None, chunk_size=CHUNK_SIZE, delimiter=',', skip_header=1):
+    # Yields (rows, columns) float arrays of at most chunk_size rows, parsed by numpy instead of row by row.
+    with open(path, encoding='utf-8') as file:
+        for _ in range(skip_header):
+            next(file, None)
+        while True:
+            with warnings.catch_warnings():
+                # loadtxt warns when it reaches the end of the file with no rows left.
+                warnings.simplefilter('ignore', UserWarning)
+                chunk = np.loadtxt(file, delimiter=delimiter, usecols=columns, max_rows=chunk_size, ndmin=2)
+            if len(chunk) == 0:
+                return
+            yield chunk
+
+
+def write_binary(path, samples, dtype='<f8'):
+    # Stores a (rows, columns) array of samples as raw row-major records, readable by read_binary_chunks.
+    np.ascontiguousarray(samples, dtype=dtype).tofile(path)
+
+
+def read_binary_chunks(path, columns: int, chunk_size=CHUNK_SIZE, dtype='<f8'):
+    # Yields memory-mapped (rows, columns) views of a raw sample file of `columns` values per row.
+    itemsize = np.dtype(dtype).itemsize * columns
+    with open(path, 'rb') as file:
+        file.seek(0, 2)
+        rows = file.tell() // itemsize
+    if rows == 0:
+        return
+    samples = np.memmap(path, dtype=dtype, mode='r', shape=(rows, columns))
+    for low in range(0, rows, chunk_size):
+        yield samples[low:low + chunk_size]
+
+
+def replay(chunks, *nodes):
+    # Feeds every chunk to the input nodes: column 0 holds the times, column i + 1 the values of nodes[i].
+    for chunk in chunks:
+        times = chunk[:, 0]
+        for column, node in enumerate(nodes, 1):
+            node.receive_batch(times, chunk[:, column])
+
+
+def merge_join(left, right):
+    # Inner join of two chunked streams of rows sorted on a unique key in column 0. Yields chunks of
+    # (key, left columns..., right columns...) rows while holding at most one chunk of each stream. Keys that are
+    # not strictly increasing raise instead of silently joining the wrong rows.
+    left, right = strictly_increasing(left), strictly_increasing(right)
+    left_chunk, right_chunk = next_chunk(left), next_chunk(right)
+    while left_chunk is not None and right_chunk is not None:
+        # Every key up to the smaller of the two last keys can be joined now.
+        bound = min(left_chunk[-1, 0], right_chunk[-1, 0])
+        left_end = np.searchsorted(left_chunk[:, 0], bound, side='right')
+        right_end = np.searchsorted(right_chunk[:, 0], bound, side='right')
+        keys, left_rows, right_rows = np.intersect1d(left_chunk[:left_end, 0], right_chunk[:right_end, 0],
+                                                     assume_unique=True, return_indices=True)
+        if len(keys) > 0:
+            yield np.column_stack([keys, left_chunk[left_rows, 1:], right_chunk[right_rows, 1:]])
+        left_chunk, right_chunk = left_chunk[left_end:], right_chunk[right_end:]
+        if len(left_chunk) == 0:
+            left_chunk = next_chunk(left)
+        if len(right_chunk) == 0:
+            right_chunk = next_chunk(right)
+
+
+def strictly_increasing(chunks):
+    last = None
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        keys = chunk[:, 0]
+        if np.any(np.diff(keys) <= 0) or last is not None and keys[0] <= last:
+            raise Exception("merge_join needs keys sorted in strictly increasing order")
+        last = keys[-1]
+        yield chunk
+
+
+def next_chunk(chunks):
+    for chunk in chunks:
+        if len(chunk) > 0:
+            return chunk
+    return None
+
+
+def to_time_array(values, unit='h', origin=None):
+    # Converts datetime64 arrays, pandas datetime Series/Index (timezone-aware ones as UTC) or plain numbers to
+    # float times counted in `unit` since origin (default the Unix epoch). Numbers are returned as they are.
+    if getattr(getattr(values, 'dtype', None), 'tz', None) is not None:
+        values = values.dt.tz_convert(None) if hasattr(values, 'dt') else values.tz_convert(None)
+    values = np.asarray(values)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        return values.astype(float)
+    origin = EPOCH if origin is None else np.datetime64(origin, 'ns')
+    return (values - origin) / np.timedelta64(1, unit)
+
+
+def from_time_array(times, unit='h', origin=None):
+    # Inverse of to_time_array: datetime64[ns] timestamps of float times counted in `unit` since origin.
+    origin = EPOCH if origin is None else np.datetime64(origin, 'ns')
+    nanoseconds = np.asarray(times, dtype=float) * (np.timedelta64(1, unit) / np.timedelta64(1, 'ns'))
+    return origin + np.round(nanoseconds).astype('timedelta64[ns]')
+
+
+def replay_series(series, node, unit='h', origin=None, chunk_size=CHUNK_SIZE):
+    # Feeds a pandas Series indexed by time to an input node in batches.
+    times = to_time_array(series.index, unit, origin)
+    values = series.to_numpy(dtype=float)
+    for low in range(0, len(times), chunk_size):
+        node.receive_batch(times[low:low + chunk_size], values[low:low + chunk_size])
+
+
+def replay_frame(frame, nodes: dict, time=None, unit='h', origin=None, chunk_size=CHUNK_SIZE):
+    # Feeds DataFrame columns to input nodes in batches; nodes maps column names to nodes. Times come from the
+    # index, or from the `time` column when given.
+    times = to_time_array(frame.index if time is None else frame[time], unit, origin)
+    for column, node in nodes.items():
+        values = frame[column].to_numpy(dtype=float)
+        for low in range(0, len(times), chunk_size):
+            node.receive_batch(times[low:low + chunk_size], values[low:low + chunk_size])
+
+
+def to_dataframe(start, end, a, b, c, defined, unit=None, origin=None):
+    # One row per interval, with the interval bounds as timestamps when unit is given.
+    import pandas as pd
+    if unit is not None:
+        start, end = from_time_array(start, unit, origin), from_time_array(end, unit, origin)
+    return pd.DataFrame({'start': start, 'end': end, 'a': a, 'b': b, 'c': c, 'defined': defined})
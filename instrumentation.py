@@ -0,0 +1,247 @@
+import bisect
+import functools
+import time
+from collections import namedtuple
+
+from elements import Memory
+from notifiers import IntervalNotifier, SampleNotifier
+
+RECEIVERS = ('receive', 'receive_left', 'receive_right', 'receive_batch')
+DURATION_BUCKETS = [1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 1e-1, 5e-1, 1]
+
+MISSING = object()
+# An instance attribute replaced by a wrapper, and what it held before (MISSING when the class method applied).
+Wrapped = namedtuple('Wrapped', ['node', 'name', 'wrapper', 'previous'])
+
+
+class Histogram:
+    # Counts observations into cumulative-style buckets: counts[i] holds the observations <= bounds[i] and above
+    # the previous bound, the last count the observations above every bound.
+
+    def __init__(self, bounds=DURATION_BUCKETS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def cumulative(self):
+        # (bound, observations <= bound) pairs, ending with (inf, count).
+        pairs = []
+        total = 0
+        for bound, count in zip(self.bounds + [float('inf')], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-quantile, capped by the largest observation.
+        if self.count == 0:
+            return None
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return min(bound, self.max)
+
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class NodeStats:
+
+    def __init__(self, node):
+        self.node = node
+        self.received = 0
+        self.emitted = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.durations = Histogram()
+
+
+def install(node, name, wrapper) -> Wrapped:
+    wrapped = Wrapped(node, name, wrapper, node.__dict__.get(name, MISSING))
+    setattr(node, name, wrapper)
+    return wrapped
+
+
+def uninstall(wrapped_attributes):
+    # Puts back, latest first, what each wrapper replaced, but only where that wrapper is still installed: a wrapper
+    # another tool installed on top of it is left alone. Tools detached in the reverse order of attaching them
+    # remove every wrapper.
+    for wrapped in reversed(wrapped_attributes):
+        if wrapped.node.__dict__.get(wrapped.name) is not wrapped.wrapper:
+            continue
+        if wrapped.previous is MISSING:
+            del wrapped.node.__dict__[wrapped.name]
+        else:
+            setattr(wrapped.node, wrapped.name, wrapped.previous)
+    wrapped_attributes.clear()
+
+
+def is_node(target):
+    return isinstance(target, (IntervalNotifier, SampleNotifier))
+
+
+def resolve(observer):
+    # The object and method name behind an observer, seeing through instrumentation wrappers: the owner of a bound
+    # method, or the first node or Memory a function closes over, as the lambdas Memory.add_*_node wires.
+    observer = getattr(observer, '__wrapped__', observer)
+    target = getattr(observer, '__self__', None)
+    if target is None:
+        for cell in getattr(observer, '__closure__', None) or ():
+            try:
+                contents = cell.cell_contents
+            except ValueError:
+                continue
+            if is_node(contents) or isinstance(contents, Memory):
+                target = contents
+                break
+    return target, getattr(observer, '__name__', type(observer).__name__)
+
+
+def targets(target, memories):
+    # Nodes an observer leads to: its node, or the nodes fed by the computations of a Memory, which is traversed
+    # once and is not a node itself.
+    if is_node(target):
+        return [target]
+    if not isinstance(target, Memory) or id(target) in memories:
+        return []
+    memories.add(id(target))
+    return [found for computations in target.observers.values() for computation in computations
+            for found in targets(resolve(computation)[0], memories)]
+
+
+def graph(*roots):
+    # Nodes reachable from roots through their observers, in breadth-first order, and the (node, observer) edges.
+    # Observers lead to the node resolve finds behind them, and through a Memory to the nodes of its computations;
+    # anything else (signals, callbacks) is a sink and is not traversed. Roots can be nodes or Memory objects.
+    nodes, edges, memories = [], [], set()
+    seen = set()
+    for target in (found for root in roots for found in targets(root, memories)):
+        if id(target) not in seen:
+            seen.add(id(target))
+            nodes.append(target)
+    for node in nodes:
+        for observer in node.observers:
+            target, _ = resolve(observer)
+            edges.append((node, observer))
+            for found in targets(target, memories):
+                if id(found) not in seen:
+                    seen.add(id(found))
+                    nodes.append(found)
+    return nodes, edges
+
+
+class Instrumentation:
+    # Wraps, per instance, the receive methods and notify of every node of a graph to count the intervals received
+    # and emitted, and the time spent in each node. Time is exclusive: what a node spends notifying its observers
+    # is charged to them. Nodes that are not attached run their original methods, so instrumentation costs nothing
+    # unless it is switched on. A Memory keeps calling the receive methods it was given, so nodes fed by a Memory
+    # are reported and count what they emit, but not what they receive.
+
+    def __init__(self):
+        self.stats = {}
+        self.nodes = []
+        self.rewired = []
+        self.wrapped = []
+        self.stack = []
+
+    def attach(self, *roots):
+        nodes, edges = graph(*roots)
+        for node in nodes:
+            if id(node) not in self.stats:
+                self.stats[id(node)] = NodeStats(node)
+                self.nodes.append(node)
+                self.__wrap(node)
+        for node, observer in edges:
+            target, name = resolve(observer)
+            if is_node(target) and name in RECEIVERS and not hasattr(observer, '__wrapped__'):
+                replacement = getattr(target, name)
+                node.observers[node.observers.index(observer)] = replacement
+                self.rewired.append((node, replacement, observer))
+        return self
+
+    def detach(self):
+        for node, replacement, observer in reversed(self.rewired):
+            for position, current in enumerate(node.observers):
+                if current is replacement:
+                    node.observers[position] = observer
+                    break
+        uninstall(self.wrapped)
+        self.rewired.clear()
+
+    def __wrap(self, node):
+        stats = self.stats[id(node)]
+        for name in RECEIVERS:
+            method = getattr(node, name, None)
+            if method is not None:
+                self.wrapped.append(install(node, name, self.__timed(stats, method)))
+        notify = node.notify
+
+        def counted_notify(*args):
+            stats.emitted += 1
+            notify(*args)
+
+        self.wrapped.append(install(node, 'notify', counted_notify))
+        if hasattr(node, 'notify_multiple'):
+            notify_multiple = node.notify_multiple
+
+            def counted(intervals):
+                for interval in intervals:
+                    stats.emitted += 1
+                    yield interval
+
+            def counted_notify_multiple(intervals):
+                notify_multiple(counted(intervals))
+
+            self.wrapped.append(install(node, 'notify_multiple', counted_notify_multiple))
+
+    def __timed(self, stats, method):
+        stack = self.stack
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def timed(*args):
+            stats.received += 1
+            stack.append(0.0)
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                elapsed = clock() - start
+                own = elapsed - stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                stats.seconds += own
+                stats.durations.observe(own)
+                if own > stats.max_seconds:
+                    stats.max_seconds = own
+
+        return timed
+
+    def report(self):
+        # One line per node, in graph order, annotated with its counters, followed by the nodes it feeds.
+        numbers = {id(node): number for number, node in enumerate(self.nodes)}
+        lines = []
+        for number, node in enumerate(self.nodes):
+            stats = self.stats[id(node)]
+            lines.append(f"#{number} {node!r}: received {stats.received}, emitted {stats.emitted}, "
+                         f"time {stats.seconds * 1e3:.3f} ms (max {stats.max_seconds * 1e6:.1f} us), "
+                         f"state {node.state_size()}")
+            for observer in node.observers:
+                target, name = resolve(observer)
+                if id(target) in numbers:
+                    lines.append(f"    -> #{numbers[id(target)]}.{name}")
+                else:
+                    lines.append(f"    -> {type(target).__name__ if target is not None else name}")
+        return '\n'.join(lines)
+
+
+def instrument(*roots) -> Instrumentation:
+    return Instrumentation().attach(*roots)
@@ -0,0 +1,199 @@
+import functools
+import time
+from collections import deque
+
+from instrumentation import Histogram, DURATION_BUCKETS, install, uninstall, graph, resolve
+from nodes import BinaryNode, NaryNode
+
+STREAM_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class OutputLatency:
+
+    def __init__(self, node, processing_buckets, stream_buckets):
+        self.node = node
+        self.processing = Histogram(processing_buckets)
+        self.stream = Histogram(stream_buckets)
+        self.untraced = 0
+
+
+class HeldArrivals:
+    # Arrival times of the intervals a binary or n-ary node holds, one queue per input edge. An interval the node
+    # emits is computed from every held interval that starts before its end, so it arrived with the earliest of
+    # them; the held intervals that end by then are used up.
+
+    def __init__(self):
+        self.queues = []
+
+    def queue(self):
+        self.queues.append(deque())
+        return self.queues[-1]
+
+    def consume(self, interval):
+        arrival = float('inf')
+        for queue in self.queues:
+            for start, _, held in queue:
+                if start >= interval.end:
+                    break
+                arrival = min(arrival, held)
+            while queue and queue[0][1] <= interval.end:
+                queue.popleft()
+        return arrival
+
+
+class LatencyTracer:
+    # Evaluation is synchronous, so every interval an output node emits while an input node is in receive was
+    # triggered by that sample, however many splits and merges it went through. The tracer keeps the sample being
+    # processed (its stream time and arrival time) as the current trigger and, for every interval emitted by an
+    # output node, records the processing latency (clock now minus arrival) and the stream-time delay (trigger
+    # time minus interval end, i.e. how much later in the stream the verdict became known). A binary or n-ary
+    # node may emit an interval computed from input it buffered for earlier samples: while it notifies, the
+    # arrival of the trigger is the earliest arrival among the intervals the emitted one was computed from. Trace
+    # the inputs once the graph is wired, so that the merges downstream of them are found.
+
+    def __init__(self, clock=time.perf_counter, processing_buckets=DURATION_BUCKETS, stream_buckets=STREAM_BUCKETS):
+        self.clock = clock
+        self.processing_buckets = processing_buckets
+        self.stream_buckets = stream_buckets
+        self.trigger = None
+        self.inputs = []
+        self.outputs = []
+        self.wrapped = []
+        self.rewired = []
+        self.merges = set()
+
+    def trace_input(self, node):
+        # Wraps receive (and receive_batch) on the instance. receive takes an optional arrival time for samples
+        # that were queued before being processed; by default the sample arrives when receive is called.
+        receive = node.receive
+
+        def traced_receive(time, value, arrival=None):
+            with self.triggered_by(time, arrival):
+                receive(time, value)
+
+        self.wrapped.append(install(node, 'receive', traced_receive))
+        if hasattr(node, 'receive_batch'):
+            receive_batch = node.receive_batch
+
+            def traced_receive_batch(times, values, arrival=None):
+                # A batch is charged to its last sample.
+                if len(times) == 0:
+                    return
+                with self.triggered_by(float(times[-1]), arrival):
+                    receive_batch(times, values)
+
+            self.wrapped.append(install(node, 'receive_batch', traced_receive_batch))
+        self.inputs.append(node)
+        nodes, edges = graph(node)
+        for merge in nodes:
+            if isinstance(merge, (BinaryNode, NaryNode)) and id(merge) not in self.merges:
+                self.merges.add(id(merge))
+                self.__trace_merge(merge, edges)
+        return node
+
+    def __trace_merge(self, merge, edges):
+        arrivals = HeldArrivals()
+        for node, observer in edges:
+            if resolve(observer)[0] is merge:
+                replacement = self.__held(observer, arrivals.queue())
+                node.observers[node.observers.index(observer)] = replacement
+                self.rewired.append((node, replacement, observer))
+        notify = merge.notify
+
+        def traced_notify(interval):
+            if self.trigger is None:
+                notify(interval)
+                return
+            time, arrival = self.trigger
+            with Trigger(self, time, min(arrival, arrivals.consume(interval))):
+                notify(interval)
+
+        self.wrapped.append(install(merge, 'notify', traced_notify))
+        notify_multiple = merge.notify_multiple
+
+        def traced_notify_multiple(intervals):
+            if self.trigger is None:
+                notify_multiple(intervals)
+                return
+            time, arrival = self.trigger
+            for interval in intervals:
+                with Trigger(self, time, min(arrival, arrivals.consume(interval))):
+                    notify_multiple((interval,))
+
+        self.wrapped.append(install(merge, 'notify_multiple', traced_notify_multiple))
+
+    def __held(self, observer, queue):
+        # The observer feeding a merge, also recording the arrival of every interval it passes.
+        @functools.wraps(observer)
+        def held(interval):
+            if self.trigger is not None:
+                queue.append((interval.start, interval.end, self.trigger[1]))
+            observer(interval)
+
+        return held
+
+    def trace_output(self, node) -> OutputLatency:
+        latency = OutputLatency(node, self.processing_buckets, self.stream_buckets)
+
+        def record(interval):
+            if self.trigger is None:
+                latency.untraced += 1
+                return
+            trigger_time, arrival = self.trigger
+            latency.processing.observe(self.clock() - arrival)
+            latency.stream.observe(trigger_time - interval.end)
+
+        node.to(record)
+        self.outputs.append((latency, record))
+        return latency
+
+    def triggered_by(self, time, arrival=None):
+        return Trigger(self, time, self.clock() if arrival is None else arrival)
+
+    def detach(self):
+        for node, replacement, observer in reversed(self.rewired):
+            for position, current in enumerate(node.observers):
+                if current is replacement:
+                    node.observers[position] = observer
+                    break
+        self.rewired.clear()
+        self.merges.clear()
+        uninstall(self.wrapped)
+        for latency, record in self.outputs:
+            if record in latency.node.observers:
+                latency.node.observers.remove(record)
+        self.inputs.clear()
+
+    def latencies(self):
+        return [latency for latency, _ in self.outputs]
+
+    def report(self):
+        lines = []
+        for latency in self.latencies():
+            processing, stream = latency.processing, latency.stream
+            if processing.count == 0:
+                lines.append(f"{latency.node!r}: no verdicts")
+                continue
+            lines.append(f"{latency.node!r}: {processing.count} verdicts, "
+                         f"processing p50 <= {processing.quantile(0.5) * 1e6:.0f} us, "
+                         f"p99 <= {processing.quantile(0.99) * 1e6:.0f} us, max {processing.max * 1e6:.0f} us; "
+                         f"stream delay p50 <= {stream.quantile(0.5)}, p99 <= {stream.quantile(0.99)}, "
+                         f"max {stream.max}")
+        return '\n'.join(lines)
+
+
+class Trigger:
+    # Context manager that makes (time, arrival) the current trigger sample, restoring the previous one on exit.
+
+    def __init__(self, tracer: LatencyTracer, time, arrival):
+        self.tracer = tracer
+        self.sample = time, arrival
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = self.tracer.trigger
+        self.tracer.trigger = self.sample
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.trigger = self.previous
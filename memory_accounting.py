@@ -0,0 +1,114 @@
+import gc
+import sys
+import types
+
+from instrumentation import graph, resolve, is_node, install, uninstall
+from notifiers import Signal, BoundedSignal
+
+# Objects that are shared by the whole program rather than retained by a node: the walk never enters them.
+SHARED = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.CodeType, str)
+
+
+class Usage:
+
+    def __init__(self, owner, bytes, objects):
+        self.owner = owner
+        self.bytes = bytes
+        self.objects = objects
+
+    def __repr__(self):
+        return f"Usage({self.owner!r}, bytes={self.bytes}, objects={self.objects})"
+
+
+def is_boundary(obj):
+    # Other nodes and signals are accounted on their own, so a walk stops at them.
+    return is_node(obj) or isinstance(obj, (Signal, BoundedSignal))
+
+
+def retained(owner) -> Usage:
+    # Bytes and number of objects reachable from owner without going through another node or signal, with
+    # sys.getsizeof. Each object is counted once; NumPy arrays count their buffer when they own it.
+    seen = {id(owner)}
+    pending = [owner]
+    size, count = 0, 0
+    while pending:
+        obj = pending.pop()
+        size += sys.getsizeof(obj)
+        count += 1
+        for referent in gc.get_referents(obj):
+            if id(referent) in seen or isinstance(referent, SHARED) or is_boundary(referent):
+                continue
+            if referent is None or isinstance(referent, bool):
+                continue
+            seen.add(id(referent))
+            pending.append(referent)
+    return Usage(owner, size, count)
+
+
+def signals(nodes):
+    # Signals observing any of nodes, in graph order.
+    found, seen = [], set()
+    for node in nodes:
+        for observer in node.observers:
+            target, _ = resolve(observer)
+            if isinstance(target, (Signal, BoundedSignal)) and id(target) not in seen:
+                seen.add(id(target))
+                found.append(target)
+    return found
+
+
+def account(*roots):
+    # Usage of every node reachable from roots, followed by the usage of the signals observing them.
+    nodes, _ = graph(*roots)
+    return [retained(node) for node in nodes] + [retained(signal) for signal in signals(nodes)]
+
+
+def report(usages):
+    return '\n'.join(f"{usage.owner!r}: {usage.bytes} bytes in {usage.objects} objects" for usage in usages)
+
+
+class MemoryWatchdog:
+    # Calls callback(usage) when a node or signal reachable from roots goes over its budget: budgets maps nodes
+    # to a number of bytes, budget applies to the others (None for no limit). The callback fires once per
+    # crossing, and again only after the usage went back under the budget. check() walks the whole state, so
+    # watch() runs it every `every` samples received by an input node rather than on every sample.
+
+    def __init__(self, callback, *roots, budget=None, budgets=None):
+        self.callback = callback
+        self.roots = roots
+        self.budget = budget
+        self.budgets = {id(node): limit for node, limit in (budgets or {}).items()}
+        self.exceeded = set()
+        self.wrapped = []
+
+    def limit(self, owner):
+        return self.budgets.get(id(owner), self.budget)
+
+    def check(self):
+        usages = account(*self.roots)
+        for usage in usages:
+            limit = self.limit(usage.owner)
+            if limit is not None and usage.bytes > limit:
+                if id(usage.owner) not in self.exceeded:
+                    self.exceeded.add(id(usage.owner))
+                    self.callback(usage)
+            else:
+                self.exceeded.discard(id(usage.owner))
+        return usages
+
+    def watch(self, node, every=1000):
+        receive = node.receive
+        received = 0
+
+        def watched_receive(*args):
+            nonlocal received
+            receive(*args)
+            received += 1
+            if received % every == 0:
+                self.check()
+
+        self.wrapped.append(install(node, 'receive', watched_receive))
+        return node
+
+    def detach(self):
+        uninstall(self.wrapped)
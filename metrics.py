@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from instrumentation import graph
+
+PORT_VARIABLE = 'GEMON_METRICS_PORT'
+HOST_VARIABLE = 'GEMON_METRICS_HOST'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# A metric family: samples are (suffix, labels, value) triples, suffix being '' or e.g. '_bucket'.
+Metric = namedtuple('Metric', ['name', 'type', 'help', 'samples'])
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def histogram_samples(labels, histogram):
+    samples = [('_bucket', {**labels, 'le': format_value(float(bound))}, total)
+               for bound, total in histogram.cumulative()]
+    samples.append(('_sum', labels, histogram.sum))
+    samples.append(('_count', labels, histogram.count))
+    return samples
+
+
+class MetricsRegistry:
+    # Collectors are callables returning Metric families; they are evaluated on every scrape, so the exposition
+    # always reflects the current counters without any bookkeeping on the evaluation path.
+
+    def __init__(self, prefix='gemon'):
+        self.prefix = prefix
+        self.collectors = []
+        self.labels = {}
+        self.numbered = 0
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def label(self, node):
+        # Nodes are identified by their name when one was given, else by the order they were first seen and repr.
+        if id(node) not in self.labels:
+            self.labels[id(node)] = f"{self.numbered}:{node!r}"
+            self.numbered += 1
+        return {'node': self.labels[id(node)], 'type': type(node).__name__}
+
+    def name(self, node, name):
+        self.labels[id(node)] = name
+
+    def add_nodes(self, *roots):
+        # Buffer depths of every node reachable from roots; needs no instrumentation.
+        nodes, _ = graph(*roots)
+
+        def collect():
+            return [Metric(f'{self.prefix}_node_state_size', 'gauge', 'Intervals or samples buffered by the node.',
+                           [('', self.label(node), node.state_size()) for node in nodes])]
+
+        return self.register(collect)
+
+    def add_instrumentation(self, instrumentation):
+        def collect():
+            stats = [(self.label(node), instrumentation.stats[id(node)]) for node in instrumentation.nodes]
+            return [
+                Metric(f'{self.prefix}_node_received_total', 'counter', 'Intervals or samples received by the node.',
+                       [('', labels, node_stats.received) for labels, node_stats in stats]),
+                Metric(f'{self.prefix}_node_emitted_total', 'counter', 'Intervals or samples emitted by the node.',
+                       [('', labels, node_stats.emitted) for labels, node_stats in stats]),
+                Metric(f'{self.prefix}_node_seconds_total', 'counter', 'Time spent in the node, excluding its observers.',
+                       [('', labels, node_stats.seconds) for labels, node_stats in stats]),
+                Metric(f'{self.prefix}_node_call_seconds', 'histogram', 'Time spent in the node per received item.',
+                       [sample for labels, node_stats in stats
+                        for sample in histogram_samples(labels, node_stats.durations)]),
+            ]
+
+        return self.register(collect)
+
+    def add_latency(self, tracer):
+        def collect():
+            latencies = [(self.label(latency.node), latency) for latency in tracer.latencies()]
+            return [
+                Metric(f'{self.prefix}_verdict_processing_seconds', 'histogram',
+                       'Time from the arrival of the triggering sample to the emission of the verdict.',
+                       [sample for labels, latency in latencies
+                        for sample in histogram_samples(labels, latency.processing)]),
+                Metric(f'{self.prefix}_verdict_stream_delay', 'histogram',
+                       'Stream time between the end of a verdict interval and the sample that triggered it.',
+                       [sample for labels, latency in latencies for sample in histogram_samples(labels, latency.stream)]),
+            ]
+
+        return self.register(collect)
+
+    def add_monitor(self, monitor):
+        # Samples queued by an AsyncMonitor and not yet fed to the nodes.
+        def collect():
+            return [Metric(f'{self.prefix}_runtime_pending_samples', 'gauge', 'Samples waiting for the next flush.',
+                           [('', {}, len(monitor.pending))])]
+
+        return self.register(collect)
+
+    def collect(self):
+        return [metric for collector in self.collectors for metric in collector()]
+
+    def exposition(self) -> str:
+        # Prometheus text exposition format, version 0.0.4.
+        lines = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples:
+                label_text = ','.join(f'{key}="{escape(label)}"' for key, label in labels.items())
+                label_text = f"{{{label_text}}}" if label_text else ''
+                lines.append(f"{metric.name}{suffix}{label_text} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    # Serves the registry on /metrics from a ThreadingHTTPServer in a daemon thread. Port 0 picks a free port.
+
+    def __init__(self, registry: MetricsRegistry, port=0, host='127.0.0.1'):
+        self.registry = registry
+        handler = type('MetricsHandler', (MetricsHandler,), {'registry': registry})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def serve_async(registry: MetricsRegistry, port=0, host='127.0.0.1'):
+    # asyncio variant for monitors running in an event loop (e.g. AsyncMonitor): the exposition is built on the
+    # loop, between flushes, so it never observes a graph half-way through a sample.
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] in ('/', '/metrics'):
+                body = registry.exposition().encode('utf-8')
+                header = f"HTTP/1.1 200 OK\r\nContent-Type: {CONTENT_TYPE}\r\n"
+            else:
+                body = b'Not Found\n'
+                header = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n"
+            writer.write(f"{header}Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def start_from_environment(registry: MetricsRegistry):
+    # Starts a MetricsServer when GEMON_METRICS_PORT is set, so deployments switch the endpoint on by
+    # configuration. Returns the running server, or None.
+    port = os.environ.get(PORT_VARIABLE)
+    if not port:
+        return None
+    return MetricsServer(registry, int(port), os.environ.get(HOST_VARIABLE, '127.0.0.1')).start()
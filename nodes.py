@@ -1,38 +1,224 @@
-from elements import Interval, WindowOperator, Integral, Min, Max, IntervalOperators, WindowInterval, \
-    Min2
+import heapq
+
+import numpy as np
+
+from elements import Interval, WindowOperator, Integral, Min, IntervalOperators, WindowInterval, \
+    Min2, Max2
 from functions import Polynomial, UndefinedFunction
-from notifiers import IntervalNotifier
+from notifiers import IntervalNotifier, SampleNotifier
+
+UNDEFINED = 'undefined'
+HOLD = 'hold'
 
 
 class VariablePWLNode(IntervalNotifier):
+    # Samples further apart than max_gap are not interpolated: the gap between them is a single undefined interval.
 
-    def __init__(self):
+    def __init__(self, max_gap: float = None):
         super().__init__()
+        self.max_gap = max_gap
         self.time = None
         self.value = None
 
     def receive(self, time, value):
         if self.time is not None:
-            m = (value - self.value) / (time - self.time)
-            q = self.value - self.time * m
-            self.notify(Interval(self.time, time, Polynomial.linear(m, q)))
+            if self.value is None or self.max_gap is not None and time - self.time > self.max_gap:
+                self.notify(Interval(self.time, time, Polynomial.undefined()))
+            else:
+                m = (value - self.value) / (time - self.time)
+                q = self.value - self.time * m
+                self.notify(Interval(self.time, time, Polynomial.linear(m, q)))
         self.time = time
         self.value = value
 
+    def receive_batch(self, times, values):
+        # Same intervals as calling receive on every sample, with slopes and intercepts computed vectorized.
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if len(times) == 0:
+            return
+        if self.time is not None and self.value is None:
+            self.receive(times[0].item(), values[0].item())
+            times, values = times[1:], values[1:]
+            if len(times) == 0:
+                return
+        if self.time is not None:
+            times = np.concatenate([[self.time], times])
+            values = np.concatenate([[self.value], values])
+        m = np.diff(values) / np.diff(times)
+        q = values[:-1] - times[:-1] * m
+        self.notify_multiple(batch_intervals(times, np.zeros(len(m)), m, q, self.max_gap))
+        self.time = times[-1].item()
+        self.value = values[-1].item()
+
+    def heartbeat(self, time, fill=HOLD):
+        heartbeat(self, time, fill)
+
+    def get_state(self):
+        return self.time, self.value
+
+    def set_state(self, state):
+        self.time, self.value = state
+
+    def __repr__(self):
+        if self.max_gap is None:
+            return f"{type(self).__name__}()"
+        return f"{type(self).__name__}(max_gap={self.max_gap})"
+
 
 class VariablePWCNode(IntervalNotifier):
+    # Samples further apart than max_gap do not hold their value: the gap between them is a single undefined interval.
 
-    def __init__(self):
+    def __init__(self, max_gap: float = None):
         super().__init__()
+        self.max_gap = max_gap
         self.time = None
         self.value = None
 
     def receive(self, time, value):
         if self.time is not None:
-            self.notify(Interval(self.time, time, Polynomial.constant(self.value)))
+            if self.value is None or self.max_gap is not None and time - self.time > self.max_gap:
+                self.notify(Interval(self.time, time, Polynomial.undefined()))
+            else:
+                self.notify(Interval(self.time, time, Polynomial.constant(self.value)))
         self.time = time
         self.value = value
 
+    def receive_batch(self, times, values):
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if len(times) == 0:
+            return
+        if self.time is not None and self.value is None:
+            self.receive(times[0].item(), values[0].item())
+            times, values = times[1:], values[1:]
+            if len(times) == 0:
+                return
+        if self.time is not None:
+            times = np.concatenate([[self.time], times])
+            values = np.concatenate([[self.value], values])
+        zeros = np.zeros(len(times) - 1)
+        self.notify_multiple(batch_intervals(times, zeros, zeros, values[:-1], self.max_gap))
+        self.time = times[-1].item()
+        self.value = values[-1].item()
+
+    def heartbeat(self, time, fill=HOLD):
+        heartbeat(self, time, fill)
+
+    def get_state(self):
+        return self.time, self.value
+
+    def set_state(self, state):
+        self.time, self.value = state
+
+    def __repr__(self):
+        if self.max_gap is None:
+            return f"{type(self).__name__}()"
+        return f"{type(self).__name__}(max_gap={self.max_gap})"
+
+
+def heartbeat(node, time, fill=HOLD):
+    # Advances a variable node to time without a sample, so that the nodes downstream keep emitting and evicting
+    # during quiet periods. By default the interval since the last sample holds the last value, and the next
+    # sample continues from there. With fill UNDEFINED that interval is undefined, and so is the one up to the
+    # next sample, exactly like a gap longer than max_gap: IntegralWindowNode counts it as zero, MinWindowNode and
+    # MaxWindowNode reject it.
+    if node.time is None or time <= node.time:
+        return
+    if fill == HOLD and node.value is not None:
+        node.notify(Interval(node.time, time, Polynomial.constant(node.value)))
+    else:
+        node.notify(Interval(node.time, time, Polynomial.undefined()))
+        node.value = None
+    node.time = time
+
+
+def heartbeat_all(time, *nodes, fill=HOLD):
+    # Heartbeat on every input of a graph, so that binary nodes receive both sides.
+    for node in nodes:
+        node.heartbeat(time, fill)
+
+
+def batch_intervals(times, a, b, c, max_gap):
+    # Intervals between consecutive times with functions a t^2 + b t + c, undefined over the gaps longer than
+    # max_gap. A generator rather than a list: each interval can be freed once notified, instead of the whole
+    # batch staying alive and being scanned by the garbage collector.
+    gaps = find_gaps(times, max_gap).tolist()
+    undefined = Polynomial.undefined()
+    for start, end, a_i, b_i, c_i, gap in zip(times[:-1].tolist(), times[1:].tolist(), a.tolist(), b.tolist(),
+                                              c.tolist(), gaps):
+        yield Interval(start, end, undefined if gap else Polynomial(a_i, b_i, c_i))
+
+
+def find_gaps(times, max_gap):
+    # Marks the intervals between consecutive sample times that are longer than max_gap.
+    if max_gap is None:
+        return np.zeros(max(len(times) - 1, 0), dtype=bool)
+    return np.diff(times) > max_gap
+
+
+class ReorderNode(SampleNotifier):
+    # Buffers samples in a heap and releases them in time order once the watermark
+    # (latest time seen minus max_lateness) has passed them. Samples at or before the last
+    # released time are too late: with late_policy DROP they are discarded and counted,
+    # with RAISE an exception is raised. Of samples sharing a timestamp only the first received is kept.
+    DROP = 'drop'
+    RAISE = 'raise'
+
+    def __init__(self, max_lateness: float, late_policy=DROP):
+        super().__init__()
+        self.max_lateness = max_lateness
+        self.late_policy = late_policy
+        self.heap = []
+        self.counter = 0
+        self.max_time = None
+        self.released_time = None
+        self.dropped = 0
+
+    def receive(self, time, value):
+        if self.released_time is not None and time <= self.released_time:
+            if self.late_policy == ReorderNode.RAISE:
+                raise Exception(f"Sample at {time} is later than the reorder bound")
+            self.dropped += 1
+            return
+        heapq.heappush(self.heap, (time, self.counter, value))
+        self.counter += 1
+        if self.max_time is None or time > self.max_time:
+            self.max_time = time
+        self.__release(self.max_time - self.max_lateness)
+
+    def flush(self):
+        if self.max_time is not None:
+            self.__release(self.max_time)
+
+    def watermark(self, time):
+        # Advances the watermark as a sample at time would, without one: releases the samples it has passed.
+        if self.max_time is None or time > self.max_time:
+            self.max_time = time
+            self.__release(self.max_time - self.max_lateness)
+
+    def __release(self, watermark):
+        while self.heap and self.heap[0][0] <= watermark:
+            time, _, value = heapq.heappop(self.heap)
+            if self.released_time is not None and time <= self.released_time:
+                self.dropped += 1
+                continue
+            self.released_time = time
+            self.notify(time, value)
+
+    def get_state(self):
+        return list(self.heap), self.counter, self.max_time, self.released_time, self.dropped
+
+    def set_state(self, state):
+        heap, self.counter, self.max_time, self.released_time, self.dropped = state
+        self.heap = list(heap)
+
+    def state_size(self):
+        return len(self.heap)
+
+    def __repr__(self):
+        return f"ReorderNode({self.max_lateness})"
+
 
 class VariableNode(IntervalNotifier):
 
@@ -98,6 +284,17 @@ class BinaryNode(IntervalNotifier):
         while len(self.left) > 0 and len(self.right) > 0:
             self.__merge()
 
+    def get_state(self):
+        return list(self.left), list(self.right)
+
+    def set_state(self, state):
+        left, right = state
+        self.left = list(left)
+        self.right = list(right)
+
+    def state_size(self):
+        return len(self.left) + len(self.right)
+
 
 class NaryNode(IntervalNotifier):
 
@@ -133,8 +330,8 @@ class NaryNode(IntervalNotifier):
         max_starts = max(starts)
         if min_starts != max_starts:
             self.notify(Interval(min_starts, max_starts, Polynomial.undefined()))
-            for l in self.locations:
-                l[0] = l[0].split(max_starts - min_starts)[1]
+            for l in self.locations.values():
+                l[0] = l[0].subset(max_starts, l[0].end)
         min_end = min(end)
         cut = []
         for l in self.locations.values():
@@ -147,6 +344,15 @@ class NaryNode(IntervalNotifier):
                 cut.append(l.pop(0))
         self.notify(self.operator(cut))
 
+    def get_state(self):
+        return {location_name: list(intervals) for location_name, intervals in self.locations.items()}
+
+    def set_state(self, state):
+        self.locations = {location_name: list(intervals) for location_name, intervals in state.items()}
+
+    def state_size(self):
+        return sum(len(intervals) for intervals in self.locations.values())
+
 
 class WindowNode(IntervalNotifier):
     def __init__(self, window: WindowInterval, window_operator: WindowOperator):
@@ -166,6 +372,20 @@ class WindowNode(IntervalNotifier):
     def receive(self, interval: Interval):
         self.window.add(interval)
 
+    def get_state(self):
+        return self.window.get_state(), self.window_operator.get_state()
+
+    def set_state(self, state):
+        window_state, window_operator_state = state
+        self.window.set_state(window_state)
+        self.window_operator.set_state(window_operator_state)
+
+    def state_size(self):
+        return len(self.window.intervals) + self.window_operator.state_size()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.window.length})"
+
 
 # class IntegralNode(IntervalNotifier):
 #     def __init__(self, window: WindowInterval):
@@ -272,13 +492,177 @@ class IntegralWindowNode(WindowNode):
     def __init__(self, length: float):
         super().__init__(WindowInterval(length), Integral())
 
-class MinWindowNode(WindowNode):
+class ExtremeWindowNode(WindowNode):
+    # The minimum or maximum of undefined input is not defined, and Min2 and Max2 cannot compare it.
+
+    def receive(self, interval: Interval):
+        if interval.is_undefined():
+            raise Exception(f"{type(self).__name__} does not accept undefined input, got it over "
+                            f"[{interval.start}, {interval.end}]: use HOLD heartbeats or no max_gap upstream")
+        super().receive(interval)
+
+class MinWindowNode(ExtremeWindowNode):
     def __init__(self, length: float):
         super().__init__(WindowInterval(length), Min2())
 
-class MaxWindowNode(WindowNode):
+class MaxWindowNode(ExtremeWindowNode):
     def __init__(self, length: float):
-        super().__init__(WindowInterval(length), Max())
+        super().__init__(WindowInterval(length), Max2())
+
+class EarlyVerdictNode(IntervalNotifier):
+    # Verdict "some value in [t, t + length] satisfies condition", i.e. the output of condition applied to a min
+    # or max window, computed as the set where the input satisfies condition dilated backward by length. The
+    # main notifier emits the exact verdict with the timing of a window node, up to the last input time minus
+    # length. A witness at time s also settles the windows starting in (s - length, s], which the exact output
+    # only reaches length later: those are emitted at once on the provisional notifier, marked provisional.
+    # Undefined input is never a witness, as it counts as zero in IntegralWindowNode: a window without a defined
+    # witness is false, whatever it contains.
+
+    def __init__(self, length: float, threshold: float, condition):
+        super().__init__()
+        self.length = length
+        self.threshold = threshold
+        self.condition = condition
+        self.provisional = IntervalNotifier()
+        self.emitted = None
+        self.true_until = float('-inf')
+        self.provisional_until = float('-inf')
+
+    def receive(self, interval: Interval):
+        for piece in self.condition(interval):
+            self.__advance(piece)
+
+    def __advance(self, piece: Interval):
+        if self.emitted is None:
+            self.emitted = piece.start
+        value = piece.function(piece.start)
+        if value == 1:
+            self.true_until = piece.end
+        horizon = piece.end - self.length
+        start = self.emitted
+        for until, function in ((self.true_until, Polynomial.true()), (horizon, Polynomial.false())):
+            end = min(until, horizon)
+            if end > start:
+                self.notify(Interval(start, end, function))
+                start = end
+        self.emitted = max(self.emitted, horizon)
+        if value == 1:
+            start = max(self.emitted, self.provisional_until)
+            if piece.end > start:
+                self.provisional.notify(Interval(start, piece.end, Polynomial.true()).as_provisional())
+                self.provisional_until = piece.end
+
+    def get_state(self):
+        return self.emitted, self.true_until, self.provisional_until
+
+    def set_state(self, state):
+        self.emitted, self.true_until, self.provisional_until = state
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.length}, {self.threshold})"
+
+
+class EarlyMinBelowNode(EarlyVerdictNode):
+    # On defined input, same exact output as LowerThanNode(threshold) after MinWindowNode(length), which does not
+    # accept undefined input.
+    def __init__(self, length: float, threshold: float):
+        super().__init__(length, threshold, IntervalOperators.lower_than(threshold))
+
+
+class EarlyMaxAboveNode(EarlyVerdictNode):
+    # On defined input, same exact output as HigherThanNode(threshold) after MaxWindowNode(length), which does not
+    # accept undefined input.
+    def __init__(self, length: float, threshold: float):
+        super().__init__(length, threshold, IntervalOperators.higher_than(threshold))
+
+
+class EarlyIntegralAboveNode(WindowNode):
+    # Exact output of HigherThanNode(threshold) after IntegralWindowNode(length) on the main notifier. For the
+    # windows [t, t + length] that are not complete yet, the integral is at least what has been received plus
+    # lower_bound times the missing length, as long as the input never goes below lower_bound (0 for
+    # non-negative signals): the windows where that bound already exceeds threshold are emitted at once on the
+    # provisional notifier. The bound decreases with t, so they form a prefix of the incomplete windows and a
+    # cursor over the received intervals finds it in amortized constant time.
+
+    def __init__(self, length: float, threshold: float, lower_bound: float = 0):
+        super().__init__(WindowInterval(length), Integral())
+        self.threshold = threshold
+        self.lower_bound = lower_bound
+        self.provisional = IntervalNotifier()
+        self.pending = []
+        self.pending_integral = 0.0
+        self.cursor = None
+
+    def move(self, removed: Interval, added: Interval):
+        for result in self.window_operator.move(removed, added):
+            self.notify_multiple(result.higher_than(self.threshold))
+
+    def receive(self, interval: Interval):
+        self.window.add(interval)
+        if interval.is_undefined():
+            self.pending, self.pending_integral, self.cursor = [], 0.0, interval.end
+            return
+        if self.cursor is None:
+            self.cursor = interval.start
+        self.pending.append(interval)
+        self.pending_integral += interval.integrate()
+        self.__drop_before(interval.end - self.window.length)
+        start = self.cursor
+        while self.pending:
+            first = self.pending[0]
+            if self.__bound(first.end, interval.end) > self.threshold:
+                self.__drop_before(first.end)
+                continue
+            if self.__bound(first.start, interval.end) > self.threshold:
+                crossing = self.__crossing(first, interval.end)
+                zeros = [zero for zero in crossing.zeros() if first.start <= zero <= first.end]
+                if zeros:
+                    self.__drop_before(min(zeros))
+            break
+        if self.cursor > start:
+            self.provisional.notify(Interval(start, self.cursor, Polynomial.true()).as_provisional())
+
+    def __bound(self, time, end):
+        # Lower bound of the integral over [time, time + length] once the input is known up to end.
+        return self.pending_integral - self.__integral(self.pending[0], time) + (time + self.window.length - end) * \
+            self.lower_bound
+
+    def __crossing(self, first: Interval, end):
+        # __bound(t, end) - threshold for t inside first, as a polynomial in t.
+        antiderivative = first.function.integral()
+        return Polynomial(-antiderivative.a, -antiderivative.b + self.lower_bound,
+                          self.pending_integral + antiderivative(first.start) - antiderivative.c +
+                          (self.window.length - end) * self.lower_bound - self.threshold)
+
+    @staticmethod
+    def __integral(interval: Interval, time):
+        # Integral of interval from its start to time.
+        antiderivative = interval.function.integral()
+        return antiderivative(time) - antiderivative(interval.start)
+
+    def __drop_before(self, time):
+        # Moves the cursor to time, dropping the received input before it.
+        while self.pending and self.pending[0].end <= time:
+            self.pending_integral -= self.pending[0].integrate()
+            self.cursor = self.pending.pop(0).end
+        if self.pending and self.pending[0].start < time:
+            self.pending_integral -= self.__integral(self.pending[0], time)
+            self.pending[0] = self.pending[0].subset(time, self.pending[0].end)
+            self.cursor = time
+
+    def get_state(self):
+        return super().get_state(), list(self.pending), self.pending_integral, self.cursor
+
+    def set_state(self, state):
+        window_state, pending, self.pending_integral, self.cursor = state
+        super().set_state(window_state)
+        self.pending = list(pending)
+
+    def state_size(self):
+        return super().state_size() + len(self.pending)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.window.length}, {self.threshold})"
 
 class MinNode(BinaryNode):
     def __init__(self):
@@ -299,18 +683,34 @@ class SubNode(BinaryNode):
 class HigherThanNode(UnaryNode):
     def __init__(self, threshold):
         super().__init__(IntervalOperators.higher_than(threshold))
+        self.threshold = threshold
+
+    def __repr__(self):
+        return f"HigherThanNode({self.threshold})"
 
 class LowerThanNode(UnaryNode):
     def __init__(self, threshold):
         super().__init__(IntervalOperators.lower_than(threshold))
+        self.threshold = threshold
+
+    def __repr__(self):
+        return f"LowerThanNode({self.threshold})"
 
 class ShiftNode(UnaryNode):
     def __init__(self, delta):
         super().__init__(IntervalOperators.shift(delta))
+        self.delta = delta
+
+    def __repr__(self):
+        return f"ShiftNode({self.delta})"
 
 class MultiplyByConst(UnaryNode):
     def __init__(self, value):
         super().__init__(IntervalOperators.mult_const(value))
+        self.value = value
+
+    def __repr__(self):
+        return f"MultiplyByConst({self.value})"
 
 class FilterNode(BinaryNode):
     def __init__(self):
@@ -361,6 +761,18 @@ class MinOptimalWindowNode(IntervalNotifier):
         if vout:
             self.notify_multiple(vout)
 
+    def get_state(self):
+        return list(self.intervals)
+
+    def set_state(self, state):
+        self.intervals = list(state)
+
+    def state_size(self):
+        return len(self.intervals)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.length})"
+
 
 
 
@@ -420,4 +832,17 @@ class MinOptimalWindowNode2(IntervalNotifier):
                 to_slide = 0
                 self.start_window = left.end
         if vout:
-            self.notify_multiple(vout)
\ No newline at end of file
+            self.notify_multiple(vout)
+
+    def get_state(self):
+        return list(self.intervals), self.start_window, self.end_window
+
+    def set_state(self, state):
+        intervals, self.start_window, self.end_window = state
+        self.intervals = list(intervals)
+
+    def state_size(self):
+        return len(self.intervals)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.length})"
@@ -1,29 +1,186 @@
 import numpy as np
 
 
+def grow(array, size):
+    # array, or a copy with room for at least size columns along its last axis: the capacity doubles, so that
+    # appending stays amortized O(1).
+    capacity = array.shape[-1]
+    if size <= capacity:
+        return array
+    grown = np.empty(array.shape[:-1] + (max(2 * capacity, size),))
+    grown[..., :capacity] = array
+    return grown
+
+
 class Signal:
+    QUADRATIC_POINTS = 20
+    INITIAL_CAPACITY = 64
 
     def __init__(self):
         self.intervals = []
+        self.size = 0
+        self.t = np.empty(Signal.INITIAL_CAPACITY)
+        self.x = np.empty(Signal.INITIAL_CAPACITY)
+        self.records = np.empty((6, Signal.INITIAL_CAPACITY))
 
     def append(self, interval):
+        count = len(self.intervals)
+        self.records = grow(self.records, count + 1)
+        function = interval.function
+        self.records[:, count] = (interval.start, interval.end, function.a, function.b, function.c,
+                                  function(interval.start) is not None)
         self.intervals.append(interval)
+        if function(interval.start) is None:
+            self.__extend((interval.start, interval.end), (np.nan, np.nan))
+        elif function.a == 0:
+            self.__extend((interval.start, interval.end), (function(interval.start), function(interval.end)))
+        else:
+            times = np.linspace(interval.start, interval.end, Signal.QUADRATIC_POINTS, endpoint=True)
+            self.__extend(times, function.a * times * times + function.b * times + function.c)
+
+    def __extend(self, times, values):
+        end = self.size + len(times)
+        self.t = grow(self.t, end)
+        self.x = grow(self.x, end)
+        self.t[self.size:end] = times
+        self.x[self.size:end] = values
+        self.size = end
 
     def get_points(self):
-        t = []
-        x = []
-        for interval in self.intervals:
-            if interval.function.a == 0:
-                t.append(interval.start)
-                x.append(interval.function(interval.start))
-                t.append(interval.end)
-                x.append(interval.function(interval.end))
+        # Views on the internal buffers: they are not copied and reflect the points sampled so far.
+        return self.t[:self.size], self.x[:self.size]
+
+    def get_arrays(self):
+        # Views of start, end, a, b, c and the defined flag of the intervals received so far.
+        start, end, a, b, c, defined = self.records[:, :len(self.intervals)]
+        return start, end, a, b, c, defined.astype(bool)
+
+    def to_dataframe(self, unit=None, origin=None):
+        # Intervals as a pandas DataFrame; with a unit, interval bounds become timestamps counted from origin.
+        from ingestion import to_dataframe
+        return to_dataframe(*self.get_arrays(), unit=unit, origin=origin)
+
+    def __find(self, time):
+        # Intervals are appended in time order, so a binary search over their starts locates any time.
+        count = len(self.intervals)
+        position = int(np.searchsorted(self.records[0, :count], time, side='right')) - 1
+        if position < 0 or self.records[1, position] < time:
+            return None
+        return position
+
+    def at(self, time):
+        position = self.__find(time)
+        if position is None:
+            return None
+        return self.intervals[position]
+
+    def value_at(self, time):
+        interval = self.at(time)
+        if interval is None:
+            return None
+        return interval.function(time)
+
+    def between(self, start, end):
+        count = len(self.intervals)
+        low = int(np.searchsorted(self.records[1, :count], start, side='left'))
+        high = int(np.searchsorted(self.records[0, :count], end, side='right'))
+        return self.intervals[low:high]
+
+    def values_at(self, times):
+        times = np.asarray(times, dtype=float)
+        count = len(self.intervals)
+        if count == 0:
+            return np.full(times.shape, np.nan)
+        starts, ends, a, b, c, defined = self.records[:, :count]
+        position = np.clip(np.searchsorted(starts, times, side='right') - 1, 0, count - 1)
+        inside = (times >= starts[0]) & (times <= ends[position]) & (defined[position] == 1)
+        return np.where(inside, a[position] * times * times + b[position] * times + c[position], np.nan)
+
+
+class BoundedSignal:
+    # Keeps only the last max_intervals intervals, or the intervals ending within horizon of the latest one.
+    # Records live in a mirrored ring buffer (every record is written at i and at i + capacity), so the
+    # retained records are always a contiguous slice and both append and eviction are O(1).
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, max_intervals=None, horizon=None):
+        if (max_intervals is None) == (horizon is None):
+            raise Exception("Exactly one of max_intervals and horizon must be given")
+        if max_intervals is not None and max_intervals < 1:
+            raise Exception("max_intervals must be at least 1")
+        self.max_intervals = max_intervals
+        self.horizon = horizon
+        # The buffer grows lazily up to max_intervals, so a large bound costs nothing until it is reached.
+        self.capacity = BoundedSignal.INITIAL_CAPACITY
+        if max_intervals is not None:
+            self.capacity = min(max_intervals, self.capacity)
+        # start, end, a, b, c, defined and provisional.
+        self.records = np.zeros((7, 2 * self.capacity))
+        self.head = 0
+        self.count = 0
+
+    def append(self, interval):
+        if self.count == self.capacity:
+            if self.capacity == self.max_intervals:
+                self.head = (self.head + 1) % self.capacity
+                self.count -= 1
             else:
-                times = np.linspace(interval.start, interval.end, 20, endpoint=True)
-                for time in times:
-                    t.append(time)
-                    x.append(interval.function(time))
-        return t,x
+                self.__grow()
+        function = interval.function
+        position = (self.head + self.count) % self.capacity
+        record = (interval.start, interval.end, function.a, function.b, function.c,
+                  function(interval.start) is not None, interval.provisional)
+        self.records[:, position] = record
+        self.records[:, position + self.capacity] = record
+        self.count += 1
+        if self.horizon is not None:
+            self.__evict(interval.end - self.horizon)
+
+    def __evict(self, time):
+        while self.count > 1 and self.records[1, self.head] <= time:
+            self.head = (self.head + 1) % self.capacity
+            self.count -= 1
+
+    def __grow(self):
+        retained = self.records[:, self.head:self.head + self.count]
+        self.capacity *= 2
+        if self.max_intervals is not None:
+            self.capacity = min(self.capacity, self.max_intervals)
+        records = np.zeros((7, 2 * self.capacity))
+        records[:, :self.count] = retained
+        records[:, self.capacity:self.capacity + self.count] = retained
+        self.records = records
+        self.head = 0
+
+    def get_arrays(self):
+        # Contiguous views of start, end, a, b, c and the defined flag of the retained intervals.
+        start, end, a, b, c, defined = self.records[:6, self.head:self.head + self.count]
+        return start, end, a, b, c, defined.astype(bool)
+
+    def to_dataframe(self, unit=None, origin=None):
+        from ingestion import to_dataframe
+        return to_dataframe(*self.get_arrays(), unit=unit, origin=origin)
+
+    @property
+    def intervals(self):
+        # Imported here: elements imports this module for WindowIntervalNotifier.
+        from elements import Interval
+        from functions import Polynomial
+        intervals = []
+        for start, end, a, b, c, defined, provisional in self.records[:, self.head:self.head + self.count].T.tolist():
+            interval = Interval(start, end, Polynomial(a, b, c) if defined else Polynomial.undefined())
+            intervals.append(interval.as_provisional() if provisional else interval)
+        return intervals
+
+    def get_points(self):
+        start, end, a, b, c, defined = self.get_arrays()
+        counts = np.where(a == 0, 2, Signal.QUADRATIC_POINTS)
+        offsets = np.cumsum(counts) - counts
+        index = np.repeat(np.arange(self.count), counts)
+        fraction = (np.arange(len(index)) - offsets[index]) / (counts[index] - 1)
+        t = start[index] + fraction * (end[index] - start[index])
+        x = np.where(defined[index], a[index] * t * t + b[index] * t + c[index], np.nan)
+        return t, x
 
 
 class IntervalNotifier:
@@ -39,14 +196,39 @@ class IntervalNotifier:
             observer(interval)
 
     def notify_multiple(self, intervals):
+        # Same calls, in the same order, as notify on every interval, without a method call per interval.
+        observers = self.observers
         for interval in intervals:
-            self.notify(interval)
+            for observer in observers:
+                observer(interval)
 
-    def observe(self):
-        signal = Signal()
+    def observe(self, max_intervals=None, horizon=None):
+        if max_intervals is None and horizon is None:
+            signal = Signal()
+        else:
+            signal = BoundedSignal(max_intervals, horizon)
         self.to(signal.append)
         return signal
 
+    def edges(self):
+        # Change events (time, value) of the verdict, see EdgeDetector.
+        detector = EdgeDetector()
+        self.to(detector.receive)
+        return detector
+
+    def get_state(self):
+        return None
+
+    def set_state(self, state):
+        pass
+
+    def state_size(self):
+        # Number of intervals or samples the node currently buffers.
+        return 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
 class WindowIntervalNotifier:
     def __init__(self):
         self.observers = []
@@ -61,3 +243,45 @@ class WindowIntervalNotifier:
     def notify_move(self, interval_to_remove, interval_to_add):
         for observer in self.observers:
             observer.move(interval_to_remove, interval_to_add)
+
+class SampleNotifier:
+    def __init__(self):
+        self.observers = []
+
+    def to(self, observer):
+        self.observers.append(observer)
+
+    def notify(self, time, value):
+        for observer in self.observers:
+            observer(time, value)
+
+    def state_size(self):
+        return 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class EdgeDetector(SampleNotifier):
+    # Turns a stream of verdict intervals into change events: notifies (start, value) when an interval's value
+    # differs from the previous one, and nothing for continuations. The value of an interval is its value at the
+    # start, so the detector is meant for piecewise-constant outputs (HigherThanNode, MinNode of verdicts, ...);
+    # undefined intervals have value None. The first interval always produces an event.
+
+    NOTHING = object()
+
+    def __init__(self):
+        super().__init__()
+        self.value = EdgeDetector.NOTHING
+
+    def receive(self, interval):
+        value = interval.function(interval.start)
+        if value != self.value:
+            self.value = value
+            self.notify(interval.start, value)
+
+    def get_state(self):
+        return None if self.value is EdgeDetector.NOTHING else (self.value,)
+
+    def set_state(self, state):
+        self.value = EdgeDetector.NOTHING if state is None else state[0]
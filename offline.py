@@ -0,0 +1,315 @@
+import numpy as np
+
+from elements import Interval
+from functions import Polynomial
+
+
+class PiecewiseSignal:
+
+    def __init__(self, start, end, a, b, c, defined=None):
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        self.a = np.asarray(a, dtype=float)
+        self.b = np.asarray(b, dtype=float)
+        self.c = np.asarray(c, dtype=float)
+        if defined is None:
+            defined = np.ones(len(self.start), dtype=bool)
+        self.defined = np.asarray(defined, dtype=bool)
+
+    @staticmethod
+    def from_samples(times, values) -> 'PiecewiseSignal':
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        m = np.diff(values) / np.diff(times)
+        q = values[:-1] - times[:-1] * m
+        return PiecewiseSignal(times[:-1], times[1:], np.zeros(len(m)), m, q)
+
+    @staticmethod
+    def from_constant_samples(times, values) -> 'PiecewiseSignal':
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        zeros = np.zeros(len(times) - 1)
+        return PiecewiseSignal(times[:-1], times[1:], zeros, zeros, values[:-1])
+
+    @staticmethod
+    def from_intervals(intervals) -> 'PiecewiseSignal':
+        return PiecewiseSignal([interval.start for interval in intervals],
+                               [interval.end for interval in intervals],
+                               [interval.function.a for interval in intervals],
+                               [interval.function.b for interval in intervals],
+                               [interval.function.c for interval in intervals],
+                               [not interval.is_undefined() for interval in intervals])
+
+    def to_intervals(self):
+        intervals = []
+        for start, end, a, b, c, defined in zip(self.start.tolist(), self.end.tolist(), self.a.tolist(),
+                                                self.b.tolist(), self.c.tolist(), self.defined.tolist()):
+            intervals.append(Interval(start, end, Polynomial(a, b, c) if defined else Polynomial.undefined()))
+        return intervals
+
+    def __len__(self):
+        return len(self.start)
+
+    def __call__(self, times):
+        times = np.asarray(times, dtype=float)
+        if len(self) == 0:
+            return np.full(times.shape, np.nan)
+        index = np.clip(np.searchsorted(self.start, times, side='right') - 1, 0, max(len(self) - 1, 0))
+        values = self.a[index] * times * times + self.b[index] * times + self.c[index]
+        inside = (times >= self.start[0]) & (times <= self.end[index]) & self.defined[index]
+        return np.where(inside, values, np.nan)
+
+    def select(self, mask) -> 'PiecewiseSignal':
+        return PiecewiseSignal(self.start[mask], self.end[mask], self.a[mask], self.b[mask], self.c[mask],
+                               self.defined[mask])
+
+    @staticmethod
+    def concatenate(signals) -> 'PiecewiseSignal':
+        return PiecewiseSignal(np.concatenate([signal.start for signal in signals]),
+                               np.concatenate([signal.end for signal in signals]),
+                               np.concatenate([signal.a for signal in signals]),
+                               np.concatenate([signal.b for signal in signals]),
+                               np.concatenate([signal.c for signal in signals]),
+                               np.concatenate([signal.defined for signal in signals]))
+
+    def bounds(self):
+        # Starts followed by the last end, or None for an empty signal.
+        if len(self) == 0:
+            return None
+        return np.append(self.start, self.end[-1:])
+
+
+def polynomial_zeros(a, b, c):
+    # Vectorized Polynomial.zeros: two columns in increasing order, nan where there is no zero.
+    a, b, c = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float),
+                                  np.asarray(c, dtype=float))
+    first = np.full(a.shape, np.nan)
+    second = np.full(a.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        linear = (a == 0) & (b != 0)
+        first[linear] = -c[linear] / b[linear]
+        quadratic = a != 0
+        delta = b * b - 4 * a * c
+        root = np.sqrt(np.where(quadratic & (delta >= 0), delta, 0))
+        low = (-b - root) / (2 * a)
+        high = (-b + root) / (2 * a)
+        has_zeros = quadratic & (delta >= 0)
+        first[has_zeros] = np.minimum(low, high)[has_zeros]
+        two_zeros = quadratic & (delta > 0)
+        second[two_zeros] = np.maximum(low, high)[two_zeros]
+    return first, second
+
+
+def split_on_cuts(start, end, cuts):
+    # Splits every [start, end] on the cuts strictly inside it; returns the row of every piece and its bounds.
+    cuts = np.where((cuts > start[:, None]) & (cuts < end[:, None]), cuts, np.nan)
+    points = np.sort(np.column_stack([start, cuts, end]), axis=1)
+    points = np.where(np.isnan(points), end[:, None], points)
+    left = points[:, :-1]
+    right = points[:, 1:]
+    valid = right > left
+    valid[:, 0] |= ~valid.any(axis=1)
+    rows = np.broadcast_to(np.arange(len(start))[:, None], left.shape)
+    return rows[valid], left[valid], right[valid]
+
+
+def evaluate(a, b, c, times):
+    return a * times * times + b * times + c
+
+
+def envelope(start, end, functions, operator):
+    # Pointwise operator (np.argmin or np.argmax) of the polynomials in functions over every [start, end].
+    cuts = []
+    for i in range(len(functions)):
+        for j in range(i + 1, len(functions)):
+            difference = [p - q for p, q in zip(functions[i], functions[j])]
+            cuts.extend(polynomial_zeros(*difference))
+    rows, left, right = split_on_cuts(start, end, np.column_stack(cuts))
+    middle = (left + right) / 2
+    values = np.stack([evaluate(a[rows], b[rows], c[rows], middle) for a, b, c in functions])
+    choice = operator(values, axis=0)
+    coefficients = [np.choose(choice, [function[k][rows] for function in functions]) for k in range(3)]
+    return rows, PiecewiseSignal(left, right, *coefficients)
+
+
+def align(left: PiecewiseSignal, right: PiecewiseSignal):
+    # Mirrors BinaryNode: an undefined prefix where only one signal exists, then the common refinement
+    # of both partitions up to the end of the shortest signal. Nothing is output until both signals exist.
+    if len(left) == 0 or len(right) == 0:
+        empty = np.empty(0)
+        return None, empty, empty, empty.astype(int), empty.astype(int)
+    first = max(left.start[0], right.start[0])
+    last = min(left.end[-1], right.end[-1])
+    grid = np.unique(np.concatenate([left.bounds(), right.bounds()]))
+    grid = grid[(grid >= first) & (grid <= last)]
+    start, end = grid[:-1], grid[1:]
+    middle = (start + end) / 2
+    left_index = np.searchsorted(left.start, middle, side='right') - 1
+    right_index = np.searchsorted(right.start, middle, side='right') - 1
+    prefix = None
+    if left.start[0] != right.start[0]:
+        prefix = PiecewiseSignal([min(left.start[0], right.start[0])], [first], [0], [0], [0], [False])
+    return prefix, start, end, left_index, right_index
+
+
+def with_prefix(prefix, signal):
+    if prefix is None:
+        return signal
+    return PiecewiseSignal.concatenate([prefix, signal])
+
+
+class OfflineOperators:
+
+    @staticmethod
+    def add(left: PiecewiseSignal, right: PiecewiseSignal) -> PiecewiseSignal:
+        prefix, start, end, i, j = align(left, right)
+        return with_prefix(prefix, PiecewiseSignal(start, end, left.a[i] + right.a[j], left.b[i] + right.b[j],
+                                                   left.c[i] + right.c[j], left.defined[i] & right.defined[j]))
+
+    @staticmethod
+    def sub(left: PiecewiseSignal, right: PiecewiseSignal) -> PiecewiseSignal:
+        prefix, start, end, i, j = align(left, right)
+        return with_prefix(prefix, PiecewiseSignal(start, end, left.a[i] - right.a[j], left.b[i] - right.b[j],
+                                                   left.c[i] - right.c[j], left.defined[i] & right.defined[j]))
+
+    @staticmethod
+    def filter(left: PiecewiseSignal, right: PiecewiseSignal) -> PiecewiseSignal:
+        prefix, start, end, i, j = align(left, right)
+        true = right.defined[j] & (right.a[j] == 0) & (right.b[j] == 0) & (right.c[j] == 1)
+        return with_prefix(prefix, PiecewiseSignal(start, end, left.a[i], left.b[i], left.c[i],
+                                                   left.defined[i] & true))
+
+    @staticmethod
+    def min(left: PiecewiseSignal, right: PiecewiseSignal) -> PiecewiseSignal:
+        return OfflineOperators.__extreme(left, right, np.argmin)
+
+    @staticmethod
+    def max(left: PiecewiseSignal, right: PiecewiseSignal) -> PiecewiseSignal:
+        return OfflineOperators.__extreme(left, right, np.argmax)
+
+    @staticmethod
+    def __extreme(left, right, operator):
+        prefix, start, end, i, j = align(left, right)
+        rows, result = envelope(start, end, [(left.a[i], left.b[i], left.c[i]),
+                                             (right.a[j], right.b[j], right.c[j])], operator)
+        result.defined = left.defined[i][rows] & right.defined[j][rows]
+        return with_prefix(prefix, result)
+
+    @staticmethod
+    def shift(signal: PiecewiseSignal, delta) -> PiecewiseSignal:
+        a, b, c = signal.a, signal.b, signal.c
+        return PiecewiseSignal(signal.start + delta, signal.end + delta, a, b - 2 * a * delta,
+                               a * delta * delta - b * delta + c, signal.defined)
+
+    @staticmethod
+    def mult_const(signal: PiecewiseSignal, value) -> PiecewiseSignal:
+        return PiecewiseSignal(signal.start, signal.end, signal.a * value, signal.b * value, signal.c * value,
+                               signal.defined)
+
+    @staticmethod
+    def higher_than(signal: PiecewiseSignal, threshold) -> PiecewiseSignal:
+        return OfflineOperators.__compare(signal, threshold, np.greater)
+
+    @staticmethod
+    def lower_than(signal: PiecewiseSignal, threshold) -> PiecewiseSignal:
+        return OfflineOperators.__compare(signal, threshold, np.less)
+
+    @staticmethod
+    def __compare(signal, threshold, comparison):
+        cuts = np.column_stack(polynomial_zeros(signal.a, signal.b, signal.c - threshold))
+        rows, start, end = split_on_cuts(signal.start, signal.end, cuts)
+        middle = (start + end) / 2
+        values = comparison(evaluate(signal.a[rows], signal.b[rows], signal.c[rows], middle), threshold)
+        zeros = np.zeros(len(rows))
+        return PiecewiseSignal(start, end, zeros, zeros, values.astype(float), signal.defined[rows])
+
+    @staticmethod
+    def integral(signal: PiecewiseSignal, length) -> PiecewiseSignal:
+        # Same output as IntegralWindowNode: the value at t is the integral over [t, t + length], obtained
+        # from prefix sums of the piece integrals. Undefined pieces count as zero, as in the online mode.
+        if np.any(signal.defined & (signal.a != 0)):
+            raise Exception("not possible")
+        a = np.where(signal.defined, signal.b / 2, 0)
+        b = np.where(signal.defined, signal.c, 0)
+        piece_integrals = a * (signal.end ** 2 - signal.start ** 2) + b * (signal.end - signal.start)
+        cumulated = np.concatenate([[0], np.cumsum(piece_integrals)[:-1]])
+        c = cumulated - a * signal.start ** 2 - b * signal.start
+        start, end, i, j = OfflineOperators.__window_segments(signal, length)
+        return PiecewiseSignal(start, end, a[j] - a[i], 2 * a[j] * length + b[j] - b[i],
+                               a[j] * length * length + b[j] * length + c[j] - c[i])
+
+    @staticmethod
+    def min_window(signal: PiecewiseSignal, length) -> PiecewiseSignal:
+        # Same output as MinWindowNode: the value at t is the minimum over [t, t + length]. The minimum of the
+        # samples strictly inside each window is a range minimum query on a sparse table.
+        if np.any(signal.a != 0) or not np.all(signal.defined):
+            raise Exception("Window minimum requires a defined piecewise linear signal")
+        start, end, i, j = OfflineOperators.__window_segments(signal, length)
+        if len(start) == 0:
+            return PiecewiseSignal(start, end, start, start, start)
+        bounds = signal.bounds()
+        bound_values = np.append(signal.b * signal.start + signal.c, signal.b[-1:] * bounds[-1] + signal.c[-1:])
+        window_end = start + length
+        window_end_value = signal.b[j] * window_end + signal.c[j]
+        inner = SparseTable(bound_values).query(np.searchsorted(bounds, end, side='right'),
+                                                np.searchsorted(bounds, window_end, side='left'))
+        inner = np.minimum(inner, window_end_value)
+        zeros = np.zeros(len(start))
+        removed_decreasing = signal.b[i] < 0
+        removed = (zeros, np.where(removed_decreasing, 0, signal.b[i]),
+                   np.where(removed_decreasing, signal.b[i] * end + signal.c[i], signal.c[i]))
+        added_increasing = signal.b[j] > 0
+        added = (zeros, np.where(added_increasing, 0, signal.b[j]),
+                 np.where(added_increasing, window_end_value, signal.b[j] * length + signal.c[j]))
+        _, result = envelope(start, end, [removed, (zeros, zeros, inner), added], np.argmin)
+        return result
+
+    @staticmethod
+    def max_window(signal: PiecewiseSignal, length) -> PiecewiseSignal:
+        negated = OfflineOperators.min_window(OfflineOperators.mult_const(signal, -1), length)
+        return OfflineOperators.mult_const(negated, -1)
+
+    @staticmethod
+    def __window_segments(signal, length):
+        # Output pieces of a window operator: t ranges over [first start, last end - length] and the
+        # pieces are delimited by the bounds of the signal seen from both sides of the window.
+        bounds = signal.bounds()
+        if bounds is None:
+            empty = np.empty(0)
+            return empty, empty, empty.astype(int), empty.astype(int)
+        grid = np.unique(np.concatenate([bounds, bounds - length]))
+        grid = grid[(grid >= bounds[0]) & (grid <= bounds[-1] - length)]
+        start, end = grid[:-1], grid[1:]
+        middle = (start + end) / 2
+        i = np.searchsorted(signal.start, middle, side='right') - 1
+        j = np.searchsorted(signal.start, middle + length, side='right') - 1
+        return start, end, i, j
+
+
+class SparseTable:
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        levels = [values]
+        width = 1
+        while 2 * width <= len(values):
+            previous = levels[-1]
+            levels.append(np.minimum(previous[:-width], previous[width:]))
+            width *= 2
+        self.table = np.full((len(levels), len(values)), np.inf)
+        for k, level in enumerate(levels):
+            self.table[k, :len(level)] = level
+
+    def query(self, low, high):
+        # Minimum of values[low:high] for every pair, inf on empty ranges.
+        low = np.asarray(low)
+        high = np.asarray(high)
+        result = np.full(low.shape, np.inf)
+        non_empty = high > low
+        if not np.any(non_empty):
+            return result
+        low, high = low[non_empty], high[non_empty]
+        level = np.floor(np.log2(high - low)).astype(int)
+        width = 1 << level
+        result[non_empty] = np.minimum(self.table[level, low], self.table[level, high - width])
+        return result
@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+
+MAX_POINTS = 4000
+
+
+class LivePlot:
+    # Every bound signal is drawn by one persistent, animated Line2D that is updated with set_data. The static
+    # part of the figure (axes, grid, thresholds, titles) is rendered once and cached as the blitting
+    # background, and redraws are throttled to fps. A line only gets the points within the x-range of its axis,
+    # thinned out by a stride to at most max_points, so that a frame costs the same however long the signal is.
+
+    def __init__(self, fig, fps: float = 10, max_points=MAX_POINTS):
+        self.fig = fig
+        self.max_points = max_points
+        self.canvas = fig.canvas
+        self.period = 1 / fps
+        self.bindings = []
+        self.background = None
+        self.last_update = None
+        self.canvas.mpl_connect('draw_event', self.__on_draw)
+
+    def bind(self, ax, signal, points=None, **kwargs):
+        # points optionally transforms the (t, x) arrays of the signal before they are drawn.
+        line, = ax.plot([], [], animated=True, **kwargs)
+        self.bindings.append((ax, line, signal, points))
+        return line
+
+    def visible(self, ax, t, x):
+        # Points of a sorted t within the x-range of ax, with one more on each side so the line reaches the edges.
+        low, high = ax.get_xlim()
+        start = max(int(np.searchsorted(t, low, side='left')) - 1, 0)
+        end = int(np.searchsorted(t, high, side='right')) + 1
+        stride = max(-(-(end - start) // self.max_points), 1)
+        return t[start:end:stride], x[start:end:stride]
+
+    def update(self, force=False) -> bool:
+        now = time.monotonic()
+        if not force and self.last_update is not None and now - self.last_update < self.period:
+            return False
+        self.last_update = now
+        for ax, line, signal, points in self.bindings:
+            t, x = self.visible(ax, *signal.get_points())
+            if points is not None:
+                t, x = points(t, x)
+            line.set_data(t, x)
+        if self.background is None or not self.canvas.supports_blit:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.__draw_lines()
+        if self.canvas.supports_blit:
+            self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+        return True
+
+    def pause(self, interval: float):
+        # Like plt.pause, but runs the GUI event loop without forcing a full redraw of the figure.
+        self.canvas.start_event_loop(interval)
+
+    def __on_draw(self, event):
+        if self.canvas.supports_blit:
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.__draw_lines()
+
+    def __draw_lines(self):
+        for _, line, _, _ in self.bindings:
+            self.fig.draw_artist(line)
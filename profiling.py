@@ -0,0 +1,109 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from instrumentation import is_node, graph
+
+INTERVAL = 0.001
+
+
+def node_label(node, names=None):
+    # Equal nodes have equal reprs, e.g. two HigherThanNode(180) in different branches, so the label adds an
+    # identity: the node's number in names (see numbering), or else its id.
+    if names is not None and id(node) in names:
+        return names[id(node)]
+    return f"{node!r}@{id(node):x}"
+
+
+def numbering(*roots):
+    # Labels numbering the nodes reachable from roots in graph order, as Instrumentation.report does, e.g.
+    # '#1 HigherThanNode(180)'. Unlike ids, they are the same from one run to the next.
+    return {id(node): f"#{number} {node!r}" for number, node in enumerate(graph(*roots)[0])}
+
+
+def frame_label(frame, functions=False, names=None):
+    # The node a frame runs in, as its node_label, or None for frames outside any node. With functions, the method
+    # name is appended and frames outside nodes are labelled with their module and function.
+    node = frame.f_locals.get('self') if 'self' in frame.f_code.co_varnames else None
+    if is_node(node):
+        label = node_label(node, names)
+        return f"{label}.{frame.f_code.co_name}" if functions else label
+    if functions:
+        return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+    return None
+
+
+def stack(frame, functions=False, names=None):
+    # Labels from the outermost frame to frame. The notify -> observer -> receive frames of a node all carry the
+    # same label, so consecutive repeats are merged: what remains is the chain of nodes the sample went through,
+    # e.g. #0 VariablePWLNode() ; #3 FilterNode() ; #5 IntegralWindowNode(180).
+    labels = []
+    while frame is not None:
+        label = frame_label(frame, functions, names)
+        if label is not None and (not labels or labels[-1] != label):
+            labels.append(label)
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    # Periodically samples the stack of one thread (by default the one that created the profiler) from a
+    # background thread and counts the node chains it finds. Samples taken while no node is running are dropped
+    # unless functions is set. collapsed() is the input format of flamegraph.pl and speedscope. Nodes reachable
+    # from roots are labelled by their number in the graph, the others by their id.
+
+    def __init__(self, interval=INTERVAL, thread_id=None, functions=False, roots=()):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.functions = functions
+        self.names = numbering(*roots)
+        self.stacks = Counter()
+        self.samples = 0
+        self.running = False
+        self.thread = None
+
+    def sample(self, frame):
+        self.samples += 1
+        labels = stack(frame, self.functions, self.names)
+        if labels:
+            self.stacks[';'.join(labels)] += 1
+
+    def __run(self):
+        while self.running:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.sample(frame)
+            del frame
+            time.sleep(self.interval)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.__run, name='profiler', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def collapsed(self) -> str:
+        return '\n'.join(f"{labels} {count}" for labels, count in sorted(self.stacks.items())) + '\n'
+
+    def write(self, path):
+        with open(path, 'w') as file:
+            file.write(self.collapsed())
+
+    def self_samples(self):
+        # Samples per node in which it was the innermost node, i.e. its own time.
+        counts = Counter()
+        for labels, count in self.stacks.items():
+            counts[labels.rsplit(';', 1)[-1]] += count
+        return counts
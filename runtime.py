@@ -0,0 +1,102 @@
+import asyncio
+
+
+class AsyncSignal:
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.closed = False
+        self.error = None
+
+    def append(self, interval):
+        self.queue.put_nowait(interval)
+
+    def close(self, error=None):
+        # With an error, iteration raises it after the intervals emitted before the failure.
+        if not self.closed:
+            self.closed = True
+            self.error = error
+            self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        interval = await self.queue.get()
+        if interval is None:
+            if self.error is not None:
+                raise self.error
+            raise StopAsyncIteration
+        return interval
+
+
+class AsyncMonitor:
+
+    def __init__(self):
+        self.inputs = []
+        self.outputs = []
+        self.pending = []
+        self.flush_scheduled = False
+        self.consumers = []
+        self.error = None
+
+    def add_input(self, node, source):
+        # source is either an async iterator or an asyncio.Queue of (time, value) samples;
+        # a queue is terminated by putting None into it.
+        self.inputs.append((node, source))
+
+    def observe(self, node) -> AsyncSignal:
+        signal = AsyncSignal()
+        node.to(signal.append)
+        self.outputs.append(signal)
+        return signal
+
+    async def run(self):
+        # Flushes run as loop callbacks, so an exception raised by a node is stored by __flush, which cancels the
+        # consumers; run() then raises it and the outputs end with it instead of looking complete.
+        self.consumers = [asyncio.ensure_future(self.__consume(node, source)) for node, source in self.inputs]
+        try:
+            try:
+                await asyncio.gather(*self.consumers)
+            except asyncio.CancelledError:
+                if self.error is None:
+                    raise
+            if self.error is None:
+                self.__flush()
+            if self.error is not None:
+                raise self.error
+        finally:
+            for consumer in self.consumers:
+                consumer.cancel()
+            for signal in self.outputs:
+                signal.close(self.error)
+
+    async def __consume(self, node, source):
+        if isinstance(source, asyncio.Queue):
+            while True:
+                sample = await source.get()
+                if sample is None:
+                    return
+                self.__enqueue(node, sample)
+        else:
+            async for sample in source:
+                self.__enqueue(node, sample)
+
+    def __enqueue(self, node, sample):
+        self.pending.append((node, sample))
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.__flush)
+
+    def __flush(self):
+        self.flush_scheduled = False
+        pending, self.pending = self.pending, []
+        if self.error is not None:
+            return
+        try:
+            for node, (time, value) in pending:
+                node.receive(time, value)
+        except Exception as error:
+            self.error = error
+            for consumer in self.consumers:
+                consumer.cancel()
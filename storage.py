@@ -0,0 +1,166 @@
+import os
+
+import numpy as np
+
+from elements import Interval
+from functions import Polynomial
+
+MAGIC = b'GEMONSIG'
+VERSION = 1
+HEADER = np.dtype([('magic', 'S8'), ('version', '<u4'), ('reserved', '<u4')])
+RECORD = np.dtype([('start', '<f8'), ('end', '<f8'), ('a', '<f8'), ('b', '<f8'), ('c', '<f8'), ('flags', '<u8')])
+UNDEFINED = 1
+PROVISIONAL = 2
+INDEX_STRIDE = 1024
+
+# Number of open SignalWriters per file in this process; compact refuses to rewrite these files.
+OPEN_FOR_WRITING = {}
+
+
+def write_header(file):
+    header = np.zeros(1, dtype=HEADER)
+    header['magic'] = MAGIC
+    header['version'] = VERSION
+    file.write(header.tobytes())
+
+
+def to_intervals(records):
+    intervals = []
+    for start, end, a, b, c, flags in records.tolist():
+        function = Polynomial.undefined() if flags & UNDEFINED else Polynomial(a, b, c)
+        interval = Interval(start, end, function)
+        intervals.append(interval.as_provisional() if flags & PROVISIONAL else interval)
+    return intervals
+
+
+class SignalWriter:
+
+    def __init__(self, path, buffer_size=4096):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, 'ab')
+        self.key = os.path.realpath(path)
+        OPEN_FOR_WRITING[self.key] = OPEN_FOR_WRITING.get(self.key, 0) + 1
+        if not exists:
+            write_header(self.file)
+            self.file.flush()
+        self.buffer = np.zeros(buffer_size, dtype=RECORD)
+        self.size = 0
+
+    def append(self, interval: Interval):
+        function = interval.function
+        flags = (UNDEFINED if interval.is_undefined() else 0) | (PROVISIONAL if interval.provisional else 0)
+        self.buffer[self.size] = (interval.start, interval.end, function.a, function.b, function.c, flags)
+        self.size += 1
+        if self.size == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer[:self.size].tobytes())
+        self.file.flush()
+        self.size = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+        OPEN_FOR_WRITING[self.key] -= 1
+        if OPEN_FOR_WRITING[self.key] == 0:
+            del OPEN_FOR_WRITING[self.key]
+
+    def __del__(self):
+        # A writer dropped without close() still writes its buffer and releases its file.
+        if hasattr(self, 'file'):
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SignalReader:
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header['magic'][0] != MAGIC:
+            raise Exception(f"{path} is not a signal file")
+        if header['version'][0] != VERSION:
+            raise Exception(f"Unsupported signal file version {header['version'][0]}")
+        length = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+        if length > 0:
+            self.records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER.itemsize, shape=(length,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+        # Sparse time index: the start of every INDEX_STRIDE-th record, small enough to stay in memory.
+        self.index = np.array(self.records['start'][::INDEX_STRIDE])
+
+    def __len__(self):
+        return len(self.records)
+
+    def __search(self, time):
+        # Number of records starting at or before time.
+        block = np.searchsorted(self.index, time, side='right') - 1
+        if block < 0:
+            return 0
+        low = block * INDEX_STRIDE
+        high = min(low + INDEX_STRIDE, len(self.records))
+        return low + int(np.searchsorted(np.array(self.records['start'][low:high]), time, side='right'))
+
+    def range(self, start, end):
+        # Zero-copy view of the records overlapping [start, end].
+        low = max(self.__search(start) - 1, 0)
+        if low < len(self.records) and self.records['end'][low] < start:
+            low += 1
+        return self.records[low:self.__search(end)]
+
+    def intervals(self, start, end):
+        return to_intervals(self.range(start, end))
+
+    def value_at(self, time):
+        position = self.__search(time) - 1
+        if position < 0 or self.records['end'][position] < time:
+            return None
+        start, end, a, b, c, flags = self.records[position].tolist()
+        if flags & UNDEFINED:
+            return None
+        return a * time * time + b * time + c
+
+
+def merge_adjacent(records):
+    if len(records) < 2:
+        return records
+    same_function = ((records['a'][1:] == records['a'][:-1]) & (records['b'][1:] == records['b'][:-1])
+                     & (records['c'][1:] == records['c'][:-1]) & (records['flags'][1:] == records['flags'][:-1])
+                     & (records['start'][1:] == records['end'][:-1]))
+    first = np.concatenate([[True], ~same_function])
+    last = np.concatenate([~same_function, [True]])
+    merged = records[first]
+    merged['end'] = records['end'][last]
+    return merged
+
+
+def compact(path, before=None, chunk_size=1 << 20):
+    # Rewrites the file chunk by chunk, dropping the records that end at or before `before` and merging
+    # adjacent records that carry the same function. The writer of the file must be closed first: appends made
+    # after the rewrite started would go to the replaced file and be lost. Writers of this process are checked,
+    # writers of other processes are not.
+    if os.path.realpath(path) in OPEN_FOR_WRITING:
+        raise Exception(f"{path} is open for writing: close its SignalWriter before compacting")
+    records = SignalReader(path).records
+    temporary_path = f"{path}.compact"
+    with open(temporary_path, 'wb') as file:
+        write_header(file)
+        pending = np.zeros(0, dtype=RECORD)
+        for low in range(0, len(records), chunk_size):
+            chunk = np.array(records[low:low + chunk_size])
+            if before is not None:
+                chunk = chunk[chunk['end'] > before]
+            chunk = merge_adjacent(np.concatenate([pending, chunk]))
+            file.write(chunk[:-1].tobytes())
+            pending = chunk[-1:]
+        file.write(pending.tobytes())
+    del records
+    os.replace(temporary_path, path)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from benchmarks import GENERATORS, CASES, run, run_suite, compare
+
+
+@pytest.mark.parametrize('generator', GENERATORS.values())
+def test_generators(generator):
+    times, values = generator(500, seed=3)
+
+    assert times.shape == values.shape == (500,)
+    assert np.all(np.diff(times) > 0)
+    assert np.all(np.isfinite(values))
+
+
+@pytest.mark.parametrize('case_name', ['variable_pwl_batch', 'integral_window', 'sum', 'cgm_graph', 'weather_graph'])
+def test_run(case_name):
+    result = run(case_name, 'cgm_like', 300)
+
+    assert 'error' not in result
+    assert result['outputs'] > 0
+    assert result['throughput'] > 0
+    assert result['peak_memory_bytes'] > 0
+
+
+def test_run_suite_skips_sizes_over_budget():
+    results = run_suite(['higher_than'], ['steps'], [100, 200], memory=False, max_seconds=0)
+
+    assert 'throughput' in results[0]
+    assert results[1]['skipped']
+    assert compare(results, results) == []
+    assert set(CASES) >= {'variable_pwl', 'min_window', 'min', 'filter'}
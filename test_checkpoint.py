@@ -0,0 +1,86 @@
+import math
+
+import pytest
+
+from checkpoint import snapshot, restore, encode, decode
+from elements import Interval, Memory
+from functions import Polynomial
+from nodes import VariablePWLNode, HigherThanNode, IntegralWindowNode, MinWindowNode, FilterNode, SumNode
+
+
+def build_graph():
+    nodes = {
+        'x': VariablePWLNode(),
+        'high': HigherThanNode(0.5),
+        'int_high': IntegralWindowNode(3),
+        'min_x': MinWindowNode(2),
+        'filter': FilterNode(),
+        'sum': SumNode(),
+    }
+    nodes['x'].to(nodes['high'].receive)
+    nodes['high'].to(nodes['int_high'].receive)
+    nodes['x'].to(nodes['min_x'].receive)
+    nodes['x'].to(nodes['filter'].receive_left)
+    nodes['high'].to(nodes['filter'].receive_right)
+    nodes['int_high'].to(nodes['sum'].receive_left)
+    nodes['min_x'].to(nodes['sum'].receive_right)
+    return nodes
+
+
+def samples():
+    return [(t, math.sin(t)) for t in range(40)]
+
+
+def test_encode_decode_round_trip():
+    state = ([Interval(0, 1, Polynomial.linear(1, 2)), Interval(1, 2, Polynomial.undefined())],
+             {'a': Interval(2, 3, Polynomial.full(1, 2, 3))}, 4.5, [1.0, 2.0])
+
+    decoded = decode(encode(state))
+
+    assert decoded == state
+
+
+def test_encode_decode_keeps_provisional_flag():
+    intervals = [Interval(0, 1, Polynomial.true()).as_provisional(), Interval(1, 2, Polynomial.undefined()),
+                 Interval(2, 3, Polynomial.undefined()).as_provisional()]
+
+    decoded = decode(encode(intervals))
+
+    assert decoded == intervals
+    assert [interval.provisional for interval in decoded] == [True, False, True]
+    assert [interval.function(interval.start) for interval in decoded] == [1, None, None]
+
+
+def test_restore_resumes_without_replay():
+    reference = build_graph()
+    expected = reference['sum'].observe()
+    for time, value in samples():
+        reference['x'].receive(time, value)
+
+    first = build_graph()
+    first_output = first['sum'].observe()
+    for time, value in samples()[:20]:
+        first['x'].receive(time, value)
+    data = snapshot(first)
+    second = build_graph()
+    restore(second, data)
+    second_output = second['sum'].observe()
+    for time, value in samples()[20:]:
+        second['x'].receive(time, value)
+
+    assert first_output.intervals + second_output.intervals == expected.intervals
+
+
+def test_restore_memory():
+    memory = Memory()
+    memory.receive('x', Interval(0, 1, Polynomial.constant(1)))
+    restored = Memory()
+
+    restore({'memory': restored}, snapshot({'memory': memory}))
+
+    assert restored.get_value('x') == Interval(0, 1, Polynomial.constant(1))
+
+
+def test_restore_rejects_invalid_data():
+    with pytest.raises(Exception):
+        restore({}, b'not a checkpoint')
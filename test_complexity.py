@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from complexity import CONSTANT, LINEAR, fit_exponent, window_exponent, input_exponent, check
+from elements import WindowInterval, Integral, MinLemire
+from nodes import WindowNode, IntegralWindowNode, MinWindowNode, MaxWindowNode, MinOptimalWindowNode
+
+# Declared per-sample cost as the window grows. Min and Max over IntervalQueue and MaxLemire are not listed: they
+# fail on any input, sorted or not, before their cost can be measured. MinWindowNode and MaxWindowNode use Min2
+# and Max2, which scan and shift lists holding the whole window at every sample, so their bound is LINEAR; the
+# scan runs in C, so at these window lengths it fits an exponent around 0.4, and the test catches anything worse.
+WINDOW_BOUNDS = [
+    (IntegralWindowNode, CONSTANT),
+    (lambda length: WindowNode(WindowInterval(length), Integral()), CONSTANT),
+    (lambda length: WindowNode(WindowInterval(length), MinLemire()), CONSTANT),
+    (MinOptimalWindowNode, CONSTANT),
+    (MinWindowNode, LINEAR),
+    (MaxWindowNode, LINEAR),
+]
+
+
+# The fits time real runs (about 6 s) and are sensitive to machine load, so they only run on request.
+slow = pytest.mark.skipif(not os.environ.get('COMPLEXITY_TESTS'), reason='set COMPLEXITY_TESTS=1 to run')
+
+
+def test_fit_exponent():
+    sizes = [10, 100, 1000]
+
+    assert fit_exponent(sizes, [3, 3, 3]) == pytest.approx(0, abs=1e-9)
+    assert fit_exponent(sizes, [size * 2 for size in sizes]) == pytest.approx(1)
+    with pytest.raises(Exception):
+        check(1, CONSTANT)
+
+
+@slow
+@pytest.mark.parametrize('factory, bound', WINDOW_BOUNDS)
+def test_cost_per_sample_with_window_length(factory, bound):
+    check(window_exponent(factory), bound)
+
+
+@slow
+@pytest.mark.parametrize('factory', [factory for factory, _ in WINDOW_BOUNDS])
+def test_cost_per_sample_with_input_size(factory):
+    check(input_exponent(factory), CONSTANT)
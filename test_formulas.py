@@ -0,0 +1,101 @@
+import pytest
+
+import formulas
+from formulas import parse, instantiate, normalize, CACHE, OUTPUT
+from nodes import VariablePWLNode, VariablePWCNode, HigherThanNode, IntegralWindowNode, MultiplyByConst, FilterNode
+
+SAMPLES = [(time, 120 + 90 * ((time // 7) % 3) - 40 * ((time // 11) % 2)) for time in range(0, 60)]
+
+
+def test_formula_matches_hand_wired_graph():
+    G = VariablePWLNode()
+    above = HigherThanNode(180)
+    filtered = FilterNode()
+    window = IntegralWindowNode(10)
+    mean = MultiplyByConst(1 / 10)
+    G.to(filtered.receive_left)
+    G.to(above.receive)
+    above.to(filtered.receive_right)
+    filtered.to(window.receive)
+    window.to(mean.receive)
+    expected = mean.observe()
+
+    instance = instantiate("mult(integral(filter(G, ht(G, 180)), 10), 1/10)")
+    signal = instance.outputs[OUTPUT].observe()
+    for time, value in SAMPLES:
+        G.receive(time, value)
+        instance.inputs['G'].receive(time, value)
+
+    assert signal.intervals == expected.intervals
+    assert signal.intervals
+    assert len(instance.nodes) == 5
+
+
+def test_definitions_share_subexpressions():
+    spec = """
+        high = ht(G, 180)
+        tar = mult(integral(high, 10), 1/10)
+        mean_ar = mult(integral(filter(G, ht(G, 180)), 10), 1/10)
+        gap = sub(shift(G, -5), max(min_window(G, 10), max_window(G, 10)))
+    """
+    plan = parse(spec)
+    instance = plan.instantiate(VariablePWCNode)
+
+    assert list(instance.outputs) == ['high', 'tar', 'mean_ar', 'gap']
+    assert isinstance(instance.inputs['G'], VariablePWCNode)
+    highs = [node for node in instance.nodes if isinstance(node, HigherThanNode)]
+    assert len(highs) == 1
+    assert len(highs[0].observers) == 2
+    assert repr(instance.outputs['tar']) == "MultiplyByConst(0.1)"
+
+
+def test_cache_on_normalized_text():
+    CACHE.clear()
+    plan = parse("lt(G, 70)")
+
+    assert parse("lt( G ,70 )") is plan
+    assert parse("lt(G,70)") is plan
+    assert normalize("lt(G,\t70)") == "lt ( G , 70 )"
+    assert instantiate("lt(G, 70)").nodes[0] is not instantiate("lt(G, 70)").nodes[0]
+    assert list(CACHE) == ["lt ( G , 70 )"]
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(formulas, 'CACHE_SIZE', 2)
+    CACHE.clear()
+    first = parse("lt(G, 1)")
+    parse("lt(G, 2)")
+    assert parse("lt(G, 1)") is first
+    parse("lt(G, 3)")
+
+    assert list(CACHE) == ["lt ( G , 1 )", "lt ( G , 3 )"]
+
+
+@pytest.mark.parametrize('spec, message', [
+    ("ht(G)", "Expected ','"),
+    ("avg(G, 3)", "Unknown operator 'avg'"),
+    ("ht(G, 180) extra", "Expected ';'"),
+    ("integral(G, ten)", "Expected 'number'"),
+    ("G = ht(H, 1); G = lt(H, 1)", "Cannot redefine 'G'"),
+    ("sum(G, $)", "Unexpected character '$' at position 7"),
+    ("ht(G, 1)\nlt(G, 2)", "Multiple unnamed formulas at position 9"),
+    ("ht(G, 1); output = lt(G, 2)", "Cannot redefine 'output'"),
+    ("mult(G, 1/0)", "Division by zero at position 10"),
+])
+def test_parse_errors(spec, message):
+    with pytest.raises(Exception, match=message.replace('(', r'\(').replace('$', r'\$')):
+        parse(spec)
+
+
+def test_whitespace_other_than_new_lines_separates_tokens():
+    assert normalize("lt(G,\f70)\u00a0") == "lt ( G , 70 )"
+    assert list(parse("a = lt(G,\u00a070)\nb = ht(G,\x0b1)").outputs) == ['a', 'b']
+
+
+def test_new_lines_inside_parentheses_are_layout():
+    CACHE.clear()
+    plan = parse("a = ht(G,\n 180)\nb = mult(integral(a,\n    180),\n  1/180)")
+
+    assert list(plan.outputs) == ['a', 'b']
+    assert parse("a = ht(G, 180); b = mult(integral(a, 180), 1/180)") is plan
+    assert normalize("ht(G,\n 180)") == normalize("ht(G, 180)")
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from elements import Interval
+from frames import Panel, FrameRenderer
+from functions import Polynomial
+from notifiers import Signal, BoundedSignal
+
+
+class ListEncoder:
+
+    def __init__(self):
+        self.frames = []
+        self.closed = False
+
+    def write(self, image):
+        self.frames.append(image)
+
+    def close(self):
+        self.closed = True
+
+
+def build_renderer():
+    signal = Signal()
+    bounded = BoundedSignal(max_intervals=1)
+    panel = Panel()
+    panel.call('set_xlim', 0, 5)
+    panel.call('axhline', 2, color='red')
+    panel.plot(signal, color='black')
+    panel.plot(signal, where=lambda t, x: x > 1.5, marker='s', linestyle='')
+    panel.plot((np.array([0, 2]), np.array([1, 1])), marker='s', linestyle='')
+    panel.plot(bounded, color='blue')
+    renderer = FrameRenderer([panel, ], figsize=(2, 2), dpi=20)
+    for i in range(3):
+        signal.append(Interval(i, i + 1, Polynomial.constant(i)))
+        bounded.append(Interval(i, i + 1, Polynomial.constant(i)))
+        renderer.record()
+    return renderer, signal
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_frame_renderer_renders_every_frame_in_order(processes):
+    encoder = ListEncoder()
+
+    renderer, _ = build_renderer()
+    renderer.render(encoder, processes=processes, batch_size=2)
+
+    assert len(encoder.frames) == 3
+    assert all(frame.startswith(b'\x89PNG') for frame in encoder.frames)
+    assert encoder.closed
+
+
+def test_frame_renderer_shows_points_available_at_each_frame():
+    from frames import initialize_worker, render_frame
+    import frames
+    renderer, signal = build_renderer()
+    # Emitted after the last frame was recorded: no frame may show it, even though it starts before.
+    signal.append(Interval(3, 4, Polynomial.constant(3)))
+
+    initialize_worker(renderer, renderer.arrays())
+    render_frame(1)
+
+    lines = frames.worker[2]
+    assert list(lines[0].get_xdata()) == [0, 1, 1, 2]
+    assert list(lines[1].get_xdata()) == []
+    assert list(lines[2].get_xdata()) == [0, 2]
+    assert list(lines[3].get_xdata()) == [1, 2]
+
+    render_frame(2)
+
+    assert list(lines[0].get_xdata()) == [0, 1, 1, 2, 2, 3]
+    assert list(lines[1].get_xdata()) == [2, 3]
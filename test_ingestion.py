@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion import read_csv_chunks, read_binary_chunks, write_binary, replay, merge_join, \
+    to_time_array, from_time_array, replay_frame, replay_series
+from nodes import VariablePWLNode
+
+TIMES = np.arange(0, 50, 1.0) + np.linspace(0, 0.5, 50)
+VALUES = np.sin(TIMES)
+
+
+def test_receive_batch_matches_receive():
+    expected = VariablePWLNode()
+    expected_signal = expected.observe()
+    for time, value in zip(TIMES.tolist(), VALUES.tolist()):
+        expected.receive(time, value)
+
+    variable = VariablePWLNode()
+    signal = variable.observe()
+    variable.receive_batch(TIMES[:1], VALUES[:1])
+    variable.receive_batch(TIMES[1:1], VALUES[1:1])
+    variable.receive_batch(TIMES[1:20], VALUES[1:20])
+    variable.receive_batch(TIMES[20:], VALUES[20:])
+
+    assert signal.intervals == expected_signal.intervals
+    assert variable.get_state() == expected.get_state()
+
+
+def test_read_csv_chunks(tmp_path):
+    path = tmp_path / 'data.csv'
+    with open(path, 'w') as file:
+        file.write('time,a,b\n')
+        for i in range(10):
+            file.write(f'{i},{i * 2},{i * 3}\n')
+
+    chunks = list(read_csv_chunks(path, columns=(0, 2), chunk_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert np.concatenate(chunks).tolist() == [[i, i * 3] for i in range(10)]
+
+
+def test_replay_binary_chunks(tmp_path):
+    path = tmp_path / 'data.bin'
+    write_binary(path, np.column_stack([TIMES, VALUES, -VALUES]))
+    expected = VariablePWLNode()
+    expected_signal = expected.observe()
+    expected.receive_batch(TIMES, -VALUES)
+
+    first, second = VariablePWLNode(), VariablePWLNode()
+    second_signal = second.observe()
+    replay(read_binary_chunks(path, 3, chunk_size=7), first, second)
+
+    assert first.get_state() == (TIMES[-1], VALUES[-1])
+    assert second_signal.intervals == expected_signal.intervals
+
+
+def test_merge_join():
+    left = np.column_stack([np.arange(0, 30, 1.0), np.arange(0, 30, 1.0) * 2])
+    right = np.column_stack([np.arange(1, 40, 3.0), -np.arange(1, 40, 3.0)])
+    chunks = [left[:7], left[7:7], left[7:25], left[25:]]
+
+    joined = np.concatenate(list(merge_join(chunks, [right[:2], right[2:]])))
+
+    keys = np.arange(1, 30, 3.0)
+    assert joined.tolist() == np.column_stack([keys, keys * 2, -keys]).tolist()
+
+
+def test_merge_join_rejects_duplicate_keys():
+    left = np.array([[0, 1], [1, 2], [1, 3]], dtype=float)
+    right = np.array([[1, 5]], dtype=float)
+
+    with pytest.raises(Exception, match="strictly increasing"):
+        list(merge_join([left], [right]))
+    with pytest.raises(Exception, match="strictly increasing"):
+        list(merge_join([right], [left[:2], left[2:]]))
+
+
+def test_time_array_round_trip():
+    timestamps = pd.date_range('2022-01-01', periods=4, freq='90min', tz='Europe/Rome')
+
+    times = to_time_array(timestamps, 'h', '2021-12-31T23:00')
+
+    assert times.tolist() == [0, 1.5, 3, 4.5]
+    assert to_time_array(pd.Series(timestamps), 'h', '2021-12-31T23:00').tolist() == times.tolist()
+    assert (from_time_array(times, 'h', '2021-12-31T23:00') == timestamps.tz_convert(None).to_numpy()).all()
+    assert to_time_array([1, 2], 'h').tolist() == [1, 2]
+
+
+def test_replay_frame_and_series():
+    index = pd.date_range('2022-01-01', periods=len(TIMES), freq='h')
+    frame = pd.DataFrame({'a': VALUES, 'b': -VALUES}, index=index)
+    expected = VariablePWLNode()
+    expected_signal = expected.observe()
+    expected.receive_batch(np.arange(len(TIMES), dtype=float), -VALUES)
+
+    first, second = VariablePWLNode(), VariablePWLNode()
+    second_signal = second.observe()
+    replay_frame(frame, {'a': first, 'b': second}, origin='2022-01-01', chunk_size=7)
+    series = VariablePWLNode()
+    series_signal = series.observe()
+    replay_series(frame['b'], series, origin='2022-01-01')
+
+    assert first.get_state() == (len(TIMES) - 1, VALUES[-1])
+    assert second_signal.intervals == expected_signal.intervals
+    assert series_signal.intervals == expected_signal.intervals
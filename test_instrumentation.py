@@ -0,0 +1,130 @@
+import pytest
+
+from elements import Memory
+from instrumentation import Histogram, instrument, graph
+from nodes import VariablePWLNode, HigherThanNode, SumNode, IntegralWindowNode, MinWindowNode, ShiftNode, NaryNode
+
+
+def build():
+    variable = VariablePWLNode()
+    higher = HigherThanNode(1.5)
+    shift = ShiftNode(0.5)
+    total = SumNode()
+    window = IntegralWindowNode(2)
+    variable.to(higher.receive)
+    variable.to(shift.receive)
+    higher.to(total.receive_left)
+    shift.to(total.receive_right)
+    total.to(window.receive)
+    return variable, higher, shift, total, window
+
+
+def test_graph_order():
+    variable, higher, shift, total, window = build()
+    signal = window.observe()
+
+    nodes, edges = graph(variable)
+
+    assert nodes == [variable, higher, shift, total, window]
+    assert len(edges) == 6
+
+
+def test_graph_through_memory_and_lambdas():
+    memory = Memory()
+    higher, shift, nary = HigherThanNode(1.5), ShiftNode(0.5), NaryNode(min)
+    window = IntegralWindowNode(2)
+    memory.add_unary_node('x', 'high', higher)
+    memory.add_unary_node('x', 'shifted', shift)
+    memory.add_nary_node(['high', 'shifted'], 'both', nary)
+    nary.to(lambda interval: window.receive(interval))
+    variable = VariablePWLNode()
+    variable.to(lambda interval: memory.receive('x', interval))
+
+    nodes, edges = graph(variable)
+
+    assert nodes == [variable, higher, shift, nary, window]
+    assert graph(memory)[0] == [higher, shift, nary, window]
+
+
+def test_instrumentation_counts():
+    variable, higher, shift, total, window = build()
+    signal = window.observe()
+    instrumentation = instrument(variable)
+
+    for time, value in [(0, 0), (1, 2), (2, 1), (3, 3), (4, 0)]:
+        variable.receive(time, value)
+
+    stats = instrumentation.stats
+    assert stats[id(variable)].received == 5
+    assert stats[id(variable)].emitted == 4
+    assert stats[id(higher)].received == 4
+    assert stats[id(total)].received == stats[id(higher)].emitted + stats[id(shift)].emitted
+    assert stats[id(window)].emitted == len(signal.intervals)
+    assert stats[id(total)].durations.count == stats[id(total)].received
+    assert total.state_size() == len(total.left) + len(total.right)
+    report = instrumentation.report()
+    assert "#4 IntegralWindowNode(2): received" in report
+    assert "#3.receive_left" in report
+    assert "-> Signal" in report
+
+
+def test_instrumentation_counts_batches():
+    variable, higher, shift, total, window = build()
+    instrumentation = instrument(variable)
+
+    variable.receive_batch([0, 1, 2, 3, 4], [0, 2, 1, 3, 0])
+
+    stats = instrumentation.stats
+    assert stats[id(variable)].received == 1
+    assert stats[id(variable)].emitted == 4
+    assert stats[id(higher)].received == 4
+
+
+def test_detach_restores_the_graph():
+    variable, higher, shift, total, window = build()
+    observers = list(variable.observers)
+    instrumentation = instrument(variable)
+
+    instrumentation.detach()
+
+    assert variable.observers == observers
+    assert 'receive' not in variable.__dict__ and 'notify' not in total.__dict__
+
+
+def test_detach_keeps_wrappers_installed_later():
+    variable, higher, shift, total, window = build()
+    instrumentation = instrument(variable)
+    later_receive = lambda time, value: None
+    variable.receive = later_receive
+    total.receive_left = 'set by another tool'
+
+    instrumentation.detach()
+
+    assert variable.receive is later_receive
+    assert total.receive_left == 'set by another tool'
+    assert 'notify' not in variable.__dict__ and 'receive' not in higher.__dict__
+
+
+def test_state_size_of_window_nodes():
+    variable = VariablePWLNode()
+    minimum = MinWindowNode(3)
+    variable.to(minimum.receive)
+
+    for time in range(6):
+        variable.receive(time, time % 3)
+
+    assert minimum.state_size() == len(minimum.window.intervals) + len(minimum.window_operator.times)
+    assert repr(minimum) == "MinWindowNode(3)"
+
+
+def test_histogram():
+    histogram = Histogram([1, 10, 100])
+
+    for value in [0.5, 2, 3, 50, 500]:
+        histogram.observe(value)
+
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.cumulative()[-1] == (float('inf'), 5)
+    assert histogram.quantile(0.5) == 10
+    assert histogram.quantile(1) == 500
+    assert histogram.mean() == pytest.approx(111.1)
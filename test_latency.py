@@ -0,0 +1,93 @@
+from instrumentation import instrument
+from latency import LatencyTracer
+from nodes import VariablePWLNode, IntegralWindowNode, HigherThanNode, MinNode
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_window_node_stream_delay_is_the_window_length():
+    tracer = LatencyTracer()
+    variable = VariablePWLNode()
+    window = IntegralWindowNode(3)
+    variable.to(window.receive)
+    tracer.trace_input(variable)
+    latency = tracer.trace_output(window)
+
+    for time in range(8):
+        variable.receive(time, time % 2)
+
+    assert latency.stream.count == 4
+    assert latency.stream.sum == 4 * 3
+    assert latency.processing.count == 4
+
+
+def test_processing_latency_from_arrival_through_merges():
+    clock = FakeClock()
+    tracer = LatencyTracer(clock=clock)
+    left, right = VariablePWLNode(), VariablePWLNode()
+    higher = HigherThanNode(0.5)
+    minimum = MinNode()
+    left.to(higher.receive)
+    higher.to(minimum.receive_left)
+    right.to(minimum.receive_right)
+    tracer.trace_input(left)
+    tracer.trace_input(right)
+    latency = tracer.trace_output(minimum)
+
+    left.receive(0, 0)
+    right.receive(0, 1)
+    left.receive(1, 1, arrival=-2)
+    clock.now = 10
+    right.receive(1, 1, arrival=4)
+
+    # The first verdict needs the left sample that arrived at -2, although the right one emitted it.
+    assert latency.processing.count == 2
+    assert latency.processing.max == 12
+    assert latency.stream.max == 0.5
+    assert 'MinNode(): 2 verdicts' in tracer.report()
+
+    tracer.detach()
+
+    assert higher.observers == [minimum.receive_left]
+    assert 'notify' not in minimum.__dict__
+
+
+def test_detach():
+    tracer = LatencyTracer()
+    variable = VariablePWLNode()
+    latency = tracer.trace_output(tracer.trace_input(variable))
+
+    tracer.detach()
+    variable.receive(0, 0)
+    variable.receive(1, 0)
+
+    assert 'receive' not in variable.__dict__
+    assert variable.observers == []
+    assert latency.processing.count == 0
+
+
+def test_detach_stacked_with_instrumentation():
+    tracer = LatencyTracer()
+    variable = VariablePWLNode()
+    instrumentation = instrument(variable)
+    timed_receive = variable.receive
+    tracer.trace_input(variable)
+
+    tracer.detach()
+
+    assert variable.receive is timed_receive
+    variable.receive(0, 0)
+    assert instrumentation.stats[id(variable)].received == 1
+
+    tracer.trace_input(variable)
+    traced_receive = variable.receive
+    instrumentation.detach()
+
+    assert variable.receive is traced_receive
@@ -0,0 +1,85 @@
+from instrumentation import instrument
+from memory_accounting import account, retained, report, MemoryWatchdog
+from nodes import VariablePWLNode, SumNode, IntegralWindowNode
+
+
+def build():
+    left, right = VariablePWLNode(), VariablePWLNode()
+    total = SumNode()
+    window = IntegralWindowNode(1000)
+    left.to(total.receive_left)
+    right.to(total.receive_right)
+    total.to(window.receive)
+    return left, right, total, window
+
+
+def test_account_attributes_buffers():
+    left, right, total, window = build()
+    signal = window.observe()
+    empty = retained(total).bytes
+
+    for time in range(200):
+        left.receive(time, time)
+
+    usages = account(left, right)
+    assert [usage.owner for usage in usages] == [left, right, total, window, signal]
+    usage = usages[2]
+    assert usage.bytes > empty + 100 * 199
+    assert usage.objects > 199
+    # The buffered intervals are charged to the sum node only, not to the nodes around it.
+    assert usages[0].bytes < empty + 1000
+    assert usages[3].bytes < empty + 1000
+    assert "SumNode(): " in report(usages)
+
+
+def test_signal_is_accounted_separately():
+    left, right, total, window = build()
+    signal = total.observe()
+
+    for time in range(200):
+        left.receive(time, time)
+        right.receive(time, time)
+
+    assert len(signal.intervals) == 199
+    assert retained(signal).objects > len(signal.intervals)
+    assert retained(total).bytes < retained(signal).bytes
+    assert signal in [usage.owner for usage in account(left)]
+
+
+def test_watchdog_fires_once_per_crossing():
+    left, right, total, window = build()
+    alerts = []
+    watchdog = MemoryWatchdog(alerts.append, left, right, budgets={total: 20000})
+    watchdog.watch(left, every=10)
+
+    for time in range(300):
+        left.receive(time, time)
+
+    assert [usage.owner for usage in alerts] == [total]
+    assert alerts[0].bytes > 20000
+
+    for time in range(300):
+        right.receive(time, time)
+    watchdog.check()
+    for time in range(300, 600):
+        left.receive(time, time)
+
+    assert [usage.owner for usage in alerts] == [total, total]
+    watchdog.detach()
+    assert 'receive' not in left.__dict__
+
+
+def test_watchdog_detach_restores_what_it_replaced():
+    left, right, total, window = build()
+    user_receive = lambda time, value: VariablePWLNode.receive(left, time, value)
+    left.receive = user_receive
+    instrumentation = instrument(left)
+    timed_receive = left.receive
+    watchdog = MemoryWatchdog(lambda usage: None, left)
+    watchdog.watch(left, every=10)
+
+    watchdog.detach()
+
+    assert left.receive is timed_receive
+    instrumentation.detach()
+    assert left.receive is user_receive
@@ -0,0 +1,104 @@
+import asyncio
+import urllib.request
+
+from instrumentation import instrument
+from latency import LatencyTracer
+from metrics import MetricsRegistry, MetricsServer, serve_async, start_from_environment, PORT_VARIABLE, format_value
+from nodes import VariablePWLNode, SumNode, IntegralWindowNode
+
+
+def build():
+    left, right = VariablePWLNode(), VariablePWLNode()
+    total = SumNode()
+    window = IntegralWindowNode(2)
+    left.to(total.receive_left)
+    right.to(total.receive_right)
+    total.to(window.receive)
+    return left, right, total, window
+
+
+def test_format_value():
+    assert format_value(float('nan')) == 'NaN'
+    assert format_value(float('inf')) == '+Inf'
+    assert format_value(float('-inf')) == '-Inf'
+    assert format_value(0.5) == '0.5'
+    assert format_value(3) == '3'
+
+
+def test_exposition():
+    left, right, total, window = build()
+    registry = MetricsRegistry()
+    registry.name(total, 'sum')
+    registry.add_nodes(left, right)
+    registry.add_instrumentation(instrument(left, right))
+    tracer = LatencyTracer()
+    tracer.trace_input(left)
+    registry.add_latency(tracer)
+    tracer.trace_output(window)
+
+    for time in range(5):
+        left.receive(time, time)
+    right.receive(0, 1)
+
+    text = registry.exposition()
+    assert '# TYPE gemon_node_state_size gauge' in text
+    assert 'gemon_node_state_size{node="sum",type="SumNode"} 4' in text
+    assert 'gemon_node_received_total{node="0:VariablePWLNode()",type="VariablePWLNode"} 5' in text
+    assert 'gemon_node_call_seconds_bucket{node="sum",type="SumNode",le="+Inf"} 4' in text
+    assert 'gemon_verdict_processing_seconds_count{node="2:IntegralWindowNode(2)",type="IntegralWindowNode"} 0' in text
+
+
+def test_http_server():
+    left, right, total, window = build()
+    registry = MetricsRegistry()
+    registry.add_nodes(left, right)
+    server = MetricsServer(registry).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            body = response.read().decode()
+            content_type = response.headers['Content-Type']
+    finally:
+        server.stop()
+
+    assert content_type.startswith('text/plain; version=0.0.4')
+    assert body == registry.exposition()
+
+
+def test_async_server():
+    registry = MetricsRegistry()
+    registry.add_nodes(VariablePWLNode())
+
+    async def scrape():
+        server = await serve_async(registry)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response.decode()
+
+    response = asyncio.run(scrape())
+
+    assert response.startswith('HTTP/1.1 200 OK')
+    assert response.endswith(registry.exposition())
+
+
+def test_start_from_environment(monkeypatch):
+    monkeypatch.delenv(PORT_VARIABLE, raising=False)
+    assert start_from_environment(MetricsRegistry()) is None
+
+    monkeypatch.setenv(PORT_VARIABLE, '0')
+    server = start_from_environment(MetricsRegistry())
+    assert server.port > 0
+    server.stop()
+
+
+def test_label_escaping():
+    registry = MetricsRegistry()
+    node = VariablePWLNode()
+    registry.name(node, 'glucose "raw"\\mg')
+    registry.add_nodes(node)
+
+    assert 'node="glucose \\"raw\\"\\\\mg"' in registry.exposition()
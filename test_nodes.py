@@ -1,6 +1,10 @@
+import pytest
+
 from elements import Interval, MinMonotonicEdge
 from functions import Polynomial
-from nodes import MinOptimalWindowNode, MinOptimalWindowNode2
+from nodes import MinOptimalWindowNode, MinOptimalWindowNode2, ReorderNode, VariablePWLNode, VariablePWCNode, \
+    HigherThanNode, MinNode, MinWindowNode, LowerThanNode, IntegralWindowNode, EarlyMinBelowNode, EarlyMaxAboveNode, \
+    EarlyIntegralAboveNode, SumNode, NaryNode, MaxWindowNode, UNDEFINED, heartbeat_all
 
 
 def test_receive():
@@ -85,4 +89,325 @@ def test_monotonic_edge_add2():
 #
 #     removed_interval = me.remove(3)
 #
-#     assert  removed_interval == [Interval(0,1,Polynomial.constant(0)),]
\ No newline at end of file
+#     assert  removed_interval == [Interval(0,1,Polynomial.constant(0)),]
+
+def test_reorder_node_releases_samples_in_order():
+    released = []
+    node = ReorderNode(2)
+    node.to(lambda time, value: released.append((time, value)))
+
+    for time in [0, 2, 1, 3, 5, 4, 6]:
+        node.receive(time, time * 10)
+
+    assert released == [(0, 0), (1, 10), (2, 20), (3, 30), (4, 40)]
+
+
+def test_reorder_node_flush():
+    released = []
+    node = ReorderNode(2)
+    node.to(lambda time, value: released.append(time))
+    node.receive(1, 0)
+    node.receive(0, 0)
+
+    node.flush()
+
+    assert released == [0, 1]
+
+
+def test_reorder_node_watermark():
+    released = []
+    node = ReorderNode(2)
+    node.to(lambda time, value: released.append(time))
+    node.receive(1, 0)
+    node.receive(0, 0)
+
+    node.watermark(2.5)
+
+    assert released == [0]
+    node.watermark(5)
+    assert released == [0, 1]
+
+
+def test_reorder_node_drops_late_samples():
+    released = []
+    node = ReorderNode(1)
+    node.to(lambda time, value: released.append(time))
+
+    for time in [0, 1, 2, 3, 0.5, 3]:
+        node.receive(time, 0)
+    node.flush()
+
+    assert released == [0, 1, 2, 3]
+    assert node.dropped == 2
+
+
+def test_reorder_node_raises_on_late_samples():
+    node = ReorderNode(1, late_policy=ReorderNode.RAISE)
+    node.receive(0, 0)
+    node.receive(2, 0)
+    node.receive(3, 0)
+
+    with pytest.raises(Exception):
+        node.receive(1, 0)
+
+
+def test_reorder_node_feeds_variable_node():
+    vout = []
+    reorder = ReorderNode(1)
+    variable = VariablePWLNode()
+    reorder.to(variable.receive)
+    variable.to(vout.append)
+
+    for time, value in [(0, 0), (2, 2), (1, 1), (3, 3)]:
+        reorder.receive(time, value)
+    reorder.flush()
+
+    assert vout == [Interval(0, 1, Polynomial.linear(1, 0)), Interval(1, 2, Polynomial.linear(1, 0)),
+                    Interval(2, 3, Polynomial.linear(1, 0))]
+
+
+@pytest.mark.parametrize('node_class', [VariablePWLNode, VariablePWCNode])
+def test_variable_node_receive_batch_matches_receive(node_class):
+    samples = [(0, 1), (1, 3), (2, 2), (6, 5), (7, 4), (12, 0), (13, 1)]
+    expected, batched = [], []
+    node = node_class(max_gap=3)
+    node.to(expected.append)
+    for time, value in samples:
+        node.receive(time, value)
+    batch_node = node_class(max_gap=3)
+    batch_node.to(batched.append)
+    times, values = zip(*samples)
+
+    batch_node.receive_batch(times[:3], values[:3])
+    batch_node.receive_batch(times[3:], values[3:])
+
+    assert batched == expected
+    assert batch_node.get_state() == node.get_state()
+
+
+def test_variable_node_gap_is_undefined():
+    vout = []
+    variable = VariablePWCNode(max_gap=3)
+    variable.to(vout.append)
+
+    variable.receive_batch([0, 1, 5, 6], [1, 2, 3, 4])
+
+    assert vout == [Interval(0, 1, Polynomial.constant(1)), Interval(1, 5, Polynomial.undefined()),
+                    Interval(5, 6, Polynomial.constant(3))]
+
+
+def test_gap_passes_through_threshold_and_min():
+    vout = []
+    left = VariablePWLNode(max_gap=3)
+    right = VariablePWLNode()
+    higher = HigherThanNode(1)
+    minimum = MinNode()
+    left.to(higher.receive)
+    higher.to(minimum.receive_left)
+    right.to(minimum.receive_right)
+    minimum.to(vout.append)
+
+    left.receive_batch([0, 1, 5, 6], [0, 2, 2, 2])
+    right.receive_batch([0, 6], [1, 1])
+
+    assert [interval.is_undefined() for interval in vout if interval.start >= 1] == [True, False]
+
+
+EARLY_SAMPLES = [(0, 5), (1, 4), (2, 6), (3, 1), (4, 5), (5, 6), (6, 7), (7, 5), (8, 0), (9, 4), (10, 6), (11, 5),
+                 (12, 6), (13, 5), (14, 7), (15, 6)]
+
+
+def run_early(node, samples=EARLY_SAMPLES):
+    exact, provisional = [], []
+    variable = VariablePWLNode()
+    variable.to(node.receive)
+    node.to(exact.append)
+    node.provisional.to(provisional.append)
+    for time, value in samples:
+        variable.receive(time, value)
+    return exact, provisional
+
+
+def value_at(intervals, time):
+    return next(interval.function(time) for interval in intervals if interval.start < time < interval.end)
+
+
+def test_early_min_below_matches_window_and_anticipates():
+    expected = []
+    variable = VariablePWLNode()
+    window = MinWindowNode(3)
+    lower = LowerThanNode(2)
+    variable.to(window.receive)
+    window.to(lower.receive)
+    lower.to(expected.append)
+    for time, value in EARLY_SAMPLES:
+        variable.receive(time, value)
+
+    exact, provisional = run_early(EarlyMinBelowNode(3, 2))
+
+    assert exact[-1].end == expected[-1].end == 12
+    for time in [0.1 * i + 0.03 for i in range(120)]:
+        assert value_at(exact, time) == value_at(expected, time)
+    assert not any(interval.provisional for interval in exact)
+    assert all(interval.provisional and interval.function == Polynomial.true() for interval in provisional)
+    # The sample below 2 at time 3 settles every window starting up to 3 as soon as it is received, while the
+    # exact output only reaches 3 once the sample at 6 is received.
+    assert (provisional[0].start, provisional[0].end) == (0, 3)
+
+
+def test_early_max_above_mirrors_min_below():
+    negated = [(time, -value) for time, value in EARLY_SAMPLES]
+
+    exact, provisional = run_early(EarlyMaxAboveNode(3, 5.5))
+    mirrored, mirrored_provisional = run_early(EarlyMinBelowNode(3, -5.5), negated)
+
+    assert exact == mirrored
+    assert provisional == mirrored_provisional
+
+
+def test_early_integral_above_matches_window_and_anticipates():
+    expected = []
+    variable = VariablePWLNode()
+    window = IntegralWindowNode(4)
+    higher = HigherThanNode(18)
+    variable.to(window.receive)
+    window.to(higher.receive)
+    higher.to(expected.append)
+    for time, value in EARLY_SAMPLES:
+        variable.receive(time, value)
+
+    node = EarlyIntegralAboveNode(4, 18)
+    exact, provisional = run_early(node)
+
+    assert exact == expected
+    assert provisional
+    for interval in provisional:
+        for time in [interval.start + (interval.end - interval.start) * i / 4 for i in range(1, 4)]:
+            if time < exact[-1].end:
+                assert value_at(exact, time) == 1
+    # At time 14 the integral over [10, 14] is already 22.5: the window [10, 14] can no longer go under 18.
+    assert any(interval.start <= 10 <= interval.end for interval in provisional if interval.end <= 14)
+    assert node.state_size() <= 2 * 4 + 2
+
+
+def test_heartbeat_moves_windows_through_outage():
+    vout = []
+    variable = VariablePWLNode()
+    window = IntegralWindowNode(2)
+    variable.to(window.receive)
+    window.to(vout.append)
+
+    for time in range(4):
+        variable.receive(time, 1)
+    variable.heartbeat(6, fill=UNDEFINED)
+    variable.heartbeat(8, fill=UNDEFINED)
+
+    # Without the heartbeats the window would stop at 1; with them it reaches 6, the outage counting as zero as
+    # any undefined input does in the integral.
+    assert vout[-1].end == 6
+    assert vout[0] == Interval(0, 1, Polynomial.constant(2))
+    assert [interval.function(interval.end) for interval in vout] == [2, 1, 0, 0, 0]
+
+    for time in range(9, 14):
+        variable.receive(time, 1)
+
+    assert [interval.function for interval in vout if interval.start >= 9] == [Polynomial.constant(2)] * 2
+
+
+@pytest.mark.parametrize('window_class', [MinWindowNode, MaxWindowNode])
+def test_default_heartbeat_through_min_max_windows(window_class):
+    vout = []
+    variable = VariablePWCNode()
+    window = window_class(2)
+    variable.to(window.receive)
+    window.to(vout.append)
+
+    for time in range(4):
+        variable.receive(time, time)
+    variable.heartbeat(6)
+    variable.heartbeat(8)
+    variable.receive(9, 0)
+
+    # The heartbeats hold the last value, so the windows move through the outage and the held value is kept up to
+    # the next sample.
+    assert vout[-1].end == 7
+    assert vout[-1].function(vout[-1].end) == 3
+    assert not any(interval.is_undefined() for interval in vout)
+
+
+@pytest.mark.parametrize('window_class', [MinWindowNode, MaxWindowNode])
+def test_undefined_heartbeat_rejected_by_min_max_windows(window_class):
+    variable = VariablePWCNode()
+    variable.to(window_class(2).receive)
+    variable.receive(0, 1)
+
+    with pytest.raises(Exception, match='does not accept undefined input'):
+        variable.heartbeat(6, fill=UNDEFINED)
+
+
+def test_heartbeat_all_advances_binary_nodes():
+    vout = []
+    left, right = VariablePWLNode(), VariablePWLNode()
+    total = SumNode()
+    left.to(total.receive_left)
+    right.to(total.receive_right)
+    total.to(vout.append)
+    left.receive(0, 1)
+    right.receive(0, 2)
+    left.receive(1, 1)
+
+    heartbeat_all(5, left, right)
+
+    assert vout == [Interval(0, 1, Polynomial.linear(0, 3)), Interval(1, 5, Polynomial.constant(3))]
+    assert total.state_size() == 0
+
+
+def test_nary_node_aligns_starts():
+    vout = []
+    node = NaryNode(lambda intervals: Interval(intervals[0].start, intervals[0].end,
+                                               intervals[0].function + intervals[1].function))
+    node.add_receiver('a')
+    node.add_receiver('b')
+    node.to(vout.append)
+
+    node.receive('a', Interval(0, 2, Polynomial.constant(1)))
+    node.receive('b', Interval(1, 3, Polynomial.constant(2)))
+
+    assert vout == [Interval(0, 1, Polynomial.undefined()), Interval(1, 2, Polynomial.constant(3))]
+
+
+def test_early_verdicts_with_gaps():
+    samples = [(0, 5), (1, 1), (5, 5), (6, 2), (7, 5), (8, 6), (12, 6), (13, 5), (14, 6), (15, 7), (16, 6)]
+
+    def run_with_gaps(node):
+        exact, provisional = [], []
+        variable = VariablePWLNode(max_gap=2)
+        variable.to(node.receive)
+        node.to(exact.append)
+        node.provisional.to(provisional.append)
+        for time, value in samples:
+            variable.receive(time, value)
+        return exact, provisional
+
+    # Undefined input is no witness: the windows inside the gaps are false, not undefined.
+    exact, provisional = run_with_gaps(EarlyMinBelowNode(2, 3))
+    assert not any(interval.is_undefined() for interval in exact)
+    assert value_at(exact, 0.5) == 1 and value_at(exact, 2) == 0 and value_at(exact, 5.5) == 1
+    assert value_at(exact, 9) == 0
+    assert all(value_at(exact, (2 * interval.start + interval.end) / 3) == 1 for interval in provisional)
+
+    # The early integral agrees with IntegralWindowNode, which counts undefined input as zero.
+    expected = []
+    variable = VariablePWLNode(max_gap=2)
+    window = IntegralWindowNode(3)
+    higher = HigherThanNode(8)
+    variable.to(window.receive)
+    window.to(higher.receive)
+    higher.to(expected.append)
+    for time, value in samples:
+        variable.receive(time, value)
+
+    exact, provisional = run_with_gaps(EarlyIntegralAboveNode(3, 8))
+    assert exact == expected
+    assert all(value_at(exact, (2 * interval.start + interval.end) / 3) == 1 for interval in provisional
+               if interval.end < exact[-1].end)
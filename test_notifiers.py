@@ -0,0 +1,192 @@
+import numpy as np
+import pytest
+
+from elements import Interval
+from functions import Polynomial
+from notifiers import Signal, BoundedSignal, IntervalNotifier, EdgeDetector
+
+
+def test_signal_get_points_with_linear_intervals():
+    signal = Signal()
+    signal.append(Interval(0, 1, Polynomial.linear(1, 0)))
+    signal.append(Interval(1, 2, Polynomial.constant(1)))
+
+    t, x = signal.get_points()
+
+    assert t.tolist() == [0, 1, 1, 2]
+    assert x.tolist() == [0, 1, 1, 1]
+
+
+def test_signal_get_points_with_quadratic_interval():
+    signal = Signal()
+    signal.append(Interval(0, 1, Polynomial.full(1, 0, 0)))
+
+    t, x = signal.get_points()
+
+    assert len(t) == Signal.QUADRATIC_POINTS
+    assert np.allclose(x, t * t)
+
+
+def test_signal_get_points_with_undefined_interval():
+    signal = Signal()
+    signal.append(Interval(0, 1, Polynomial.undefined()))
+
+    t, x = signal.get_points()
+
+    assert t.tolist() == [0, 1]
+    assert np.isnan(x).all()
+
+
+def test_signal_grows_buffers():
+    signal = Signal()
+    for i in range(100):
+        signal.append(Interval(i, i + 1, Polynomial.constant(i)))
+
+    t, x = signal.get_points()
+
+    assert len(t) == 200
+    assert t[-1] == 100
+    assert x[-1] == 99
+    assert signal.get_arrays()[0].tolist() == list(range(100))
+
+
+def test_bounded_signal_with_max_intervals():
+    signal = BoundedSignal(max_intervals=3)
+    for i in range(10):
+        signal.append(Interval(i, i + 1, Polynomial.constant(i)))
+
+    start, end, a, b, c, defined = signal.get_arrays()
+
+    assert start.tolist() == [7, 8, 9]
+    assert c.tolist() == [7, 8, 9]
+    assert signal.intervals == [Interval(7, 8, Polynomial.constant(7)), Interval(8, 9, Polynomial.constant(8)),
+                                Interval(9, 10, Polynomial.constant(9))]
+
+
+def test_bounded_signal_rejects_empty_capacity():
+    with pytest.raises(Exception, match="max_intervals must be at least 1"):
+        BoundedSignal(max_intervals=0)
+
+
+def test_bounded_signal_grows_lazily_up_to_max_intervals():
+    signal = BoundedSignal(max_intervals=100)
+    assert signal.records.shape[1] == 2 * BoundedSignal.INITIAL_CAPACITY
+
+    for i in range(150):
+        interval = Interval(i, i + 1, Polynomial.constant(i))
+        signal.append(interval.as_provisional() if i % 2 else interval)
+
+    assert signal.capacity == 100
+    assert [interval.start for interval in signal.intervals] == list(range(50, 150))
+    assert [interval.provisional for interval in signal.intervals[:3]] == [False, True, False]
+
+
+def test_bounded_signal_with_horizon():
+    signal = BoundedSignal(horizon=10)
+    for i in range(200):
+        signal.append(Interval(i, i + 1, Polynomial.linear(1, 0)))
+
+    t, x = signal.get_points()
+
+    assert signal.get_arrays()[0].tolist() == list(range(190, 200))
+    assert t[0] == 190 and t[-1] == 200
+    assert np.allclose(x, t)
+
+
+def test_bounded_signal_get_points_with_quadratic_and_undefined_intervals():
+    signal = BoundedSignal(max_intervals=2)
+    signal.append(Interval(0, 1, Polynomial.full(1, 0, 0)))
+    signal.append(Interval(1, 2, Polynomial.undefined()))
+
+    t, x = signal.get_points()
+
+    assert len(t) == Signal.QUADRATIC_POINTS + 2
+    assert np.allclose(x[:-2], t[:-2] * t[:-2])
+    assert np.isnan(x[-2:]).all()
+
+
+def test_observe_with_retention():
+    notifier = IntervalNotifier()
+    signal = notifier.observe(max_intervals=1)
+
+    notifier.notify(Interval(0, 1, Polynomial.constant(0)))
+    notifier.notify(Interval(1, 2, Polynomial.constant(1)))
+
+    assert signal.intervals == [Interval(1, 2, Polynomial.constant(1))]
+
+
+def build_signal():
+    signal = Signal()
+    signal.append(Interval(0, 1, Polynomial.linear(1, 0)))
+    signal.append(Interval(1, 2, Polynomial.undefined()))
+    signal.append(Interval(2, 4, Polynomial.constant(3)))
+    return signal
+
+
+def test_signal_at():
+    signal = build_signal()
+
+    assert signal.at(0.5) == Interval(0, 1, Polynomial.linear(1, 0))
+    assert signal.at(3) == Interval(2, 4, Polynomial.constant(3))
+    assert signal.at(5) is None
+    assert signal.at(-1) is None
+
+
+def test_signal_value_at():
+    signal = build_signal()
+
+    assert signal.value_at(0.5) == 0.5
+    assert signal.value_at(1.5) is None
+    assert signal.value_at(4) == 3
+
+
+def test_signal_between():
+    signal = build_signal()
+
+    assert signal.between(0.5, 1.5) == [Interval(0, 1, Polynomial.linear(1, 0)), Interval(1, 2, Polynomial.undefined())]
+    assert signal.between(2.5, 10) == [Interval(2, 4, Polynomial.constant(3))]
+    assert signal.between(5, 10) == []
+
+
+def test_signal_values_at():
+    signal = build_signal()
+
+    values = signal.values_at([-1, 0.25, 1.5, 3, 5])
+
+    assert np.allclose(values, [np.nan, 0.25, np.nan, 3, np.nan], equal_nan=True)
+    assert np.isnan(Signal().values_at([0])).all()
+
+
+def test_signal_to_dataframe():
+    signal = Signal()
+    signal.append(Interval(0, 1.5, Polynomial.linear(1, 0)))
+    signal.append(Interval(1.5, 2, Polynomial.undefined()))
+
+    frame = signal.to_dataframe()
+    timestamps = signal.to_dataframe(unit='h', origin='2022-01-01')
+
+    assert frame['end'].tolist() == [1.5, 2]
+    assert frame['b'].tolist() == [1, 0]
+    assert frame['defined'].tolist() == [True, False]
+    assert timestamps['end'].tolist() == [np.datetime64('2022-01-01T01:30'), np.datetime64('2022-01-01T02:00')]
+
+
+def test_edge_detector():
+    source = IntervalNotifier()
+    events = []
+    edges = source.edges()
+    edges.to(lambda time, value: events.append((time, value)))
+
+    for start, end, value in [(0, 1, 0), (1, 2, 0), (2, 3, 1), (3, 4, 1), (4, 5, 1), (5, 6, 0)]:
+        source.notify(Interval(start, end, Polynomial.constant(value)))
+    source.notify(Interval(6, 7, Polynomial.undefined()))
+    source.notify(Interval(7, 8, Polynomial.undefined()))
+    source.notify(Interval(8, 9, Polynomial.constant(0)))
+
+    assert events == [(0, 0), (2, 1), (5, 0), (6, None), (8, 0)]
+
+    restored = EdgeDetector()
+    restored.set_state(edges.get_state())
+    restored.to(lambda time, value: events.append((time, value)))
+    restored.receive(Interval(9, 10, Polynomial.constant(0)))
+    assert len(events) == 5
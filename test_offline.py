@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from elements import Interval
+from functions import Polynomial
+from nodes import VariablePWLNode, HigherThanNode, LowerThanNode, IntegralWindowNode, MinWindowNode, \
+    MaxWindowNode, FilterNode, MinNode, SumNode, ShiftNode, MultiplyByConst
+from offline import PiecewiseSignal, OfflineOperators, SparseTable
+
+TIMES = np.arange(0, 60, 1.0)
+VALUES = np.sin(TIMES * 0.7) * 3 + np.cos(TIMES * 0.13)
+PROBE = np.linspace(-1, 61, 4001)
+
+
+def evaluate_online(*nodes):
+    variable = VariablePWLNode()
+    previous = variable
+    for node in nodes:
+        previous.to(node.receive)
+        previous = node
+    signal = previous.observe()
+    for time, value in zip(TIMES.tolist(), VALUES.tolist()):
+        variable.receive(time, value)
+    return PiecewiseSignal.from_intervals(signal.intervals)
+
+
+def evaluate_online_binary(node, *right_nodes):
+    variable = VariablePWLNode()
+    variable.to(node.receive_left)
+    previous = variable
+    for right_node in right_nodes:
+        previous.to(right_node.receive)
+        previous = right_node
+    previous.to(node.receive_right)
+    signal = node.observe()
+    for time, value in zip(TIMES.tolist(), VALUES.tolist()):
+        variable.receive(time, value)
+    return PiecewiseSignal.from_intervals(signal.intervals)
+
+
+def assert_same_signal(online, offline):
+    assert np.allclose(online(PROBE), offline(PROBE), equal_nan=True, atol=1e-6)
+
+
+SIGNAL = PiecewiseSignal.from_samples(TIMES, VALUES)
+
+
+@pytest.mark.parametrize('nodes, offline', [
+    ((HigherThanNode(0.5),), OfflineOperators.higher_than(SIGNAL, 0.5)),
+    ((LowerThanNode(0.5),), OfflineOperators.lower_than(SIGNAL, 0.5)),
+    ((IntegralWindowNode(7.3),), OfflineOperators.integral(SIGNAL, 7.3)),
+    ((MinWindowNode(5.5),), OfflineOperators.min_window(SIGNAL, 5.5)),
+    ((MaxWindowNode(5.5),), OfflineOperators.max_window(SIGNAL, 5.5)),
+    ((ShiftNode(2.5),), OfflineOperators.shift(SIGNAL, 2.5)),
+    ((MultiplyByConst(3),), OfflineOperators.mult_const(SIGNAL, 3)),
+    ((HigherThanNode(0.5), IntegralWindowNode(7)),
+     OfflineOperators.integral(OfflineOperators.higher_than(SIGNAL, 0.5), 7)),
+])
+def test_offline_unary_matches_online(nodes, offline):
+    assert_same_signal(evaluate_online(*nodes), offline)
+
+
+@pytest.mark.parametrize('node, right_nodes, offline', [
+    (FilterNode(), (HigherThanNode(0.5),), OfflineOperators.filter(SIGNAL, OfflineOperators.higher_than(SIGNAL, 0.5))),
+    (MinNode(), (ShiftNode(0.5),), OfflineOperators.min(SIGNAL, OfflineOperators.shift(SIGNAL, 0.5))),
+    (SumNode(), (IntegralWindowNode(3),), OfflineOperators.add(SIGNAL, OfflineOperators.integral(SIGNAL, 3))),
+])
+def test_offline_binary_matches_online(node, right_nodes, offline):
+    assert_same_signal(evaluate_online_binary(node, *right_nodes), offline)
+
+
+def test_offline_max_window():
+    maximum = OfflineOperators.max_window(SIGNAL, 4)
+
+    times = np.linspace(0, 55, 500)
+    expected = [np.max(SIGNAL(np.append(np.linspace(t, t + 4, 201), TIMES[(TIMES > t) & (TIMES < t + 4)])))
+                for t in times]
+    assert np.allclose(maximum(times), expected)
+
+
+def test_piecewise_signal_intervals_round_trip():
+    intervals = [Interval(0, 1, Polynomial.linear(1, 0)), Interval(1, 2, Polynomial.undefined())]
+
+    signal = PiecewiseSignal.from_intervals(intervals)
+
+    assert signal.to_intervals() == intervals
+    assert np.allclose(signal([0.5, 1.5, 3]), [0.5, np.nan, np.nan], equal_nan=True)
+
+
+def test_sparse_table_query():
+    values = np.array([5, 3, 8, 1, 9, 2, 7])
+    table = SparseTable(values)
+
+    minimum = table.query([0, 2, 4, 3], [2, 7, 5, 3])
+
+    assert minimum.tolist() == [3, 1, 9, np.inf]
+
+
+def test_offline_matches_online_with_gaps():
+    # Undefined gaps count as zero in both integrals, so the two engines agree on the whole output.
+    times = np.concatenate([TIMES[:20], TIMES[26:40], TIMES[47:]])
+    values = np.concatenate([VALUES[:20], VALUES[26:40], VALUES[47:]])
+    variable = VariablePWLNode(max_gap=2)
+    threshold, integral = HigherThanNode(0.5), IntegralWindowNode(7)
+    variable.to(threshold.receive)
+    threshold.to(integral.receive)
+    input_signal, signal = variable.observe(), integral.observe()
+    for time, value in zip(times.tolist(), values.tolist()):
+        variable.receive(time, value)
+    gappy = PiecewiseSignal.from_intervals(input_signal.intervals)
+    assert not gappy.defined.all()
+    offline = OfflineOperators.integral(OfflineOperators.higher_than(gappy, 0.5), 7)
+    assert_same_signal(PiecewiseSignal.from_intervals(signal.intervals), offline)
+
+
+def test_empty_signal():
+    empty = PiecewiseSignal([], [], [], [], [])
+
+    assert np.isnan(empty(PROBE)).all()
+    assert empty.bounds() is None
+    assert len(OfflineOperators.integral(empty, 7)) == 0
+    assert len(OfflineOperators.min_window(empty, 5)) == 0
+    assert len(OfflineOperators.add(empty, SIGNAL)) == 0
+    assert len(OfflineOperators.filter(SIGNAL, empty)) == 0
@@ -0,0 +1,57 @@
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+
+from elements import Interval
+from functions import Polynomial
+from notifiers import Signal
+from plotting import LivePlot
+
+
+def test_live_plot_updates_persistent_lines():
+    fig, ax = plt.subplots()
+    ax.set_xlim(0, 2)
+    signal = Signal()
+    live_plot = LivePlot(fig, fps=1)
+    line = live_plot.bind(ax, signal)
+    signal.append(Interval(0, 1, Polynomial.linear(1, 0)))
+
+    assert live_plot.update() is True
+    signal.append(Interval(1, 2, Polynomial.constant(1)))
+    live_plot.update(force=True)
+
+    assert list(line.get_xdata()) == [0, 1, 1, 2]
+    assert list(line.get_ydata()) == [0, 1, 1, 1]
+    assert ax.get_lines() == [line]
+    plt.close(fig)
+
+
+def test_live_plot_draws_a_bounded_visible_range():
+    fig, ax = plt.subplots()
+    ax.set_xlim(10, 20)
+    signal = Signal()
+    live_plot = LivePlot(fig, fps=1, max_points=8)
+    line = live_plot.bind(ax, signal)
+    for i in range(100):
+        signal.append(Interval(i, i + 1, Polynomial.constant(i)))
+
+    live_plot.update(force=True)
+
+    xdata = list(line.get_xdata())
+    assert len(xdata) <= 8
+    assert xdata[0] <= 10 and xdata[-1] >= 20
+    plt.close(fig)
+
+
+def test_live_plot_throttles_updates():
+    fig, ax = plt.subplots()
+    signal = Signal()
+    live_plot = LivePlot(fig, fps=0.01)
+    live_plot.bind(ax, signal, points=lambda t, x: (t[:1], x[:1]))
+    signal.append(Interval(0, 1, Polynomial.constant(1)))
+
+    assert live_plot.update() is True
+    assert live_plot.update() is False
+    plt.close(fig)
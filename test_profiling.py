@@ -0,0 +1,73 @@
+import sys
+
+from nodes import VariablePWLNode, HigherThanNode, IntegralWindowNode
+from profiling import SamplingProfiler, stack, numbering
+
+
+def build():
+    variable = VariablePWLNode()
+    higher = HigherThanNode(1.5)
+    window = IntegralWindowNode(2)
+    variable.to(higher.receive)
+    higher.to(window.receive)
+    return variable, higher, window
+
+
+def test_stack_labels_nodes():
+    variable, higher, window = build()
+    profiler = SamplingProfiler(roots=[variable])
+    window.to(lambda interval: profiler.sample(sys._getframe()))
+
+    for time, value in [(0, 0), (1, 2), (2, 1), (3, 3), (4, 0), (5, 2)]:
+        variable.receive(time, value)
+
+    assert profiler.samples > 0
+    labels = "#0 VariablePWLNode();#1 HigherThanNode(1.5);#2 IntegralWindowNode(2)"
+    assert set(profiler.stacks) == {labels}
+    assert profiler.collapsed() == f"{labels} {profiler.samples}\n"
+
+
+def test_equal_nodes_get_distinct_labels():
+    variable = VariablePWLNode()
+    branches = [HigherThanNode(1.5), HigherThanNode(1.5)]
+    labels = set()
+    for branch in branches:
+        variable.to(branch.receive)
+        branch.to(lambda interval: labels.add(stack(sys._getframe())[-1]))
+
+    variable.receive(0, 0)
+    variable.receive(1, 2)
+
+    assert labels == {f"HigherThanNode(1.5)@{id(branch):x}" for branch in branches}
+    names = numbering(variable)
+    assert [names[id(branch)] for branch in branches] == ['#1 HigherThanNode(1.5)', '#2 HigherThanNode(1.5)']
+
+
+def test_stack_with_functions():
+    variable, higher, window = build()
+    stacks = []
+    window.to(lambda interval: stacks.append(stack(sys._getframe(), functions=True)))
+
+    variable.receive(0, 0)
+    variable.receive(1, 2)
+    variable.receive(2, 2)
+    variable.receive(3, 2)
+
+    labels = stacks[0]
+    assert labels[-1] == 'test_profiling.<lambda>'
+    assert f'VariablePWLNode()@{id(variable):x}.receive' in labels
+    assert (labels.index(f'HigherThanNode(1.5)@{id(higher):x}.receive') <
+            labels.index(f'IntegralWindowNode(2)@{id(window):x}.receive'))
+
+
+def test_sampling_thread(tmp_path):
+    variable, higher, window = build()
+
+    with SamplingProfiler(interval=0.0001, roots=[variable]) as profiler:
+        for time in range(20000):
+            variable.receive(time, time % 3)
+
+    assert sum(profiler.self_samples().values()) == sum(profiler.stacks.values())
+    assert all(labels.startswith('#0 VariablePWLNode()') for labels in profiler.stacks)
+    profiler.write(tmp_path / 'stacks.txt')
+    assert (tmp_path / 'stacks.txt').read_text() == profiler.collapsed()
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from elements import Interval
+from functions import Polynomial
+from nodes import VariablePWLNode, SumNode
+from runtime import AsyncMonitor
+
+
+async def samples(values):
+    for value in values:
+        await asyncio.sleep(0)
+        yield value
+
+
+async def collect(signal):
+    return [interval async for interval in signal]
+
+
+def test_async_monitor_with_async_iterator():
+    async def main():
+        monitor = AsyncMonitor()
+        x = VariablePWLNode()
+        monitor.add_input(x, samples([(0, 0), (1, 1), (2, 1)]))
+        output = monitor.observe(x)
+        collected = asyncio.create_task(collect(output))
+        await monitor.run()
+        return await collected
+
+    intervals = asyncio.run(main())
+
+    assert intervals == [Interval(0, 1, Polynomial.linear(1, 0)), Interval(1, 2, Polynomial.constant(1))]
+
+
+def test_async_monitor_with_queues():
+    async def main():
+        monitor = AsyncMonitor()
+        x = VariablePWLNode()
+        y = VariablePWLNode()
+        sum_node = SumNode()
+        x.to(sum_node.receive_left)
+        y.to(sum_node.receive_right)
+        x_queue = asyncio.Queue()
+        y_queue = asyncio.Queue()
+        monitor.add_input(x, x_queue)
+        monitor.add_input(y, y_queue)
+        output = monitor.observe(sum_node)
+        collected = asyncio.create_task(collect(output))
+        running = asyncio.create_task(monitor.run())
+        for sample in [(0, 1), (1, 1), (2, 1)]:
+            await x_queue.put(sample)
+        for sample in [(0, 2), (2, 2)]:
+            await y_queue.put(sample)
+        await x_queue.put(None)
+        await y_queue.put(None)
+        await running
+        return await collected
+
+    intervals = asyncio.run(main())
+
+    assert intervals == [Interval(0, 1, Polynomial.constant(3)), Interval(1, 2, Polynomial.constant(3))]
+
+
+def test_async_monitor_raises_node_errors():
+    class FailingNode(VariablePWLNode):
+        def receive(self, time, value):
+            if time == 2:
+                raise ValueError("bad sample")
+            super().receive(time, value)
+
+    async def main():
+        monitor = AsyncMonitor()
+        x = FailingNode()
+        queue = asyncio.Queue()
+        monitor.add_input(x, queue)
+        output = monitor.observe(x)
+        collected = asyncio.create_task(collect(output))
+        for sample in [(0, 0), (1, 1), (2, 1), (3, 1)]:
+            await queue.put(sample)
+        with pytest.raises(ValueError, match="bad sample"):
+            await monitor.run()
+        with pytest.raises(ValueError, match="bad sample"):
+            await collected
+
+    asyncio.run(main())
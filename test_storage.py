@@ -0,0 +1,112 @@
+import pytest
+
+from elements import Interval
+from functions import Polynomial
+from nodes import VariablePWLNode
+from storage import SignalWriter, SignalReader, compact, INDEX_STRIDE
+
+
+def write_constants(path, count):
+    with SignalWriter(path, buffer_size=100) as writer:
+        for i in range(count):
+            writer.append(Interval(i, i + 1, Polynomial.constant(i)))
+
+
+def test_writer_and_reader_round_trip(tmp_path):
+    path = tmp_path / 'signal.sig'
+    variable = VariablePWLNode()
+    writer = SignalWriter(path)
+    variable.to(writer.append)
+    for time, value in [(0, 0), (1, 2), (3, 2)]:
+        variable.receive(time, value)
+    writer.append(Interval(3, 4, Polynomial.undefined()))
+    writer.close()
+
+    reader = SignalReader(path)
+
+    assert len(reader) == 3
+    assert reader.intervals(0, 4) == [Interval(0, 1, Polynomial.linear(2, 0)), Interval(1, 3, Polynomial.constant(2)),
+                                      Interval(3, 4, Polynomial.undefined())]
+
+
+def test_reader_range_query(tmp_path):
+    path = tmp_path / 'signal.sig'
+    write_constants(path, 3 * INDEX_STRIDE + 10)
+
+    reader = SignalReader(path)
+
+    records = reader.range(2000.5, 2003)
+    assert records['start'].tolist() == [2000, 2001, 2002, 2003]
+    assert reader.range(-10, -5)['start'].tolist() == []
+    assert reader.value_at(1500.5) == 1500
+    assert reader.value_at(10 ** 6) is None
+
+
+def test_writer_appends_to_existing_file(tmp_path):
+    path = tmp_path / 'signal.sig'
+    write_constants(path, 2)
+    with SignalWriter(path) as writer:
+        writer.append(Interval(2, 3, Polynomial.constant(2)))
+
+    assert len(SignalReader(path)) == 3
+
+
+def test_compact(tmp_path):
+    path = tmp_path / 'signal.sig'
+    with SignalWriter(path) as writer:
+        for i in range(10):
+            writer.append(Interval(i, i + 1, Polynomial.constant(i // 5)))
+
+    compact(path, before=2, chunk_size=3)
+
+    assert SignalReader(path).intervals(0, 10) == [Interval(2, 5, Polynomial.constant(0)),
+                                                   Interval(5, 10, Polynomial.constant(1))]
+
+
+def test_compact_refuses_file_open_for_writing(tmp_path):
+    path = tmp_path / 'signal.sig'
+    writer = SignalWriter(path)
+    writer.append(Interval(0, 1, Polynomial.constant(0)))
+
+    with pytest.raises(Exception, match="open for writing"):
+        compact(path)
+
+    writer.append(Interval(1, 2, Polynomial.constant(1)))
+    writer.close()
+    compact(path)
+
+    assert SignalReader(path).intervals(0, 2) == [Interval(0, 1, Polynomial.constant(0)),
+                                                  Interval(1, 2, Polynomial.constant(1))]
+
+
+def test_writers_are_counted_per_file(tmp_path):
+    path = tmp_path / 'signal.sig'
+    first, second = SignalWriter(path), SignalWriter(path)
+
+    first.close()
+    first.close()
+    with pytest.raises(Exception, match="open for writing"):
+        compact(path)
+
+    second.append(Interval(0, 1, Polynomial.constant(0)))
+    del second
+    compact(path)
+
+    assert SignalReader(path).intervals(0, 1) == [Interval(0, 1, Polynomial.constant(0))]
+
+
+def test_provisional_flag_round_trip(tmp_path):
+    path = tmp_path / 'signal.sig'
+    with SignalWriter(path) as writer:
+        writer.append(Interval(0, 1, Polynomial.constant(1)).as_provisional())
+        writer.append(Interval(1, 2, Polynomial.constant(1)))
+
+    assert [interval.provisional for interval in SignalReader(path).intervals(0, 2)] == [True, False]
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.sig'
+    path.write_bytes(b'something else')
+
+    with pytest.raises(Exception):
+        SignalReader(path)
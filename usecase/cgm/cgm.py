@@ -1,7 +1,6 @@
-import csv
-
 import matplotlib.pyplot as plt
 
+from ingestion import read_csv_chunks, replay
 from nodes import VariablePWLNode, IntegralWindowNode, MultiplyByConst, HigherThanNode, LowerThanNode, FilterNode
 
 
@@ -10,16 +9,7 @@ def remove_zeros(points):
                                                                       b < 0.0001]
 
 
-def get_data_iterator(csv_path):
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        next(reader, None)
-        for row in reader:
-            yield float(row[0]), float(row[1])
-
-
 data_path = 'data/data.csv'
-data_iterator = get_data_iterator(data_path)
 
 G = VariablePWLNode()
 phi_AR = HigherThanNode(180)
@@ -88,9 +78,7 @@ fig, axs = plt.subplots(4, 1, figsize=(FIG_WIDTH, FIG_HEIGHT), sharex=True, grid
 TAR_threshold = 180
 TBR_threshold = 70
 
-for row_tuple in data_iterator:
-    time, g = row_tuple
-    G.receive(time, g)
+replay(read_csv_chunks(data_path), G)
 
 axs[0].plot(*(glucose.get_points()),
             label='CGM', color='black', marker='o', markersize=3, linestyle='-')
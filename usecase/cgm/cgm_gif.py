@@ -1,26 +1,13 @@
-
-import csv
-
-import matplotlib.pyplot as plt
-
+from frames import Panel, FrameRenderer, DirectoryEncoder
+from ingestion import read_csv_chunks
 from nodes import VariablePWLNode, IntegralWindowNode, MultiplyByConst, HigherThanNode, LowerThanNode, FilterNode
 
 
-def remove_zeros(points):
-    return [a for a, b in zip(points[0], points[1]) if b < 0.00001], [b for a, b in zip(points[0], points[1]) if
-                                                                      b < 0.0001]
-
-
-def get_data_iterator(csv_path):
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        next(reader, None)
-        for row in reader:
-            yield float(row[0]), float(row[1])
+def zeros(t, x):
+    return x < 0.00001
 
 
 data_path = 'data/data.csv'
-data_iterator = get_data_iterator(data_path)
 
 G = VariablePWLNode()
 phi_AR = HigherThanNode(180)
@@ -86,54 +73,55 @@ DPI = 800
 
 
 # === Figure 1: CGM + TAR% + TBR% ===
-fig, axs = plt.subplots(4, 1, figsize=(FIG_WIDTH, FIG_HEIGHT), sharex=True, gridspec_kw={'hspace': 0.35})
 TAR_threshold = 180
 TBR_threshold = 70
-frame_id = 0
-
-for ax in axs:
-    ax.set_xlim(0, 3000)
-axs[0].set_ylim(0,400)
-axs[1].set_ylim(-0.1,1.2)
-axs[2].set_ylim(-2,350)
-axs[3].set_ylim(-1,40)
-
-for row_tuple in data_iterator:
-    time, g = row_tuple
-    G.receive(time, g)
-
-    axs[0].plot(*(glucose.get_points()),
-                label='CGM', color='black', marker='o', markersize=3, linestyle='-')
-    axs[0].axhline(TAR_threshold, color='red', linestyle='--', linewidth=1, label='TAR Threshold (180)')
-    axs[0].axhline(TBR_threshold, color='blue', linestyle='--', linewidth=1, label='TBR Threshold (70)')
-    axs[0].fill_between(glucose.get_points()[0], 70, 180, color='gray', alpha=0.1, label='TIR Range')
-    axs[0].set_title('CGM Trace with Thresholds', fontsize=TITLE_FONT)
-    axs[0].tick_params(labelsize=TICK_FONT)
-    axs[0].grid(True)
+
+
+def build_panels():
+    panels = [Panel(), Panel(), Panel(), Panel()]
+    for panel in panels:
+        panel.call('set_xlim', 0, 3000)
+        panel.call('tick_params', labelsize=TICK_FONT)
+        panel.call('grid', True)
+    panels[0].call('set_ylim', 0, 400)
+    panels[1].call('set_ylim', -0.1, 1.2)
+    panels[2].call('set_ylim', -2, 350)
+    panels[3].call('set_ylim', -1, 40)
+
+    panels[0].plot(glucose, label='CGM', color='black', marker='o', markersize=3, linestyle='-')
+    panels[0].call('axhline', TAR_threshold, color='red', linestyle='--', linewidth=1, label='TAR Threshold (180)')
+    panels[0].call('axhline', TBR_threshold, color='blue', linestyle='--', linewidth=1, label='TBR Threshold (70)')
+    panels[0].call('axhspan', 70, 180, color='gray', alpha=0.1, label='TIR Range')
+    panels[0].call('set_title', 'CGM Trace with Thresholds', fontsize=TITLE_FONT)
 
     # TAR %
-    axs[1].plot(*(mean_TAR.get_points()), color='red', label='$\psi_{TAR}$', linestyle='--')
-    axs[1].plot(*(mean_TBR.get_points()), color='blue', label='$\psi_{TBR}$', linestyle='--')
-    axs[1].set_title('Time Above Range (>180 mg/dL) and Time Below Range (<70 mg/dL)', fontsize=TITLE_FONT)
-    axs[1].tick_params(labelsize=TICK_FONT)
-    axs[1].grid(True)
+    panels[1].plot(mean_TAR, color='red', label='$\\psi_{TAR}$', linestyle='--')
+    panels[1].plot(mean_TBR, color='blue', label='$\\psi_{TBR}$', linestyle='--')
+    panels[1].call('set_title', 'Time Above Range (>180 mg/dL) and Time Below Range (<70 mg/dL)', fontsize=TITLE_FONT)
 
     # TBR %
-    points = remove_zeros(mean_glucose_filtered_AR.get_points())
-    axs[2].scatter(*(points), color='k', label='$\psi_{\mu GBR} = und$', s=30, marker="s")
-    axs[2].plot(*(mean_glucose_filtered_AR.get_points()), color='red', label='$\psi_{\mu GAR}$')
-    axs[2].set_title('Mean Glucose conditional to level above 180 mg/dL', fontsize=TITLE_FONT)
-    axs[2].tick_params(labelsize=TICK_FONT)
-    axs[2].grid(True)
+    panels[2].plot(mean_glucose_filtered_AR, where=zeros, color='k', label='$\\psi_{\\mu GBR} = und$',
+                   markersize=5, marker="s", linestyle='')
+    panels[2].plot(mean_glucose_filtered_AR, color='red', label='$\\psi_{\\mu GAR}$')
+    panels[2].call('set_title', 'Mean Glucose conditional to level above 180 mg/dL', fontsize=TITLE_FONT)
 
     # TBR %
-    points = remove_zeros(mean_glucose_filtered_BR.get_points())
-    axs[3].scatter(*(points), color='k', label='$\psi_{\mu GBR} = und$', s=30, marker="s")
-    axs[3].plot(*(mean_glucose_filtered_BR.get_points()), color='blue', label='$\psi_{\mu GBR}$')
-    axs[3].set_title('Mean Glucose conditional to level below 70 mg/dL', fontsize=TITLE_FONT)
-    axs[3].tick_params(labelsize=TICK_FONT)
-    axs[3].grid(True)
-    plt.savefig(f'fig/gif/figure_cgm_{frame_id:04d}.pdf',
-                dpi=DPI, bbox_inches='tight')
-    frame_id+=1
-
+    panels[3].plot(mean_glucose_filtered_BR, where=zeros, color='k', label='$\\psi_{\\mu GBR} = und$',
+                   markersize=5, marker="s", linestyle='')
+    panels[3].plot(mean_glucose_filtered_BR, color='blue', label='$\\psi_{\\mu GBR}$')
+    panels[3].call('set_title', 'Mean Glucose conditional to level below 70 mg/dL', fontsize=TITLE_FONT)
+    return panels
+
+
+if __name__ == '__main__':
+    # Evaluate the spec once, recording after each sample what every signal holds at that point, then render
+    # every frame in parallel from the recorded signals.
+    renderer = FrameRenderer(build_panels(), figsize=(FIG_WIDTH, FIG_HEIGHT), dpi=DPI, format='pdf',
+                             subplots_kwargs={'sharex': True, 'gridspec_kw': {'hspace': 0.35}},
+                             savefig_kwargs={'bbox_inches': 'tight'})
+    for chunk in read_csv_chunks(data_path):
+        # Every sample is a frame, so samples are fed one by one rather than as a batch.
+        for time, value in chunk.tolist():
+            G.receive(time, value)
+            renderer.record()
+    renderer.render(DirectoryEncoder('fig/gif/figure_cgm_{:04d}.pdf'))
@@ -4,11 +4,12 @@ import csv
 import matplotlib.pyplot as plt
 
 from nodes import VariablePWLNode, IntegralWindowNode, MultiplyByConst, HigherThanNode, LowerThanNode, FilterNode
+from plotting import LivePlot
 
 
-def remove_zeros(points):
-    return [a for a, b in zip(points[0], points[1]) if b < 0.00001], [b for a, b in zip(points[0], points[1]) if
-                                                                      b < 0.0001]
+def remove_zeros(t, x):
+    zeros = x < 0.00001
+    return t[zeros], x[zeros]
 
 
 def get_data_iterator(csv_path):
@@ -98,43 +99,45 @@ axs[1].set_ylim(-0.1,1.2)
 axs[2].set_ylim(-2,350)
 axs[3].set_ylim(-1,40)
 
+live_plot = LivePlot(fig, fps=10)
+
+live_plot.bind(axs[0], glucose, label='CGM', color='black', marker='o', markersize=3, linestyle='-')
+axs[0].axhline(TAR_threshold, color='red', linestyle='--', linewidth=1, label='TAR Threshold (180)')
+axs[0].axhline(TBR_threshold, color='blue', linestyle='--', linewidth=1, label='TBR Threshold (70)')
+axs[0].axhspan(70, 180, color='gray', alpha=0.1, label='TIR Range')
+axs[0].set_title('CGM Trace with Thresholds', fontsize=TITLE_FONT)
+axs[0].tick_params(labelsize=TICK_FONT)
+axs[0].grid(True)
+
+# TAR %
+live_plot.bind(axs[1], mean_TAR, color='red', label='$\psi_{TAR}$', linestyle='--')
+live_plot.bind(axs[1], mean_TBR, color='blue', label='$\psi_{TBR}$', linestyle='--')
+axs[1].set_title('Time Above Range (>180 mg/dL) and Time Below Range (<70 mg/dL)', fontsize=TITLE_FONT)
+axs[1].tick_params(labelsize=TICK_FONT)
+axs[1].grid(True)
+
+# TBR %
+live_plot.bind(axs[2], mean_glucose_filtered_AR, points=remove_zeros, color='k', label='$\psi_{\mu GBR} = und$',
+               markersize=5, marker="s", linestyle='')
+live_plot.bind(axs[2], mean_glucose_filtered_AR, color='red', label='$\psi_{\mu GAR}$')
+axs[2].set_title('Mean Glucose conditional to level above 180 mg/dL', fontsize=TITLE_FONT)
+axs[2].tick_params(labelsize=TICK_FONT)
+axs[2].grid(True)
+
+# TBR %
+live_plot.bind(axs[3], mean_glucose_filtered_BR, points=remove_zeros, color='k', label='$\psi_{\mu GBR} = und$',
+               markersize=5, marker="s", linestyle='')
+live_plot.bind(axs[3], mean_glucose_filtered_BR, color='blue', label='$\psi_{\mu GBR}$')
+axs[3].set_title('Mean Glucose conditional to level below 70 mg/dL', fontsize=TITLE_FONT)
+axs[3].tick_params(labelsize=TICK_FONT)
+axs[3].grid(True)
+
 for row_tuple in data_iterator:
     time, g = row_tuple
     G.receive(time, g)
+    live_plot.update()
+    live_plot.pause(0.1)
 
-    axs[0].plot(*(glucose.get_points()),
-                label='CGM', color='black', marker='o', markersize=3, linestyle='-')
-    axs[0].axhline(TAR_threshold, color='red', linestyle='--', linewidth=1, label='TAR Threshold (180)')
-    axs[0].axhline(TBR_threshold, color='blue', linestyle='--', linewidth=1, label='TBR Threshold (70)')
-    axs[0].fill_between(glucose.get_points()[0], 70, 180, color='gray', alpha=0.1, label='TIR Range')
-    axs[0].set_title('CGM Trace with Thresholds', fontsize=TITLE_FONT)
-    axs[0].tick_params(labelsize=TICK_FONT)
-    axs[0].grid(True)
-
-    # TAR %
-    axs[1].plot(*(mean_TAR.get_points()), color='red', label='$\psi_{TAR}$', linestyle='--')
-    axs[1].plot(*(mean_TBR.get_points()), color='blue', label='$\psi_{TBR}$', linestyle='--')
-    axs[1].set_title('Time Above Range (>180 mg/dL) and Time Below Range (<70 mg/dL)', fontsize=TITLE_FONT)
-    axs[1].tick_params(labelsize=TICK_FONT)
-    axs[1].grid(True)
-
-    # TBR %
-    points = remove_zeros(mean_glucose_filtered_AR.get_points())
-    axs[2].scatter(*(points), color='k', label='$\psi_{\mu GBR} = und$', s=30, marker="s")
-    axs[2].plot(*(mean_glucose_filtered_AR.get_points()), color='red', label='$\psi_{\mu GAR}$')
-    axs[2].set_title('Mean Glucose conditional to level above 180 mg/dL', fontsize=TITLE_FONT)
-    axs[2].tick_params(labelsize=TICK_FONT)
-    axs[2].grid(True)
-
-    # TBR %
-    points = remove_zeros(mean_glucose_filtered_BR.get_points())
-    axs[3].scatter(*(points), color='k', label='$\psi_{\mu GBR} = und$', s=30, marker="s")
-    axs[3].plot(*(mean_glucose_filtered_BR.get_points()), color='blue', label='$\psi_{\mu GBR}$')
-    axs[3].set_title('Mean Glucose conditional to level below 70 mg/dL', fontsize=TITLE_FONT)
-    axs[3].tick_params(labelsize=TICK_FONT)
-    axs[3].grid(True)
-    plt.draw()
-    plt.pause(0.1)
-
+live_plot.update(force=True)
 plt.ioff()
 plt.show()
@@ -1,6 +1,8 @@
 import pandas as pd
 from datetime import datetime
 
+from ingestion import to_time_array
+
 # Paths to data file
 input_csv = '1011_0_20210622.csv'
 output_csv = 'data.csv'
@@ -19,9 +21,7 @@ df_filtered = df[
     ].copy()
 
 # 4) Transform date to minutes
-df_filtered['minutes'] = (
-        (df_filtered['Date'] - ref_time).dt.total_seconds() / 60.0
-).astype(int)
+df_filtered['minutes'] = to_time_array(df_filtered['Date'], 'm', ref_time).astype(int)
 
 # 5) Export only cgm
 df_filtered = df_filtered[['minutes', 'CGM (mg / dl)']].copy()
@@ -1,81 +1,62 @@
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 
+from ingestion import merge_join, to_time_array
+
 # Paths to data file
 co2_path = "ICOS_ATC_L2_L2-2024.1_HPB_131.0_CTS.CO2"
 mto_path = "ICOS_ATC_L2_L2-2024.1_HPB_131.0_CTS.MTO"
 
-# 1) Read CO₂ file
-#   - Skip the 47 header lines
-#   - Columns are semicolon‐separated
-#   - We only need: Year, Month, Day, Hour, Minute, and co2
-co2_cols = [
-    "Year", "Month", "Day", "Hour", "Minute", "co2"
-]
-co2_df = pd.read_csv(
-    co2_path,
-    sep=";",
-    skiprows=46,
-    usecols=co2_cols
-)
-
-# 1.1) keep only 2022
-
-co2_df = co2_df[co2_df.Year == 2022]
-
-# 2) Construct a pandas datetime from Year–Month–Day–Hour–Minute
-co2_df["TIMESTAMP"] = pd.to_datetime(
-    co2_df[["Year", "Month", "Day", "Hour", "Minute"]]
-)
-
-# Keep only TIMESTAMP and co2 columns
-co2_df = co2_df[["TIMESTAMP", "co2"]]
-
-# 3) Read meteorology (MTO) file
-#   - Skip the 35 header lines
-#   - Columns are semicolon‐separated
-#   - We only need: Year, Month, Day, Hour, Minute, and AT (air temperature)
-mto_cols = [
-    "Year", "Month", "Day", "Hour", "Minute", "AT"
-]
-mto_df = pd.read_csv(
-    mto_path,
-    sep=";",
-    skiprows=35,
-    usecols=mto_cols
-)
-
-# 4) Construct a pandas datetime from Year–Month–Day–Hour–Minute
-mto_df["TIMESTAMP"] = pd.to_datetime(
-    mto_df[["Year", "Month", "Day", "Hour", "Minute"]]
-)
-# Keep only TIMESTAMP and AT columns
-mto_df = mto_df[["TIMESTAMP", "AT"]]
-
-# 5) Merge the two DataFrames on TIMESTAMP (hourly)
-merged = pd.merge(
-    co2_df,
-    mto_df,
-    on="TIMESTAMP",
-    how="inner"
-)
-
-# 6) Sort by TIMESTAMP to ensure chronological order
-merged = merged.sort_values("TIMESTAMP").reset_index(drop=True)
-
-ref_time = datetime(2022, 1, 1, 0, 0, 0)
-
-# 7) Transform date to hours
-merged['time'] = (
-        (merged['TIMESTAMP'] - ref_time).dt.total_seconds() / 3600
-).astype(int)
-
-merged = merged[["time", "co2", "AT"]]
-
-merged = merged[(merged["time"]<15*24) & (merged["co2"]>-700) & (merged["AT"]>-700)]
-
-# 8) Save the result to CSV
-output_path = "data.csv"
-merged.to_csv(output_path, index=False)
-print(f"Data saved to: {output_path}")
\ No newline at end of file
+DATE_COLUMNS = ["Year", "Month", "Day", "Hour", "Minute"]
+YEAR = 2022
+REF_TIME = datetime(YEAR, 1, 1, 0, 0, 0)
+MAX_TIME = 15 * 24
+CHUNK_SIZE = 100000
+
+
+def read_icos(path, column, skiprows, chunk_size=CHUNK_SIZE, max_time=MAX_TIME):
+    # Streams an ICOS file as (time, value) float arrays, time in exact hours since REF_TIME. Only rows of YEAR before
+    # max_time with a valid value (missing values are -999.99) are kept. ICOS files are sorted by date, so reading
+    # stops at the first chunk past max_time.
+    #   - Columns are semicolon‐separated
+    #   - We only need: Year, Month, Day, Hour, Minute, and the value column
+    with pd.read_csv(path, sep=";", skiprows=skiprows, usecols=DATE_COLUMNS + [column],
+                     chunksize=chunk_size) as reader:
+        for chunk in reader:
+            done = (chunk.Year > YEAR).any()
+            chunk = chunk[chunk.Year == YEAR]
+            if not chunk.empty:
+                timestamp = pd.to_datetime(chunk[DATE_COLUMNS])
+                time = to_time_array(timestamp, 'h', REF_TIME)
+                value = chunk[column].to_numpy()
+                keep = (time < max_time) & (value > -700)
+                yield np.column_stack([time[keep], value[keep]]).astype(float)
+                done = done or time[-1] >= max_time
+            if done:
+                return
+
+
+def samples(chunk_size=CHUNK_SIZE, max_time=MAX_TIME):
+    # Chunks of (time, co2, AT) rows, merge-joined on the full timestamp and then truncated to whole hours, as the
+    # original pandas merge did. Feed them straight to the monitor with
+    # ingestion.replay(samples(), co2, temp), or write them to data.csv as below.
+    #   - CO2 file: skip the 46 lines before the header
+    #   - MTO file: skip the 35 lines before the header
+    co2 = read_icos(co2_path, "co2", 46, chunk_size, max_time)
+    mto = read_icos(mto_path, "AT", 35, chunk_size, max_time)
+    for chunk in merge_join(co2, mto):
+        chunk[:, 0] = np.floor(chunk[:, 0])
+        yield chunk
+
+
+if __name__ == '__main__':
+    # Save the result to CSV, one chunk at a time
+    output_path = "data.csv"
+    with open(output_path, "w", newline="") as file:
+        file.write("time,co2,AT\n")
+        for chunk in samples():
+            merged = pd.DataFrame({"time": chunk[:, 0].astype(int), "co2": chunk[:, 1], "AT": chunk[:, 2]})
+            merged.to_csv(file, index=False, header=False)
+    print(f"Data saved to: {output_path}")
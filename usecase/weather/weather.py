@@ -1,20 +1,10 @@
-import csv
-
 import matplotlib.pyplot as plt
 
+from ingestion import read_csv_chunks, replay
 from nodes import VariablePWLNode, IntegralWindowNode, MultiplyByConst, HigherThanNode, MinNode
 
 
-def get_data_iterator(csv_path):
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        next(reader, None)
-        for row in reader:
-            yield float(row[0]), float(row[1]), float(row[2])
-
-
 data_path = 'data/data.csv'
-data_iterator = get_data_iterator(data_path)
 
 co2 = VariablePWLNode()
 int_co2 = IntegralWindowNode(5)
@@ -56,10 +46,7 @@ LEGEND_FONT = 11
 FIG_WIDTH, FIG_HEIGHT = 10, 6  # inches
 DPI = 800
 
-for row_tuple in data_iterator:
-    time, co2_value, temp_value = row_tuple
-    co2.receive(time, co2_value)
-    temp.receive(time, temp_value)
+replay(read_csv_chunks(data_path), co2, temp)
 
 # ---- Create figure & axes ----
 fig, axs = plt.subplots(3, 1,
@@ -1,20 +1,9 @@
-import csv
-
-import matplotlib.pyplot as plt
-
+from frames import Panel, FrameRenderer, DirectoryEncoder
+from ingestion import read_csv_chunks
 from nodes import VariablePWLNode, IntegralWindowNode, MultiplyByConst, HigherThanNode, MinNode
 
 
-def get_data_iterator(csv_path):
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.reader(csvfile)
-        next(reader, None)
-        for row in reader:
-            yield float(row[0]), float(row[1]), float(row[2])
-
-
 data_path = 'data/data.csv'
-data_iterator = get_data_iterator(data_path)
 
 co2 = VariablePWLNode()
 int_co2 = IntegralWindowNode(5)
@@ -56,60 +45,59 @@ LEGEND_FONT = 11
 FIG_WIDTH, FIG_HEIGHT = 15, 10  # inches
 DPI = 800
 
-# ---- Create figure & axes ----
-fig, axs = plt.subplots(3, 1,
-                        figsize=(FIG_WIDTH, FIG_HEIGHT),
-                        sharex=True)  # share x‐axis if your x‐data are the same
-
-frame_id = 0
-for ax in axs:
-    ax.set_xlim(0, 380)
-axs[0].set_ylim(410,435)
-axs[1].set_ylim(-10,15)
-axs[2].set_ylim(-0.1,1.2)
-
-for row_tuple in data_iterator:
-    time, co2_value, temp_value = row_tuple
-    co2.receive(time, co2_value)
-    temp.receive(time, temp_value)
+def build_panels():
+    panels = [Panel(), Panel(), Panel()]
+    for panel in panels:
+        panel.call('set_xlim', 0, 380)
+        panel.call('tick_params', labelsize=TICK_FONT)
+        panel.call('grid', True)
+    panels[0].call('set_ylim', 410, 435)
+    panels[1].call('set_ylim', -10, 15)
+    panels[2].call('set_ylim', -0.1, 1.2)
 
     # ---- CO2 panel ----
-    axs[0].plot(*co2_obs.get_points(),
-                label='CO₂ (ppm)', color='black',
-                marker='o', markersize=1.5, linestyle='-')
-    axs[0].plot(*mean_co2_obs.get_points(),
-                color='red', label='Mean CO₂', linestyle='-')
-    axs[0].axhline(mean_co2_threshold,
+    panels[0].plot(co2_obs,
+                   label='CO₂ (ppm)', color='black',
+                   marker='o', markersize=1.5, linestyle='-')
+    panels[0].plot(mean_co2_obs,
+                   color='red', label='Mean CO₂', linestyle='-')
+    panels[0].call('axhline', mean_co2_threshold,
                    color='red', linestyle='--', linewidth=1,
                    label=f'Mean CO₂ Threshold ({mean_co2_threshold:.0f})')
-    axs[0].set_title('Atmospheric CO₂ Observations', fontsize=TITLE_FONT)
-    axs[0].tick_params(labelsize=TICK_FONT)
-    axs[0].grid(True)
+    panels[0].call('set_title', 'Atmospheric CO₂ Observations', fontsize=TITLE_FONT)
 
     # ---- Temperature panel ----
-    axs[1].plot(*temp_obs.get_points(),
-                label='Temperature (°C)', color='black',
-                marker='o', markersize=1.5, linestyle='-')
-    axs[1].plot(*mean_temp_obs.get_points(),
-                color='red', label='Mean Temperature', linestyle='-')
-    axs[1].axhline(mean_temperature_threshold,
+    panels[1].plot(temp_obs,
+                   label='Temperature (°C)', color='black',
+                   marker='o', markersize=1.5, linestyle='-')
+    panels[1].plot(mean_temp_obs,
+                   color='red', label='Mean Temperature', linestyle='-')
+    panels[1].call('axhline', mean_temperature_threshold,
                    color='red', linestyle='--', linewidth=1,
                    label=f'Mean Temp Threshold ({mean_temperature_threshold:.0f})')
-    axs[1].set_title('Temperature Observations', fontsize=TITLE_FONT)
-    axs[1].tick_params(labelsize=TICK_FONT)
-    axs[1].grid(True)
+    panels[1].call('set_title', 'Temperature Observations', fontsize=TITLE_FONT)
 
     # ---- Combined φ_W panel ----
-    axs[2].plot(*and_spec_obs.get_points(),
-                color='blue',
-                label=(
-                    r'$\phi_W(5h,'
-                    f'{mean_co2_threshold:.0f},'
-                    f'{mean_temperature_threshold:.0f})$'
-                ))
-    axs[2].set_title(r'$\phi_W$ Formula', fontsize=TITLE_FONT)
-    axs[2].tick_params(labelsize=TICK_FONT)
-    axs[2].grid(True)
-    plt.savefig(f'fig/gif/figure_weather_{frame_id:04d}.pdf',
-                dpi=DPI, bbox_inches='tight')
-    frame_id+=1
\ No newline at end of file
+    panels[2].plot(and_spec_obs,
+                   color='blue',
+                   label=(
+                       r'$\phi_W(5h,'
+                       f'{mean_co2_threshold:.0f},'
+                       f'{mean_temperature_threshold:.0f})$'
+                   ))
+    panels[2].call('set_title', r'$\phi_W$ Formula', fontsize=TITLE_FONT)
+    return panels
+
+
+if __name__ == '__main__':
+    # Evaluate the spec once, recording after each sample what every signal holds at that point, then render
+    # every frame in parallel from the recorded signals.
+    renderer = FrameRenderer(build_panels(), figsize=(FIG_WIDTH, FIG_HEIGHT), dpi=DPI, format='pdf',
+                             savefig_kwargs={'bbox_inches': 'tight'})
+    for chunk in read_csv_chunks(data_path):
+        # Every sample is a frame, so samples are fed one by one rather than as a batch.
+        for time, co2_value, temp_value in chunk.tolist():
+            co2.receive(time, co2_value)
+            temp.receive(time, temp_value)
+            renderer.record()
+    renderer.render(DirectoryEncoder('fig/gif/figure_weather_{:04d}.pdf'))
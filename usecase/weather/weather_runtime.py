@@ -3,6 +3,7 @@ import csv
 import matplotlib.pyplot as plt
 
 from nodes import VariablePWLNode, IntegralWindowNode, MultiplyByConst, HigherThanNode, MinNode
+from plotting import LivePlot
 
 
 def get_data_iterator(csv_path):
@@ -68,49 +69,53 @@ axs[0].set_ylim(410,435)
 axs[1].set_ylim(-10,15)
 axs[2].set_ylim(-0.1,1.2)
 
+live_plot = LivePlot(fig, fps=20)
+
+# ---- CO2 panel ----
+live_plot.bind(axs[0], co2_obs,
+               label='CO₂ (ppm)', color='black',
+               marker='o', markersize=1.5, linestyle='-')
+live_plot.bind(axs[0], mean_co2_obs,
+               color='red', label='Mean CO₂', linestyle='-')
+axs[0].axhline(mean_co2_threshold,
+               color='red', linestyle='--', linewidth=1,
+               label=f'Mean CO₂ Threshold ({mean_co2_threshold:.0f})')
+axs[0].set_title('Atmospheric CO₂ Observations', fontsize=TITLE_FONT)
+axs[0].tick_params(labelsize=TICK_FONT)
+axs[0].grid(True)
+
+# ---- Temperature panel ----
+live_plot.bind(axs[1], temp_obs,
+               label='Temperature (°C)', color='black',
+               marker='o', markersize=1.5, linestyle='-')
+live_plot.bind(axs[1], mean_temp_obs,
+               color='red', label='Mean Temperature', linestyle='-')
+axs[1].axhline(mean_temperature_threshold,
+               color='red', linestyle='--', linewidth=1,
+               label=f'Mean Temp Threshold ({mean_temperature_threshold:.0f})')
+axs[1].set_title('Temperature Observations', fontsize=TITLE_FONT)
+axs[1].tick_params(labelsize=TICK_FONT)
+axs[1].grid(True)
+
+# ---- Combined φ_W panel ----
+live_plot.bind(axs[2], and_spec_obs,
+               color='blue',
+               label=(
+                   r'$\phi_W(5h,'
+                   f'{mean_co2_threshold:.0f},'
+                   f'{mean_temperature_threshold:.0f})$'
+               ))
+axs[2].set_title(r'$\phi_W$ Formula', fontsize=TITLE_FONT)
+axs[2].tick_params(labelsize=TICK_FONT)
+axs[2].grid(True)
+
 for row_tuple in data_iterator:
     time, co2_value, temp_value = row_tuple
     co2.receive(time, co2_value)
     temp.receive(time, temp_value)
+    live_plot.update()
+    live_plot.pause(0.05)
 
-    # ---- CO2 panel ----
-    axs[0].plot(*co2_obs.get_points(),
-                label='CO₂ (ppm)', color='black',
-                marker='o', markersize=1.5, linestyle='-')
-    axs[0].plot(*mean_co2_obs.get_points(),
-                color='red', label='Mean CO₂', linestyle='-')
-    axs[0].axhline(mean_co2_threshold,
-                   color='red', linestyle='--', linewidth=1,
-                   label=f'Mean CO₂ Threshold ({mean_co2_threshold:.0f})')
-    axs[0].set_title('Atmospheric CO₂ Observations', fontsize=TITLE_FONT)
-    axs[0].tick_params(labelsize=TICK_FONT)
-    axs[0].grid(True)
-
-    # ---- Temperature panel ----
-    axs[1].plot(*temp_obs.get_points(),
-                label='Temperature (°C)', color='black',
-                marker='o', markersize=1.5, linestyle='-')
-    axs[1].plot(*mean_temp_obs.get_points(),
-                color='red', label='Mean Temperature', linestyle='-')
-    axs[1].axhline(mean_temperature_threshold,
-                   color='red', linestyle='--', linewidth=1,
-                   label=f'Mean Temp Threshold ({mean_temperature_threshold:.0f})')
-    axs[1].set_title('Temperature Observations', fontsize=TITLE_FONT)
-    axs[1].tick_params(labelsize=TICK_FONT)
-    axs[1].grid(True)
-
-    # ---- Combined φ_W panel ----
-    axs[2].plot(*and_spec_obs.get_points(),
-                color='blue',
-                label=(
-                    r'$\phi_W(5h,'
-                    f'{mean_co2_threshold:.0f},'
-                    f'{mean_temperature_threshold:.0f})$'
-                ))
-    axs[2].set_title(r'$\phi_W$ Formula', fontsize=TITLE_FONT)
-    axs[2].tick_params(labelsize=TICK_FONT)
-    axs[2].grid(True)
-    plt.draw()
-    plt.pause(0.05)
+live_plot.update(force=True)
 plt.ioff()
 plt.show()